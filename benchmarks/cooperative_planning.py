@@ -0,0 +1,79 @@
+"""
+Measures cooperative (WHCA*) planning time per agent as the fleet grows.
+
+Usage:
+    python benchmarks/cooperative_planning.py [--size 128] [--fleets 25 50 100 200 400]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from environment import Environment
+from algorithms.cooperative import DEFAULT_WINDOW, CooperativePlanner
+
+def write_open_map(path, size, wall_density, seed):
+    """Writes a square map of random walls inside a wall border."""
+    rng = random.Random(seed)
+    rows = []
+    for y in range(size):
+        rows.append(''.join('#' if y in (0, size - 1) or x in (0, size - 1) or rng.random() < wall_density
+                            else '.' for x in range(size)))
+    with open(path, 'w') as f:
+        f.write('\n'.join(rows))
+
+def main():
+    parser = argparse.ArgumentParser(description="Cooperative planning benchmark")
+    parser.add_argument("--size", type=int, default=128, help="Side length of the generated map.")
+    parser.add_argument("--walls", type=float, default=0.15, help="Fraction of cells that are walls.")
+    parser.add_argument("--fleets", type=int, nargs='+', default=[25, 50, 100, 200, 400],
+                        help="Fleet sizes to measure.")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Planning window in time steps.")
+    parser.add_argument("--steps", type=int, default=64, help="Time steps simulated per fleet size.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        map_path = os.path.join(directory, 'open.txt')
+        write_open_map(map_path, args.size, args.walls, args.seed)
+        environment = Environment(map_path)
+
+    free_cells = [(y, x) for y in range(environment.height) for x in range(environment.width)
+                  if environment.passable_cells[environment.index_of((y, x))]]
+
+    print(f"{args.size}x{args.size} map, window {args.window}, {args.steps} steps")
+    print(f"{'agents':>8} {'setup ms/agent':>15} {'plan ms/agent':>14} {'nodes/agent':>12} {'at goal':>8}")
+    for fleet_size in args.fleets:
+        rng = random.Random(args.seed)
+        cells = rng.sample(free_cells, 2 * fleet_size)
+        planner = CooperativePlanner(environment, window=args.window)
+
+        # Setup covers each agent's distance-to-goal field.
+        started = time.perf_counter()
+        for start_pos, goal_pos in zip(cells[:fleet_size], cells[fleet_size:]):
+            planner.add_agent(start_pos, goal_pos)
+        setup_time = time.perf_counter() - started
+
+        planning_time = 0
+        nodes_expanded = 0
+        rounds = 0
+        for _ in range(args.steps):
+            started = time.perf_counter()
+            nodes = planner.step()
+            if nodes:
+                planning_time += time.perf_counter() - started
+                nodes_expanded += nodes
+                rounds += 1
+        at_goal = sum(position == goal for position, goal in zip(planner.positions, planner.goals))
+
+        per_agent_round = max(rounds, 1) * fleet_size
+        print(f"{fleet_size:>8} {1000 * setup_time / fleet_size:>15.2f} "
+              f"{1000 * planning_time / per_agent_round:>14.3f} "
+              f"{nodes_expanded / per_agent_round:>12.1f} {at_goal:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Procedural maps in the Environment text format, for benchmarks.
+
+Every generator is a pure function of its size and seed, built with whole-array
+NumPy operations so 4096x4096 maps take seconds. Maps have a wall border, the
+start 'S' near the top-left corner and the goal 'G' near the bottom-right one,
+connected whenever the terrain allows.
+
+Usage:
+    python benchmarks/map_generator.py maze 1024 maze.txt [--seed 0] [--dynamic 0.001]
+"""
+import argparse
+
+import numpy as np
+
+def open_field(size, rng, walls=0.02):
+    """Open terrain with isolated walls scattered at the given density."""
+    grid = np.full((size, size), '.', dtype='<U1')
+    grid[rng.random((size, size)) < walls] = '#'
+    return grid
+
+def noisy_terrain(size, rng, walls=0.2, difficult=0.2, blob_size=8):
+    """
+    Patchy terrain: walls, ':' (cost 2) and '*' (cost 3) cells come in blobs.
+
+    Smooth noise is upsampled from a coarse grid with one cell per blob and mixed
+    with fine noise, then cut at quantiles so the densities are as requested.
+    """
+    coarse_size = -(-size // blob_size) + 1
+    coarse = rng.random((coarse_size, coarse_size))
+    smooth = np.repeat(np.repeat(coarse, blob_size, axis=0), blob_size, axis=1)[:size, :size]
+    noise = 0.7 * smooth + 0.3 * rng.random((size, size))
+
+    grid = np.full((size, size), '.', dtype='<U1')
+    wall_level, rough_level, very_rough_level = np.quantile(
+        noise, [1 - walls, 1 - walls - difficult, 1 - walls - difficult / 2])
+    grid[noise >= rough_level] = ':'
+    grid[noise >= very_rough_level] = '*'
+    grid[noise >= wall_level] = '#'
+    return grid
+
+def maze(size, rng, loops=0.02):
+    """
+    A sidewinder maze on the odd rows and columns, with some walls knocked out.
+
+    Each row is split into random runs of east-west corridor, and every run
+    opens one passage north from a random cell in it, so all cells connect.
+    With loops > 0, that fraction of the remaining inner walls is removed, which
+    adds alternative routes.
+    """
+    grid = np.full((size, size), '#', dtype='<U1')
+    cells = (size - 1) // 2 # Maze cells per side, at odd coordinates
+    if cells < 1:
+        return grid
+    grid[1:2 * cells:2, 1:2 * cells:2] = '.'
+    grid[1, 1:2 * cells] = '.' # The first row is one corridor
+
+    # Within each later row, a cell carves east unless its run closes there.
+    carve_east = rng.random((cells - 1, cells - 1)) < 0.5
+    east_walls = grid[3:2 * cells:2, 2:2 * cells - 1:2]
+    east_walls[carve_east] = '.'
+
+    # Runs are numbered along the row; each opens north at its highest random key.
+    run_starts = np.ones((cells - 1, cells), dtype=bool)
+    run_starts[:, 1:] = ~carve_east
+    run_ids = np.cumsum(run_starts.ravel()) - 1
+    keys = rng.random(run_ids.size)
+    order = np.lexsort((keys, run_ids))
+    last_of_run = np.ones(order.size, dtype=bool)
+    last_of_run[:-1] = run_ids[order][1:] != run_ids[order][:-1]
+    chosen = order[last_of_run]
+    rows, columns = np.divmod(chosen, cells)
+    grid[2 * rows + 2, 2 * columns + 1] = '.'
+
+    if loops > 0:
+        inner = grid[1:-1, 1:-1]
+        # Walls between two open cells, horizontally or vertically.
+        horizontal = (inner == '#') & (np.roll(inner, 1, axis=1) == '.') & (np.roll(inner, -1, axis=1) == '.')
+        vertical = (inner == '#') & (np.roll(inner, 1, axis=0) == '.') & (np.roll(inner, -1, axis=0) == '.')
+        removable = horizontal | vertical
+        inner[removable & (rng.random(inner.shape) < loops)] = '.'
+    return grid
+
+GENERATORS = {
+    'open': open_field,
+    'noisy': noisy_terrain,
+    'maze': maze,
+}
+
+def generate_map(kind, size, seed, dynamic=0.0, **options):
+    """
+    Generates a map.
+
+    Args:
+        kind (str): A key of GENERATORS.
+        size (int): The side length, walls included.
+        seed (int): Seeds every random choice.
+        dynamic (float): The fraction of open cells holding a 'D' dynamic obstacle.
+        **options: Passed to the generator, e.g. walls for 'open'.
+
+    Returns:
+        numpy.ndarray: The map as a (size, size) array of characters.
+    """
+    rng = np.random.default_rng(seed)
+    grid = GENERATORS[kind](size, rng, **options)
+    grid[0, :] = grid[-1, :] = '#'
+    grid[:, 0] = grid[:, -1] = '#'
+
+    if dynamic > 0:
+        grid[(grid == '.') & (rng.random(grid.shape) < dynamic)] = 'D'
+
+    # Start and goal go on the open cells closest to opposite corners.
+    open_cells = np.argwhere(np.isin(grid, ['.', ':', '*']))
+    if open_cells.size:
+        start = open_cells[np.argmin(open_cells.sum(axis=1))]
+        goal = open_cells[np.argmax(open_cells.sum(axis=1))]
+        grid[tuple(start)] = 'S'
+        grid[tuple(goal)] = 'G'
+    return grid
+
+def write_map(grid, map_path):
+    """Writes a character grid as a text map."""
+    with open(map_path, 'w') as f:
+        f.write('\n'.join(''.join(row) for row in grid))
+        f.write('\n')
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a benchmark map.")
+    parser.add_argument("kind", choices=list(GENERATORS))
+    parser.add_argument("size", type=int, help="Side length of the map, walls included.")
+    parser.add_argument("map_path", help="Path of the text map to write.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dynamic", type=float, default=0.0,
+                        help="Fraction of open cells holding a dynamic obstacle.")
+    args = parser.parse_args()
+    write_map(generate_map(args.kind, args.size, args.seed, args.dynamic), args.map_path)
+
+if __name__ == "__main__":
+    main()
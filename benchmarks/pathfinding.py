@@ -0,0 +1,321 @@
+"""
+Pathfinding benchmark suite with regression tracking.
+
+Runs bfs, ucs, a_star and hill_climbing_replan on procedurally generated maps
+(see map_generator.py) and records wall time, nodes expanded, path cost and
+peak memory to JSON. Each run happens in a fresh process with a timeout, on a
+map generated from a fixed seed and cached in the binary format, so runs are
+comparable across commits.
+
+Usage:
+    python benchmarks/pathfinding.py run --output results.json [--sizes 64 256 1024 4096]
+    python benchmarks/pathfinding.py compare baseline.json results.json [--threshold 0.1]
+
+compare exits with status 1 if any regression is flagged.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, '..', 'src'))
+
+import numpy as np
+
+from environment import Environment
+from map_format import save_binary_map
+from algorithms.a_star import a_star
+from algorithms.bfs import bfs
+from algorithms.local_search import hill_climbing_replan
+from algorithms.search_stats import SearchStats
+from algorithms.ucs import ucs
+from map_generator import generate_map, write_map
+
+# Map scenarios: generator arguments, all seeded by the run's seed.
+SCENARIOS = {
+    'open': {'kind': 'open'},
+    'noisy': {'kind': 'noisy'},
+    'maze': {'kind': 'maze'},
+    'dynamic-sparse': {'kind': 'open', 'dynamic': 0.001},
+    'dynamic-dense': {'kind': 'open', 'dynamic': 0.01},
+}
+
+DEFAULT_SIZES = [64, 256, 1024, 4096]
+
+# Algorithms with the options they run with; local search is seeded so it is repeatable.
+ALGORITHMS = {
+    'bfs': (bfs, {}),
+    'ucs': (ucs, {}),
+    'a_star': (a_star, {}),
+    'hill_climbing_replan': (hill_climbing_replan, {'seed': 0}),
+}
+
+# Differences below these are noise, whatever the relative change.
+MIN_TIME_DIFFERENCE = 0.005 # seconds
+MIN_MEMORY_DIFFERENCE = 64 * 1024 # bytes
+
+def prepare_map(map_dir, scenario, size, seed):
+    """
+    Generates a scenario's map unless it is already cached.
+
+    Returns:
+        str: The path of the binary map.
+    """
+    binary_path = os.path.join(map_dir, f"{scenario}-{size}-{seed}.map")
+    if not os.path.exists(binary_path):
+        text_path = binary_path[:-len('.map')] + '.txt'
+        write_map(generate_map(size=size, seed=seed, **SCENARIOS[scenario]), text_path)
+        save_binary_map(Environment(text_path), binary_path)
+        os.remove(text_path)
+    return binary_path
+
+def _run_case(connection, map_path, algorithm_name, repeat):
+    """Runs one algorithm on one map in a child process and sends back the timings."""
+    try:
+        environment = Environment(map_path)
+        algorithm, options = ALGORITHMS[algorithm_name]
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            path, nodes_expanded, cost = algorithm(environment, environment.start_pos, environment.goal_pos,
+                                                   **options)
+            times.append(time.perf_counter() - started)
+        connection.send({
+            'status': 'ok',
+            'wall_seconds': statistics.median(times),
+            'all_wall_seconds': times,
+            'path_found': bool(path),
+            'nodes_expanded': nodes_expanded,
+            'cost': float(cost) if path else None,
+            'path_length': len(path) if path else 0,
+        })
+    except Exception as e:
+        connection.send({'status': 'error', 'error': f"{type(e).__name__}: {e}"})
+
+def _trace_case(connection, map_path, algorithm_name):
+    """Runs one algorithm on one map with memory tracing in a child process and sends back the counters."""
+    try:
+        environment = Environment(map_path)
+        algorithm, options = ALGORITHMS[algorithm_name]
+        stats = SearchStats()
+        algorithm(environment, environment.start_pos, environment.goal_pos, stats=stats, **options)
+        connection.send({'status': 'ok', 'peak_memory_bytes': stats.peak_memory, 'stats': stats.to_dict()})
+    except Exception as e:
+        connection.send({'status': 'error', 'error': f"{type(e).__name__}: {e}"})
+
+def _run_in_process(target, args, timeout):
+    """
+    Runs target(connection, *args) in a fresh process and returns what it sends.
+
+    Returns:
+        dict: The result, with status 'timeout' if the process ran out of time.
+    """
+    connection, child_connection = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=target, args=(child_connection,) + args)
+    process.start()
+    child_connection.close()
+    if connection.poll(timeout):
+        try:
+            result = connection.recv()
+        except EOFError:
+            result = {'status': 'error', 'error': f"worker exited with code {process.exitcode}"}
+    else:
+        process.kill()
+        result = {'status': 'timeout', 'timeout_seconds': timeout}
+    process.join()
+    return result
+
+def run_case(map_path, algorithm_name, repeat, timeout, trace_memory, memory_timeout):
+    """
+    Runs one algorithm on one map: the timed runs, then optionally a traced run.
+
+    Each goes to its own process with its own timeout. Tracing slows searches
+    down many times over, so a traced run that runs out of time only leaves
+    the peak memory unknown (memory_status 'timeout') and never discards the
+    timings.
+
+    Returns:
+        dict: The measurements, with status 'timeout' if the timed runs ran out of time.
+    """
+    result = _run_in_process(_run_case, (map_path, algorithm_name, repeat), timeout)
+    if trace_memory and result['status'] == 'ok':
+        traced = _run_in_process(_trace_case, (map_path, algorithm_name), memory_timeout)
+        result['memory_status'] = traced['status']
+        if traced['status'] == 'ok':
+            result['peak_memory_bytes'] = traced['peak_memory_bytes']
+            result['stats'] = traced['stats']
+    return result
+
+def run_suite(args):
+    """Runs every selected scenario, size and algorithm and writes the results."""
+    map_dir = args.map_dir or os.path.join(tempfile.gettempdir(), 'pathfinding-benchmark-maps')
+    os.makedirs(map_dir, exist_ok=True)
+
+    results = []
+    for scenario in args.scenarios:
+        for size in args.sizes:
+            started = time.perf_counter()
+            map_path = prepare_map(map_dir, scenario, size, args.seed)
+            print(f"{scenario} {size}x{size} (map ready in {time.perf_counter() - started:.1f}s)", flush=True)
+            for algorithm_name in args.algorithms:
+                result = run_case(map_path, algorithm_name, args.repeat, args.timeout, not args.no_memory,
+                                  args.memory_timeout)
+                result = dict({'scenario': scenario, 'size': size, 'seed': args.seed,
+                               'algorithm': algorithm_name}, **result)
+                results.append(result)
+                print(f"  {algorithm_name:<22} {_summary(result)}", flush=True)
+
+    report = {'meta': _metadata(args), 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+def _summary(result):
+    if result['status'] != 'ok':
+        return result['status'].upper() + (f" ({result['error']})" if 'error' in result else '')
+    memory = result.get('peak_memory_bytes')
+    if memory is not None:
+        memory = f"  peak {memory / 2 ** 20:8.1f} MiB"
+    elif 'memory_status' in result:
+        memory = f"  peak memory: {result['memory_status']}"
+    else:
+        memory = ''
+    cost = '-' if result['cost'] is None else f"{result['cost']:.0f}"
+    return (f"{1000 * result['wall_seconds']:10.1f} ms  {result['nodes_expanded']:>10} nodes  "
+            f"cost {cost:>8}{memory}")
+
+def _metadata(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCHMARK_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'timeout_seconds': args.timeout,
+        'memory_timeout_seconds': args.memory_timeout,
+    }
+
+def compare_results(baseline, current, threshold):
+    """
+    Compares two benchmark reports.
+
+    A case regresses if it no longer finishes, finds a costlier path (or none),
+    or its wall time, nodes expanded or peak memory grow by more than threshold
+    (and, for time and memory, by more than the noise floor).
+
+    Returns:
+        list: (case, metric, baseline value, current value, verdict) rows for
+        every metric that changed beyond the threshold, verdict being
+        'REGRESSION' or 'improvement'.
+    """
+    def key(result):
+        return result['scenario'], result['size'], result['seed'], result['algorithm']
+
+    baseline_results = {key(result): result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        old = baseline_results.get(key(result))
+        if old is None:
+            continue
+        case = '{} {} seed {} {}'.format(*key(result))
+        if old['status'] == 'ok' and result['status'] != 'ok':
+            rows.append((case, 'status', old['status'], result['status'], 'REGRESSION'))
+            continue
+        if old['status'] != 'ok' and result['status'] == 'ok':
+            rows.append((case, 'status', old['status'], result['status'], 'improvement'))
+            continue
+        if result['status'] != 'ok':
+            continue
+
+        old_cost = float('inf') if old['cost'] is None else old['cost']
+        new_cost = float('inf') if result['cost'] is None else result['cost']
+        if new_cost != old_cost:
+            rows.append((case, 'cost', old['cost'], result['cost'],
+                         'REGRESSION' if new_cost > old_cost else 'improvement'))
+
+        for metric, noise_floor in [('wall_seconds', MIN_TIME_DIFFERENCE), ('nodes_expanded', 0),
+                                    ('peak_memory_bytes', MIN_MEMORY_DIFFERENCE)]:
+            old_value = old.get(metric)
+            new_value = result.get(metric)
+            if old_value is None or new_value is None or abs(new_value - old_value) <= noise_floor:
+                continue
+            if new_value > old_value * (1 + threshold):
+                rows.append((case, metric, old_value, new_value, 'REGRESSION'))
+            elif new_value < old_value * (1 - threshold):
+                rows.append((case, metric, old_value, new_value, 'improvement'))
+    return rows
+
+def compare(args):
+    """Prints the differences between two reports; exits with 1 on regressions."""
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare_results(baseline, current, args.threshold)
+
+    print(f"Baseline: {args.baseline} (commit {baseline['meta'].get('commit')})")
+    print(f"Current:  {args.current} (commit {current['meta'].get('commit')})")
+    if not rows:
+        print(f"No changes beyond {100 * args.threshold:.0f}%.")
+        return 0
+    for case, metric, old_value, new_value, verdict in rows:
+        change = ''
+        if isinstance(old_value, (int, float)) and isinstance(new_value, (int, float)) and old_value:
+            change = f" ({100 * (new_value - old_value) / old_value:+.1f}%)"
+        print(f"{verdict:<12} {case:<45} {metric:<18} {old_value} -> {new_value}{change}")
+    regressions = sum(row[4] == 'REGRESSION' for row in rows)
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Pathfinding benchmark suite")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the benchmarks and write a JSON report.")
+    run_parser.add_argument("--output", default='benchmark-results.json', help="Path of the JSON report.")
+    run_parser.add_argument("--sizes", type=int, nargs='+', default=DEFAULT_SIZES,
+                            help="Map side lengths to run.")
+    run_parser.add_argument("--scenarios", nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    run_parser.add_argument("--algorithms", nargs='+', choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed of the generated maps.")
+    run_parser.add_argument("--repeat", type=int, default=3,
+                            help="Timed runs per case; the median is reported.")
+    run_parser.add_argument("--timeout", type=float, default=300,
+                            help="Seconds allowed per case before it is recorded as a timeout.")
+    run_parser.add_argument("--no-memory", action='store_true',
+                            help="Skip the extra traced run that measures peak memory.")
+    run_parser.add_argument("--memory-timeout", type=float, default=60,
+                            help="Seconds allowed for the traced run, which is much slower than the "
+                                 "timed ones; past it the peak memory is left out.")
+    run_parser.add_argument("--map-dir", default=None,
+                            help="Where generated maps are cached (default: a directory under the system temp dir).")
+
+    compare_parser = commands.add_parser('compare', help="Compare two reports and flag regressions.")
+    compare_parser.add_argument("baseline", help="The earlier report.")
+    compare_parser.add_argument("current", help="The report to check.")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="Relative change of time, nodes or memory that counts (default 0.1).")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run_suite(args)
+    else:
+        sys.exit(compare(args))
+
+if __name__ == "__main__":
+    main()
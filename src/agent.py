@@ -1,44 +1,96 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 from algorithms.bfs import bfs
 from algorithms.ucs import ucs
 from algorithms.a_star import a_star
+from algorithms.ara_star import ara_star
+from algorithms.jps import jump_point_search
 from algorithms.local_search import hill_climbing_replan
+from algorithms.d_star_lite import DStarLite
+from algorithms.sipp import sipp
+from algorithms.hpa_star import HierarchicalPlanner
+from algorithms.tour import plan_tour
+from path_cache import DEFAULT_CACHE_SIZE, PathCache
+from shared_environment import SharedEnvironment, attach_environment
+
+# Every algorithm Agent.set_algorithm accepts.
+ALGORITHM_NAMES = ['bfs', 'ucs', 'a_star', 'ara_star', 'jps', 'local_search', 'd_star_lite', 'sipp', 'hpa_star']
 
 class Agent:
     """
     The autonomous delivery agent.
     """
-    def __init__(self, environment):
+    def __init__(self, environment, cache_size=DEFAULT_CACHE_SIZE):
         """
         Initializes the agent.
 
         Args:
             environment (Environment): The environment the agent operates in.
+            cache_size (int): The number of find_path results to keep in an LRU
+                cache; 0 disables it. See path_cache.PathCache.
         """
         self.environment = environment
         self.algorithm = None
+        self.algorithm_name = None
+        self.algorithm_options = {}
+        self.options = {}
+        self.path_cache = PathCache(cache_size)
 
-    def set_algorithm(self, algorithm_name):
+    def set_algorithm(self, algorithm_name, **options):
         """
         Sets the pathfinding algorithm to use.
 
         Args:
-            algorithm_name (str): The name of the algorithm ('bfs', 'ucs', 'a_star', 'local_search').
+            algorithm_name (str): The name of the algorithm ('bfs', 'ucs', 'a_star', 'ara_star',
+                'jps', 'local_search', 'd_star_lite', 'sipp', 'hpa_star').
+            **options: Extra keyword arguments passed to the algorithm on every call,
+                e.g. heuristic for 'a_star'. For 'hpa_star' they configure the planner
+                instead, e.g. cluster_size.
         """
+        # Kept so worker processes can recreate the same configuration.
+        algorithm_options = dict(options)
         if algorithm_name == 'bfs':
             self.algorithm = bfs
         elif algorithm_name == 'ucs':
             self.algorithm = ucs
         elif algorithm_name == 'a_star':
             self.algorithm = a_star
+        elif algorithm_name == 'ara_star':
+            self.algorithm = ara_star
+        elif algorithm_name == 'jps':
+            self.algorithm = jump_point_search
         elif algorithm_name == 'local_search':
             self.algorithm = hill_climbing_replan
+        elif algorithm_name == 'd_star_lite':
+            # Incremental: the planner keeps its search state between find_path calls.
+            self.algorithm = DStarLite()
+        elif algorithm_name == 'sipp':
+            self.algorithm = sipp
+        elif algorithm_name == 'hpa_star':
+            self.algorithm = HierarchicalPlanner(**options)
+            options = {}
         else:
             raise ValueError(f"Unknown algorithm: {algorithm_name}")
+        self.algorithm_name = algorithm_name
+        self.options = options
+        self.algorithm_options = algorithm_options
+        self.path_cache.clear() # Cached results came from the previous configuration
 
-    def find_path(self, current_time_step=0):
+    def find_path(self, current_time_step=0, deadline_ms=None, stats=None):
         """
         Finds a path from start to goal using the selected algorithm.
 
+        Results are cached per start, goal, algorithm and time step modulo the
+        obstacle period, and dropped when the grid changes; a cached result
+        reports no expanded nodes. Calls with a deadline or stats always search.
+
+        Args:
+            current_time_step (int): The current time step of the agent.
+            deadline_ms (float, optional): A time budget in milliseconds, passed
+                through to the algorithm. Only anytime algorithms ('ara_star') accept one.
+            stats (SearchStats, optional): Collects search counters and timings, passed
+                through to the algorithm. Accepted by 'bfs', 'ucs', 'a_star' and 'local_search'.
+
         Returns:
             The result from the pathfinding algorithm, which is typically
             (path, nodes_expanded, cost).
@@ -46,4 +98,99 @@ class Agent:
         if not self.algorithm:
             raise Exception("Algorithm not set. Call set_algorithm() first.")
         
-        return self.algorithm(self.environment, self.environment.start_pos, self.environment.goal_pos, current_time_step)
+        environment = self.environment
+        options = self.options
+        if deadline_ms is not None or stats is not None:
+            # Time-budgeted results vary between runs, and profiling needs the search itself.
+            if deadline_ms is not None:
+                options = dict(options, deadline_ms=deadline_ms)
+            if stats is not None:
+                options = dict(options, stats=stats)
+            return self.algorithm(environment, environment.start_pos, environment.goal_pos, current_time_step,
+                                  **options)
+
+        key = self.path_cache.key(environment, environment.start_pos, environment.goal_pos,
+                                  self.algorithm_name, current_time_step)
+        result = self.path_cache.get(environment, key)
+        if result is None:
+            result = self.algorithm(environment, environment.start_pos, environment.goal_pos, current_time_step,
+                                    **options)
+            path, _, cost = result
+            self.path_cache.put(environment, key, path, cost)
+        return result
+
+    def find_tour(self, stops, current_time_step=0, workers=None):
+        """
+        Finds a route from the start through every delivery point, planning each
+        leg with the selected algorithm.
+
+        Args:
+            stops (list): The delivery positions (y, x), in any order.
+            current_time_step (int): The time step the agent leaves the start.
+            workers (int, optional): Compute the stop-to-stop cost matrix in a pool
+                of this many processes.
+
+        Returns:
+            tuple: (path, nodes_expanded, cost, visiting order), as returned by plan_tour.
+        """
+        if not self.algorithm:
+            raise Exception("Algorithm not set. Call set_algorithm() first.")
+
+        return plan_tour(self.environment, self.environment.start_pos, stops, self.algorithm,
+                         current_time_step, workers, **self.options)
+
+    def find_paths(self, queries, workers=None, chunk_size=16):
+        """
+        Plans many (start, goal) queries with the selected algorithm, yielding results as they complete.
+
+        With several workers, the environment's grids are placed in shared memory once
+        and each worker process attaches to them, so tasks only carry the queries.
+
+        Args:
+            queries (list): (start_pos, goal_pos) or (start_pos, goal_pos, time_step) tuples.
+            workers (int, optional): The number of worker processes. Plans in this
+                process when not given.
+            chunk_size (int): The number of queries sent to a worker per task.
+
+        Yields:
+            tuple: (query index, result), where result is what find_path returns for
+            that query, in completion order.
+        """
+        if not self.algorithm:
+            raise Exception("Algorithm not set. Call set_algorithm() first.")
+        queries = [tuple(query) + (0,) * (3 - len(query)) for query in queries]
+
+        if not workers or workers <= 1:
+            for index, (start_pos, goal_pos, time_step) in enumerate(queries):
+                yield index, self.algorithm(self.environment, start_pos, goal_pos, time_step, **self.options)
+            return
+
+        chunks = [(index, queries[index:index + chunk_size]) for index in range(0, len(queries), chunk_size)]
+        with SharedEnvironment(self.environment) as shared:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                     initargs=(shared.descriptor, self.algorithm_name,
+                                               self.algorithm_options)) as executor:
+                futures = [executor.submit(_plan_batch, first, chunk) for first, chunk in chunks]
+                try:
+                    for future in as_completed(futures):
+                        yield from future.result()
+                finally:
+                    for future in futures:
+                        future.cancel()
+
+_batch_agent = None
+_batch_blocks = None
+
+def _init_batch_worker(descriptor, algorithm_name, options):
+    """Attaches a worker process to the shared environment and sets up its agent."""
+    global _batch_agent, _batch_blocks
+    environment, _batch_blocks = attach_environment(descriptor)
+    _batch_agent = Agent(environment)
+    _batch_agent.set_algorithm(algorithm_name, **options)
+
+def _plan_batch(first_index, queries):
+    """Plans a chunk of queries in a worker process."""
+    return [(first_index + offset,
+             _batch_agent.algorithm(_batch_agent.environment, start_pos, goal_pos, time_step,
+                                    **_batch_agent.options))
+            for offset, (start_pos, goal_pos, time_step) in enumerate(queries)]
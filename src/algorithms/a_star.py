@@ -1,4 +1,7 @@
-import heapq
+from algorithms.bidirectional import bidirectional_search, supports_bidirectional
+from algorithms.frontier import make_frontier
+from algorithms.heuristics import chebyshev_heuristic
+from algorithms.search_tables import UNVISITED, reconstruct_path, state_tables
 
 def heuristic(a, b):
     """
@@ -7,7 +10,8 @@ def heuristic(a, b):
     """
     return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
 
-def a_star(environment, start_pos, goal_pos, current_time_step=0):
+def a_star(environment, start_pos, goal_pos, current_time_step=0, heuristic=chebyshev_heuristic,
+           bidirectional=True, stats=None):
     """
     Performs A* search to find the cheapest path.
 
@@ -16,6 +20,17 @@ def a_star(environment, start_pos, goal_pos, current_time_step=0):
         start_pos (tuple): The starting position (y, x).
         goal_pos (tuple): The goal position (y, x).
         current_time_step (int): The current time step of the agent.
+        heuristic (callable): Builds the heuristic for a goal; called as
+            heuristic(environment, goal_pos) and returning a function of a flat
+            cell index. Must be consistent, and integer-valued on maps with
+            integer terrain costs. See algorithms.heuristics.
+        bidirectional (bool): Search from both ends at once when the map has no
+            dynamic obstacles and the heuristic is the Chebyshev one. Averaging
+            the two sides' potentials weakens a strong heuristic (distance fields,
+            landmarks) more than meeting in the middle saves, so those always
+            search forward. See algorithms.bidirectional.
+        stats (SearchStats, optional): Collects counters and phase timings.
+            See algorithms.search_stats.
 
     Returns:
         tuple: A tuple containing:
@@ -24,52 +39,78 @@ def a_star(environment, start_pos, goal_pos, current_time_step=0):
             - float: The cost of the path.
     """
 
-    # State in frontier, parent, g_cost will be (position, time_step)
-    initial_state = (start_pos, current_time_step)
-    frontier = [(0, initial_state)]  # (f_cost, (position, time_step))
-    parent = {initial_state: None}
-    g_cost = {initial_state: 0}
+    if not environment.connected(start_pos, goal_pos):
+        return None, 0, 0 # Walls separate start and goal; no need to search
+
+    if bidirectional and heuristic is chebyshev_heuristic and \
+            supports_bidirectional(environment, start_pos, goal_pos):
+        # Without dynamic obstacles time does not matter and both ends can be searched.
+        return bidirectional_search(environment, start_pos, goal_pos, heuristic, stats)
+    if stats is not None:
+        stats.begin('a_star')
+
+    passable = environment.passable_cells
+    occupied = environment.occupied_cells
+    costs = environment.cost_cells
+    neighbor_offsets = environment.neighbor_offsets
+    num_cells = environment.num_cells
+    period = environment.period
+    goal = environment.index_of(goal_pos)
+    estimate = heuristic(environment, goal_pos)
+    infinity = float('inf')
+    num_states = period * num_cells
+
+    # States are integers: (time_step % period) * num_cells + cell index; obstacle
+    # motion is periodic, so folding time loses nothing and bounds the search.
+    initial_state = (current_time_step % period) * num_cells + environment.index_of(start_pos)
+    frontier = make_frontier(environment)  # Bucket queue on integer-cost maps, else a heap
+    if stats is not None:
+        frontier = stats.count_frontier(frontier)
+        passable = stats.count_checks(passable)
+    frontier.push(0, initial_state)
+    parent, g_cost, closed = state_tables(environment, num_states, (UNVISITED, 'i'), (infinity, 'd'), (0, 'b'))
+    parent[initial_state] = initial_state
+    g_cost[initial_state] = 0
     
     nodes_expanded = 0
+    if stats is not None:
+        stats.phase('search')
 
     while frontier:
-        _, current_state = heapq.heappop(frontier)
-        current_pos, time_at_current_pos = current_state
+        _, current_state = frontier.pop()
+        if closed[current_state]:
+            continue # Stale entry; with a consistent heuristic the first expansion is final
+        closed[current_state] = 1
+        phase_at_current, current = divmod(current_state, num_cells)
         nodes_expanded += 1
 
-        if current_pos == goal_pos:
-            # Reconstruct path
-            path = []
-            curr = current_state
-            while curr is not None:
-                path.append(curr[0]) # Append only position
-                curr = parent.get(curr)
-            path.reverse()
-            
+        if current == goal:
+            if stats is not None:
+                stats.phase('path')
+            path = reconstruct_path(environment, parent, current_state)
+            if stats is not None:
+                stats.end(nodes_expanded)
             return path, nodes_expanded, g_cost[current_state]
 
-        # 8-connected movement
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                if dy == 0 and dx == 0:
-                    continue
-
-                neighbor_pos = (current_pos[0] + dy, current_pos[1] + dx)
-                time_at_neighbor_pos = time_at_current_pos + 1
-                neighbor_state = (neighbor_pos, time_at_neighbor_pos)
+        # 8-connected movement; the wall border makes bounds checks unnecessary
+        neighbor_base = ((phase_at_current + 1) % period) * num_cells
+        for offset in neighbor_offsets:
+            neighbor = current + offset
+            neighbor_state = neighbor_base + neighbor
 
-                if (environment.is_valid_position(neighbor_pos) and
-                        not environment.is_obstacle(neighbor_pos, time_at_neighbor_pos)):
-                    
-                    move_cost = environment.get_cost(neighbor_pos)
-                    new_g_cost = g_cost[current_state] + move_cost
+            if passable[neighbor] and not occupied[neighbor_state]:
+                new_g_cost = g_cost[current_state] + costs[neighbor]
 
-                    if neighbor_state not in g_cost or new_g_cost < g_cost[neighbor_state]:
-                        g_cost[neighbor_state] = new_g_cost
-                        h_cost = heuristic(neighbor_pos, goal_pos)
-                        f_cost = new_g_cost + h_cost
-                        heapq.heappush(frontier, (f_cost, neighbor_state))
-                        parent[neighbor_state] = current_state
+                if new_g_cost < g_cost[neighbor_state]:
+                    h_cost = estimate(neighbor)
+                    if h_cost == infinity:
+                        continue # The goal cannot be reached from this cell at all
+                    g_cost[neighbor_state] = new_g_cost
+                    f_cost = new_g_cost + h_cost
+                    frontier.push(f_cost, neighbor_state)
+                    parent[neighbor_state] = current_state
     
     # Goal not found
+    if stats is not None:
+        stats.end(nodes_expanded)
     return None, nodes_expanded, 0
@@ -0,0 +1,176 @@
+import heapq
+import time
+
+from algorithms.heuristics import chebyshev_heuristic
+from algorithms.search_tables import UNVISITED, reconstruct_path, state_tables
+
+# First heuristic weight; the first path is found quickly but may cost up to this
+# many times the optimum.
+DEFAULT_INITIAL_WEIGHT = 3.0
+
+# How much the weight drops after each published path.
+DEFAULT_WEIGHT_STEP = 0.5
+
+# Expansions between deadline checks, so the clock is not read on every pop.
+DEADLINE_CHECK_INTERVAL = 256
+
+def anytime_solutions(environment, start_pos, goal_pos, current_time_step=0, heuristic=chebyshev_heuristic,
+                      deadline=None, initial_weight=DEFAULT_INITIAL_WEIGHT, weight_step=DEFAULT_WEIGHT_STEP):
+    """
+    Runs Anytime Repairing A* (ARA*), yielding each improved path as it is found.
+    The last path yielded when the search completes is optimal.
+
+    Each iteration is a weighted A* search with keys g + weight * h. Costs from
+    earlier iterations are kept: states whose cost improves after they were
+    expanded in the current iteration are set aside as inconsistent and
+    requeued, with the open states, at the start of the next iteration, instead
+    of searching from scratch. The weight drops by weight_step per iteration
+    until it reaches 1, when the path is optimal.
+
+    Args:
+        environment (Environment): The environment to search in.
+        start_pos (tuple): The starting position (y, x).
+        goal_pos (tuple): The goal position (y, x).
+        current_time_step (int): The current time step of the agent.
+        heuristic (callable): Builds the heuristic for a goal, as for a_star.
+        deadline (float, optional): A time.perf_counter() value after which the
+            search stops.
+        initial_weight (float): The heuristic weight of the first iteration.
+        weight_step (float): How much the weight drops per iteration.
+
+    Yields:
+        tuple: The path, the total nodes expanded so far, its cost and the
+        suboptimality bound (the path costs at most this many times the optimum).
+    """
+    passable = environment.passable_cells
+    occupied = environment.occupied_cells
+    costs = environment.cost_cells
+    neighbor_offsets = environment.neighbor_offsets
+    num_cells = environment.num_cells
+    period = environment.period
+    goal = environment.index_of(goal_pos)
+    estimate = heuristic(environment, goal_pos)
+    infinity = float('inf')
+    num_states = period * num_cells
+
+    if not environment.connected(start_pos, goal_pos):
+        return # Walls separate start and goal
+    initial_state = (current_time_step % period) * num_cells + environment.index_of(start_pos)
+    if initial_state % num_cells == goal:
+        yield [environment.position_of(goal)], 1, 0, 1.0
+        return
+    if estimate(initial_state % num_cells) == infinity:
+        return # The goal cannot be reached from the start at all
+    # closed_in holds the iteration in which each state was last expanded, so
+    # CLOSED is emptied by starting a new iteration rather than by clearing a table.
+    parent, g_cost, closed_in = state_tables(environment, num_states, (UNVISITED, 'i'), (infinity, 'd'), (-1, 'i'))
+    parent[initial_state] = initial_state
+    g_cost[initial_state] = 0
+
+    open_states = {initial_state}
+    inconsistent = set()
+    goal_state = None # The cheapest state reached at the goal cell
+    goal_cost = infinity
+    published_cost = infinity
+    weight = max(initial_weight, 1.0)
+    iteration = 0
+    nodes_expanded = 0
+
+    while True:
+        frontier = [(g_cost[state] + weight * estimate(state % num_cells), state) for state in open_states]
+        heapq.heapify(frontier)
+
+        # Expand until no open state can lead to a goal cheaper than goal_cost under this weight.
+        while frontier and frontier[0][0] < goal_cost:
+            _, current_state = heapq.heappop(frontier)
+            if current_state not in open_states:
+                continue # Stale entry
+            open_states.remove(current_state)
+            closed_in[current_state] = iteration
+            nodes_expanded += 1
+            if deadline is not None and nodes_expanded % DEADLINE_CHECK_INTERVAL == 0 \
+                    and time.perf_counter() > deadline:
+                return
+
+            phase_at_current, current = divmod(current_state, num_cells)
+            neighbor_base = ((phase_at_current + 1) % period) * num_cells
+            for offset in neighbor_offsets:
+                neighbor = current + offset
+                neighbor_state = neighbor_base + neighbor
+                if not passable[neighbor] or occupied[neighbor_state]:
+                    continue
+
+                new_g_cost = g_cost[current_state] + costs[neighbor]
+                if new_g_cost >= g_cost[neighbor_state]:
+                    continue
+                h_cost = estimate(neighbor)
+                if h_cost == infinity:
+                    continue # The goal cannot be reached from this cell at all
+                g_cost[neighbor_state] = new_g_cost
+                parent[neighbor_state] = current_state
+
+                if neighbor == goal:
+                    # Paths end at the goal, so goal states are never expanded.
+                    if new_g_cost < goal_cost:
+                        goal_state, goal_cost = neighbor_state, new_g_cost
+                elif closed_in[neighbor_state] == iteration:
+                    inconsistent.add(neighbor_state)
+                else:
+                    open_states.add(neighbor_state)
+                    heapq.heappush(frontier, (new_g_cost + weight * h_cost, neighbor_state))
+
+        if goal_state is None:
+            return # The goal is unreachable
+
+        open_states |= inconsistent
+        inconsistent = set()
+        # Bound the suboptimality by the cheapest unweighted f-value left to explore.
+        lowest_f = min((g_cost[state] + estimate(state % num_cells) for state in open_states),
+                       default=infinity)
+        bound = min(weight, goal_cost / lowest_f) if lowest_f > 0 else weight
+        optimal = weight <= 1.0 or bound <= 1.0
+        if goal_cost < published_cost or optimal:
+            published_cost = goal_cost
+            yield reconstruct_path(environment, parent, goal_state), nodes_expanded, goal_cost, max(bound, 1.0)
+        if optimal:
+            return
+        weight = max(weight - weight_step, 1.0)
+        iteration += 1
+
+def ara_star(environment, start_pos, goal_pos, current_time_step=0, heuristic=chebyshev_heuristic,
+             deadline_ms=None, initial_weight=DEFAULT_INITIAL_WEIGHT, weight_step=DEFAULT_WEIGHT_STEP):
+    """
+    Finds the best path ARA* can produce within a time budget.
+
+    The first, heavily weighted search returns a valid path quickly; the
+    remaining time is spent improving it (see anytime_solutions). Without a
+    deadline the search runs to the optimal path.
+
+    Args:
+        environment (Environment): The environment to search in.
+        start_pos (tuple): The starting position (y, x).
+        goal_pos (tuple): The goal position (y, x).
+        current_time_step (int): The current time step of the agent.
+        heuristic (callable): Builds the heuristic for a goal, as for a_star.
+        deadline_ms (float, optional): The time budget in milliseconds. If it runs
+            out before the first path is found, no path is returned.
+        initial_weight (float): The heuristic weight of the first iteration.
+        weight_step (float): How much the weight drops per iteration.
+
+    Returns:
+        tuple: A tuple containing:
+            - list: The best path found as a list of coordinates.
+            - int: The number of nodes expanded.
+            - float: The cost of the path.
+    """
+    deadline = None
+    if deadline_ms is not None:
+        deadline = time.perf_counter() + deadline_ms / 1000
+
+    best = (None, 0, 0)
+    for path, nodes_expanded, cost, _ in anytime_solutions(environment, start_pos, goal_pos, current_time_step,
+                                                          heuristic, deadline, initial_weight, weight_step):
+        best = (path, nodes_expanded, cost)
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+    return best
@@ -1,6 +1,8 @@
 from collections import deque
 
-def bfs(environment, start_pos, goal_pos, current_time_step=0):
+from algorithms.search_tables import UNVISITED, reconstruct_path, state_tables
+
+def bfs(environment, start_pos, goal_pos, current_time_step=0, stats=None):
     """
     Performs Breadth-First Search to find the shortest path in terms of number of steps.
 
@@ -9,6 +11,8 @@ def bfs(environment, start_pos, goal_pos, current_time_step=0):
         start_pos (tuple): The starting position (y, x).
         goal_pos (tuple): The goal position (y, x).
         current_time_step (int): The current time step of the agent.
+        stats (SearchStats, optional): Collects counters and phase timings.
+            See algorithms.search_stats.
 
     Returns:
         tuple: A tuple containing:
@@ -17,50 +21,66 @@ def bfs(environment, start_pos, goal_pos, current_time_step=0):
             - float: The cost of the path (for BFS, this is the length of the path).
     """
 
-    # State in frontier, visited, parent will be (position, time_step)
-    initial_state = (start_pos, current_time_step)
-    frontier = deque([initial_state])
-    visited = {initial_state}
-    parent = {initial_state: None}
+    if not environment.connected(start_pos, goal_pos):
+        return None, 0, 0 # Walls separate start and goal; no need to search
+    if stats is not None:
+        stats.begin('bfs')
+
+    passable = environment.passable_cells
+    occupied = environment.occupied_cells
+    costs = environment.cost_cells
+    neighbor_offsets = environment.neighbor_offsets
+    num_cells = environment.num_cells
+    period = environment.period
+    goal = environment.index_of(goal_pos)
+
+    # States are integers: (time_step % period) * num_cells + cell index, which is
+    # also the state's index into occupied_cells. Obstacle motion repeats every
+    # period steps, so folding time this way keeps the state space at most
+    # cells x period and lets unreachable goals terminate.
+    initial_state = (current_time_step % period) * num_cells + environment.index_of(start_pos)
+    frontier = deque()
+    parent, = state_tables(environment, period * num_cells, (UNVISITED, 'i'))
+    if stats is not None:
+        frontier = stats.count_queue(frontier)
+        passable = stats.count_checks(passable)
+        stats.phase('search')
+    frontier.append(initial_state)
+    parent[initial_state] = initial_state
     
     nodes_expanded = 0
 
     while frontier:
         current_state = frontier.popleft()
-        current_pos, time_at_current_pos = current_state
+        phase_at_current, current = divmod(current_state, num_cells)
         nodes_expanded += 1
 
-        if current_pos == goal_pos:
-            # Reconstruct path
-            path = []
+        if current == goal:
+            if stats is not None:
+                stats.phase('path')
+            path = reconstruct_path(environment, parent, current_state)
             cost = 0
-            curr = current_state
-            while curr is not None:
-                path.append(curr[0]) # Append only position
-                if parent.get(curr) is not None:
-                    cost += environment.get_cost(curr[0])
-                curr = parent.get(curr)
-            path.reverse()
+            for position in path[1:]:
+                cost += costs[environment.index_of(position)]
 
+            if stats is not None:
+                stats.end(nodes_expanded)
             return path, nodes_expanded, cost
 
-        # 8-connected movement
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                if dy == 0 and dx == 0:
-                    continue
-
-                neighbor_pos = (current_pos[0] + dy, current_pos[1] + dx)
-                time_at_neighbor_pos = time_at_current_pos + 1
-                neighbor_state = (neighbor_pos, time_at_neighbor_pos)
+        # 8-connected movement; the wall border makes bounds checks unnecessary
+        neighbor_base = ((phase_at_current + 1) % period) * num_cells
+        for offset in neighbor_offsets:
+            neighbor = current + offset
+            neighbor_state = neighbor_base + neighbor
 
-                if (environment.is_valid_position(neighbor_pos) and
-                        not environment.is_obstacle(neighbor_pos, time_at_neighbor_pos) and
-                        neighbor_state not in visited):
-                    
-                    visited.add(neighbor_state)
-                    parent[neighbor_state] = current_state
-                    frontier.append(neighbor_state)
+            if (passable[neighbor] and
+                    not occupied[neighbor_state] and
+                    parent[neighbor_state] == UNVISITED):
+                
+                parent[neighbor_state] = current_state
+                frontier.append(neighbor_state)
     
     # Goal not found
+    if stats is not None:
+        stats.end(nodes_expanded)
     return None, nodes_expanded, 0
@@ -0,0 +1,179 @@
+from algorithms.frontier import make_frontier
+from algorithms.search_tables import UNVISITED, state_tables
+
+def supports_bidirectional(environment, start_pos, goal_pos):
+    """
+    Checks whether bidirectional_search can answer a query.
+
+    Time must not matter (no dynamic obstacles), and both endpoints must be
+    passable: the backward side charges the cost of the cell it leaves, so an
+    endpoint on a wall would make its keys infinite. Such queries are left to
+    the forward searches, which handle a start on a wall.
+
+    Args:
+        environment (Environment): The environment to search in.
+        start_pos (tuple): The starting position (y, x).
+        goal_pos (tuple): The goal position (y, x).
+
+    Returns:
+        bool: True if bidirectional_search applies.
+    """
+    passable = environment.passable_cells
+    return (environment.period == 1 and bool(passable[environment.index_of(start_pos)])
+            and bool(passable[environment.index_of(goal_pos)]))
+
+def bidirectional_search(environment, start_pos, goal_pos, heuristic=None, stats=None):
+    """
+    Performs bidirectional Dijkstra or A* search on a map without dynamic obstacles.
+
+    One search grows forward from the start and another backward from the goal,
+    always expanding the side with the smaller frontier. Moving into a cell costs
+    that cell's terrain cost, so the backward search charges the cost of the cell
+    it leaves. The best meeting path found so far (mu) is updated on every edge
+    that reaches a cell labelled by the other side, and the search stops once
+    the two smallest frontier keys add up to at least mu, at which point no
+    cheaper path can exist.
+
+    With a heuristic, both sides use the average potential
+    p(v) = (h_goal(v) - h_start(v)) / 2, where h_start estimates the cost of
+    travelling from the start to v. Each side's reduced edge costs stay
+    non-negative, so the same stopping rule applies to the keys.
+
+    Time is ignored, so this is only valid when environment.period == 1, and
+    both endpoints must be passable; see supports_bidirectional.
+
+    Args:
+        environment (Environment): The environment to search in.
+        start_pos (tuple): The starting position (y, x).
+        goal_pos (tuple): The goal position (y, x).
+        heuristic (callable, optional): Builds a heuristic for a goal, as for
+            a_star. Without one, this is bidirectional Dijkstra.
+        stats (SearchStats, optional): Collects counters and phase timings.
+            See algorithms.search_stats.
+
+    Returns:
+        tuple: A tuple containing:
+            - list: The path from start to goal as a list of coordinates.
+            - int: The number of nodes expanded by both sides.
+            - float: The cost of the path.
+    """
+    passable = environment.passable_cells
+    costs = environment.cost_cells
+    neighbor_offsets = environment.neighbor_offsets
+    num_cells = environment.num_cells
+    start = environment.index_of(start_pos)
+    goal = environment.index_of(goal_pos)
+    infinity = float('inf')
+
+    if start == goal:
+        return [environment.position_of(start)], 1, 0
+    if stats is not None:
+        stats.begin('bidirectional_search')
+
+    if heuristic is None:
+        def potential(index):
+            return 0
+    else:
+        to_goal = heuristic(environment, goal_pos)
+        to_start = heuristic(environment, start_pos)
+        start_cost = costs[start]
+
+        def potential(index):
+            estimate_to_goal = to_goal(index)
+            # h_start comes from an estimate of the cost back to the start, shifted by
+            # the difference in entry costs: d(s, v) = d(v, s) + cost(v) - cost(s).
+            estimate_from_start = to_start(index)
+            if estimate_to_goal == infinity or estimate_from_start == infinity:
+                return None # Not on any path between start and goal
+            return (estimate_to_goal - estimate_from_start - costs[index] + start_cost) / 2
+
+    # (parent, distance, closed) for the forward and the backward side.
+    sides = [state_tables(environment, num_cells, (UNVISITED, 'i'), (infinity, 'd'), (0, 'b')) for _ in range(2)]
+    parent, distance, closed = [list(tables) for tables in zip(*sides)]
+    # Forward keys are d + p and backward keys d - p. Keys never drop below the
+    # source's key, and twice their excess over it is a whole number on integer
+    # maps, so the frontiers hold 2 * (key - source key) and can be bucket queues.
+    # The last popped key of each side is a lower bound on its frontier from then on.
+    signs = [1, -1]
+    base_key = [0, 0]
+    last_key = [0, 0]
+    frontiers = [make_frontier(environment), make_frontier(environment)]
+    if stats is not None:
+        frontiers = [stats.count_frontier(frontier) for frontier in frontiers]
+        passable = stats.count_checks(passable)
+    for side, source in enumerate((start, goal)):
+        source_potential = potential(source)
+        if source_potential is None:
+            if stats is not None:
+                stats.end()
+            return None, 0, 0
+        distance[side][source] = 0
+        parent[side][source] = source
+        base_key[side] = last_key[side] = signs[side] * source_potential
+        frontiers[side].push(0, source)
+
+    best_cost = infinity
+    meeting = None
+    nodes_expanded = 0
+    if stats is not None:
+        stats.phase('search')
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        priority, current = frontiers[side].pop()
+        if closed[side][current]:
+            continue # Stale entry
+        key = last_key[side] = priority / 2 + base_key[side]
+        if key + last_key[1 - side] >= best_cost:
+            break # No unexplored path can beat the best meeting path
+        closed[side][current] = 1
+        nodes_expanded += 1
+
+        sign = signs[side]
+        base = base_key[side]
+        distances = distance[side]
+        other_distances = distance[1 - side]
+        frontier = frontiers[side]
+        current_distance = distances[current]
+        # Backward edges cost what it takes to enter the current cell.
+        reverse_cost = current_distance + costs[current]
+        for offset in neighbor_offsets:
+            neighbor = current + offset
+            if not passable[neighbor]:
+                continue
+            new_distance = reverse_cost if side else current_distance + costs[neighbor]
+
+            if new_distance + other_distances[neighbor] < best_cost:
+                best_cost = new_distance + other_distances[neighbor]
+                meeting = (side, current, neighbor)
+
+            if new_distance < distances[neighbor] and not closed[side][neighbor]:
+                neighbor_potential = potential(neighbor)
+                if neighbor_potential is None:
+                    continue
+                distances[neighbor] = new_distance
+                parent[side][neighbor] = current
+                frontier.push(2 * (new_distance + sign * neighbor_potential - base), neighbor)
+
+    if meeting is None:
+        if stats is not None:
+            stats.end(nodes_expanded)
+        return None, nodes_expanded, 0
+    if stats is not None:
+        stats.phase('path')
+
+    # The meeting edge joins a cell of one side's tree to a cell of the other's.
+    side, current, neighbor = meeting
+    forward_end, backward_end = (current, neighbor) if side == 0 else (neighbor, current)
+    cells = [forward_end]
+    while parent[0][cells[-1]] != cells[-1]:
+        cells.append(parent[0][cells[-1]])
+    cells.reverse()
+    cells.append(backward_end)
+    while parent[1][cells[-1]] != cells[-1]:
+        cells.append(parent[1][cells[-1]])
+
+    path = [environment.position_of(cell) for cell in cells]
+    if stats is not None:
+        stats.end(nodes_expanded)
+    return path, nodes_expanded, best_cost
@@ -0,0 +1,285 @@
+from algorithms.frontier import make_frontier
+from algorithms.heuristics import distance_field_heuristic
+
+# Number of future time steps each agent plans collision-free.
+DEFAULT_WINDOW = 16
+
+class ReservationTable:
+    """
+    Space-time cells and moves claimed by agents of a fleet.
+
+    Keys use absolute time steps: a cell reservation is
+    time_step * num_cells + cell, and a move reservation (used to forbid two
+    agents swapping cells) is (time_step * num_cells + from_cell) * num_cells + to_cell,
+    for a move made between time_step and time_step + 1. Both map to the id of
+    the agent that owns them, so an agent never blocks itself.
+    """
+    def __init__(self, num_cells):
+        self.num_cells = num_cells
+        self.cells = {}
+        self.moves = {}
+
+    def reserve(self, agent_id, cells, start_time, hold_until=None):
+        """
+        Reserves a path of flat cell indices, one per time step from start_time.
+
+        Args:
+            agent_id (int): The owner of the reservations.
+            cells (list): The cell occupied at each time step.
+            start_time (int): The time step of cells[0].
+            hold_until (int, optional): Keep the last cell reserved up to this time step.
+        """
+        num_cells = self.num_cells
+        for step, cell in enumerate(cells):
+            self.cells[(start_time + step) * num_cells + cell] = agent_id
+        for step in range(len(cells) - 1):
+            key = ((start_time + step) * num_cells + cells[step]) * num_cells + cells[step + 1]
+            self.moves[key] = agent_id
+        if hold_until is not None:
+            last = cells[-1]
+            for time_step in range(start_time + len(cells), hold_until + 1):
+                self.cells[time_step * num_cells + last] = agent_id
+
+    def clear(self):
+        """Drops every reservation."""
+        self.cells.clear()
+        self.moves.clear()
+
+def windowed_search(environment, reservations, agent_id, start, goal, time_step, window, estimate):
+    """
+    Space-time A* over the next window steps, avoiding other agents' reservations.
+
+    Moving into a cell costs its terrain cost and waiting costs 1. The search
+    ends at the goal if the agent can stay there until the end of the window,
+    or at any state window steps ahead, in which case the rest of the way is
+    left to the heuristic (the static distance to the goal), so the window only
+    bounds how far ahead agents coordinate.
+
+    Args:
+        environment (Environment): The environment to search in.
+        reservations (ReservationTable): Cells and moves claimed by other agents.
+        agent_id (int): The id of the agent being planned.
+        start (int): The flat index of the agent's cell at time_step.
+        goal (int): The flat index of the agent's goal.
+        time_step (int): The absolute time step the plan starts at.
+        window (int): The number of time steps to plan.
+        estimate (callable): Maps a flat cell index to its estimated cost to the goal.
+
+    Returns:
+        tuple: The planned flat cell indices, one per time step starting with start
+        (None if the agent is boxed in), and the number of nodes expanded.
+    """
+    passable = environment.passable_cells
+    occupied = environment.occupied_cells
+    costs = environment.cost_cells
+    moves = environment.neighbor_offsets + [0] # 0 is waiting in place
+    num_cells = environment.num_cells
+    period = environment.period
+    reserved_cells = reservations.cells
+    reserved_moves = reservations.moves
+    infinity = float('inf')
+
+    # States are (steps ahead) * num_cells + cell; the window keeps the state space small.
+    frontier = make_frontier(environment)
+    frontier.push(estimate(start), start)
+    g_cost = {start: 0}
+    parent = {start: start}
+    closed = set()
+    nodes_expanded = 0
+
+    while frontier:
+        _, state = frontier.pop()
+        if state in closed:
+            continue # Stale entry
+        closed.add(state)
+        nodes_expanded += 1
+        step, cell = divmod(state, num_cells)
+        now = time_step + step
+
+        if step == window or (cell == goal and all(
+                reserved_cells.get(t * num_cells + goal, agent_id) == agent_id
+                and not occupied[(t % period) * num_cells + goal]
+                for t in range(now + 1, time_step + window + 1))):
+            cells = [cell]
+            while parent[state] != state:
+                state = parent[state]
+                cells.append(state % num_cells)
+            cells.reverse()
+            return cells, nodes_expanded
+
+        next_base = (now + 1) * num_cells
+        phase_base = ((now + 1) % period) * num_cells
+        move_base = (now * num_cells) * num_cells
+        for offset in moves:
+            neighbor = cell + offset
+            if not passable[neighbor] or occupied[phase_base + neighbor]:
+                continue
+            if reserved_cells.get(next_base + neighbor, agent_id) != agent_id:
+                continue # Another agent is there at that time
+            if offset and reserved_moves.get(move_base + neighbor * num_cells + cell,
+                                             agent_id) != agent_id:
+                continue # Another agent is coming the other way
+            h_cost = estimate(neighbor)
+            if h_cost == infinity:
+                continue
+            neighbor_state = state + num_cells + offset
+            new_g_cost = g_cost[state] + (costs[neighbor] if offset else 1)
+            if new_g_cost < g_cost.get(neighbor_state, infinity):
+                g_cost[neighbor_state] = new_g_cost
+                parent[neighbor_state] = state
+                frontier.push(new_g_cost + h_cost, neighbor_state)
+
+    return None, nodes_expanded
+
+class CooperativePlanner:
+    """
+    Plans a fleet of agents on one grid without collisions, Windowed Hierarchical
+    Cooperative A* (WHCA*) style.
+
+    Agents are planned one after another; each plan looks window steps ahead
+    and is written into a shared space-time reservation table that later agents
+    treat like dynamic obstacles, so no two agents share a cell or swap cells
+    within the window. The exact static distance to each agent's goal (the
+    "hierarchical" part) guides the search beyond the window. Plans are only
+    followed for replan_interval steps before the whole fleet is replanned, and
+    the planning order rotates every round so no agent is always last. An agent
+    that earlier agents leave no way out for is moved to the front and the round
+    is planned again.
+
+    Call plan() to plan the fleet at the current time step and step() to move
+    every agent one step along its plan; step() replans when due.
+    """
+    def __init__(self, environment, window=DEFAULT_WINDOW, replan_interval=None,
+                 heuristic=distance_field_heuristic):
+        """
+        Initializes the planner.
+
+        Args:
+            environment (Environment): The environment the fleet operates in.
+            window (int): The number of time steps each plan looks ahead.
+            replan_interval (int, optional): The number of steps followed before
+                replanning, at most the window. Defaults to half the window.
+            heuristic (callable): Builds the heuristic for a goal, as for a_star.
+                The default computes one exact distance field per goal.
+        """
+        self.environment = environment
+        self.window = window
+        self.replan_interval = min(replan_interval or max(window // 2, 1), window)
+        self.heuristic = heuristic
+        self.reservations = ReservationTable(environment.num_cells)
+        self.positions = []
+        self.goals = []
+        self.estimates = []
+        self.plans = []
+        self.time_step = 0
+        self.last_plan_time = None
+        self.rounds = 0
+
+    def add_agent(self, start_pos, goal_pos):
+        """
+        Adds an agent to the fleet.
+
+        Returns:
+            int: The agent's id, its index in positions.
+        """
+        environment = self.environment
+        self.positions.append(environment.index_of(start_pos))
+        self.goals.append(environment.index_of(goal_pos))
+        self.estimates.append(self.heuristic(environment, goal_pos))
+        self.plans.append([])
+        self.last_plan_time = None
+        return len(self.positions) - 1
+
+    def plan(self):
+        """
+        Plans every agent for the next window steps from the current time step.
+
+        Returns:
+            int: The number of nodes expanded.
+        """
+        num_agents = len(self.positions)
+        first = self.rounds % num_agents if num_agents else 0
+        order = list(range(first, num_agents)) + list(range(first))
+        promoted = set()
+        nodes_expanded = 0
+        while True:
+            boxed_in, nodes = self.plan_in_order(order)
+            nodes_expanded += nodes
+            if boxed_in is None or boxed_in in promoted:
+                break
+            # Earlier agents took every way out; retry with this agent planned first.
+            promoted.add(boxed_in)
+            order.remove(boxed_in)
+            order.insert(0, boxed_in)
+        self.rounds += 1
+        self.last_plan_time = self.time_step
+        return nodes_expanded
+
+    def plan_in_order(self, order):
+        """
+        Plans the agents one after another in the given order.
+
+        Returns:
+            tuple: The id of the first agent that was boxed in and left waiting in
+            place (None if there was none) and the number of nodes expanded.
+        """
+        reservations = self.reservations
+        reservations.clear()
+        time_step = self.time_step
+        # Every agent holds its current cell for the next step, so no one moves
+        # into a cell whose agent might not be able to leave it.
+        for agent_id, cell in enumerate(self.positions):
+            reservations.reserve(agent_id, [cell, cell], time_step)
+
+        boxed_in = None
+        nodes_expanded = 0
+        for agent_id in order:
+            start = self.positions[agent_id]
+            cells, nodes = windowed_search(self.environment, reservations, agent_id, start,
+                                           self.goals[agent_id], time_step, self.window,
+                                           self.estimates[agent_id])
+            nodes_expanded += nodes
+            if cells is None:
+                cells = [start]
+                if boxed_in is None:
+                    boxed_in = agent_id
+            reservations.reserve(agent_id, cells, time_step, hold_until=time_step + self.window)
+            self.plans[agent_id] = cells
+        return boxed_in, nodes_expanded
+
+    def step(self):
+        """
+        Moves every agent one step along its plan, replanning first if due.
+
+        Returns:
+            int: The number of nodes expanded by replanning, 0 if no replanning was needed.
+        """
+        nodes_expanded = 0
+        if self.last_plan_time is None or self.time_step - self.last_plan_time >= self.replan_interval:
+            nodes_expanded = self.plan()
+        offset = self.time_step - self.last_plan_time + 1
+        for agent_id, cells in enumerate(self.plans):
+            self.positions[agent_id] = cells[min(offset, len(cells) - 1)]
+        self.time_step += 1
+        return nodes_expanded
+
+    def done(self):
+        """Checks whether every agent is at its goal."""
+        return self.positions == self.goals
+
+    def run(self, max_steps):
+        """
+        Steps the fleet until every agent is at its goal or max_steps have passed.
+
+        Returns:
+            list: Each agent's trajectory as a list of coordinates, one per time step.
+        """
+        position_of = self.environment.position_of
+        trajectories = [[position_of(cell)] for cell in self.positions]
+        for _ in range(max_steps):
+            if self.done():
+                break
+            self.step()
+            for trajectory, cell in zip(trajectories, self.positions):
+                trajectory.append(position_of(cell))
+        return trajectories
@@ -0,0 +1,233 @@
+import heapq
+
+class DStarLite:
+    """
+    Incremental replanning with D* Lite.
+
+    The planner searches backward from the goal and keeps its g/rhs tables between
+    calls. When the agent moves or cells are blocked through
+    Environment.add_obstacle, the next call repairs only the part of the search
+    those changes affect instead of planning from scratch.
+
+    D* Lite plans on a static graph, so cells that any dynamic obstacle passes
+    through during its cycle are treated as blocked. The returned path is
+    therefore collision-free at every time step.
+    """
+    def __init__(self):
+        """
+        Initializes an empty planner. State is built on the first call.
+        """
+        self.environment = None
+        self.fingerprint = None
+        self.goal = None
+        self.last_start = None
+        self.changes_seen = 0
+        self.km = 0
+        self.g = {}
+        self.rhs = {}
+        self.queue = []
+        self.queued_keys = {}
+        self.nodes_expanded = 0
+
+    def __call__(self, environment, start_pos, goal_pos, current_time_step=0):
+        """
+        Finds the cheapest path from start to goal, reusing earlier search effort.
+
+        Args:
+            environment (Environment): The environment to search in.
+            start_pos (tuple): The starting position (y, x).
+            goal_pos (tuple): The goal position (y, x).
+            current_time_step (int): The current time step of the agent. Unused,
+                since dynamic obstacles are avoided independently of time.
+
+        Returns:
+            tuple: A tuple containing:
+                - list: The path from start to goal as a list of coordinates.
+                - int: The number of nodes expanded during this call.
+                - float: The cost of the path.
+        """
+        if not environment.connected(start_pos, goal_pos):
+            return None, 0, 0 # Walls separate start and goal; keep the search state for later calls
+
+        start = environment.index_of(start_pos)
+        goal = environment.index_of(goal_pos)
+
+        if (environment is not self.environment or environment.fingerprint != self.fingerprint or
+                goal != self.goal):
+            self.reset(environment, goal)
+        else:
+            # The heuristic is measured from the start, so moving it lowers every
+            # queued key by at most the distance moved; km compensates for that.
+            self.km += self.heuristic(self.last_start, start)
+        self.last_start = start
+
+        self.nodes_expanded = 0
+        self.apply_changes()
+        self.compute_shortest_path(start)
+
+        path, cost = self.extract_path(start)
+        return path, self.nodes_expanded, cost
+
+    def reset(self, environment, goal):
+        """
+        Discards all search state and starts a new search toward the goal.
+        """
+        self.environment = environment
+        self.fingerprint = environment.fingerprint
+        self.goal = goal
+        self.changes_seen = len(environment.changed_cells)
+        self.km = 0
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.queue = []
+        self.queued_keys = {}
+
+        self.passable = environment.passable_cells
+        self.swept = environment.swept_cells
+        self.costs = environment.cost_cells
+        self.neighbor_offsets = environment.neighbor_offsets
+        self.stride = environment.stride
+
+        self.push(goal, self.calculate_key(goal, goal))
+
+    def heuristic(self, a, b):
+        """Chebyshev distance between two flat cell indices."""
+        a_y, a_x = divmod(a, self.stride)
+        b_y, b_x = divmod(b, self.stride)
+        return max(abs(a_y - b_y), abs(a_x - b_x))
+
+    def traversable(self, index):
+        """Checks whether the agent may enter a cell."""
+        return self.passable[index] and not self.swept[index]
+
+    def calculate_key(self, index, start):
+        """Computes the priority of a cell in the queue."""
+        value = min(self.g.get(index, float('inf')), self.rhs.get(index, float('inf')))
+        return (value + self.heuristic(start, index) + self.km, value)
+
+    def push(self, index, key):
+        """Inserts a cell into the queue, or updates its key."""
+        self.queued_keys[index] = key
+        heapq.heappush(self.queue, (key, index))
+
+    def best_successor_cost(self, index):
+        """Computes rhs for a cell: the cheapest step to a neighbor plus that neighbor's g."""
+        best = float('inf')
+        for offset in self.neighbor_offsets:
+            neighbor = index + offset
+            if self.traversable(neighbor):
+                cost = self.costs[neighbor] + self.g.get(neighbor, float('inf'))
+                if cost < best:
+                    best = cost
+        return best
+
+    def update_vertex(self, index, start):
+        """Recomputes a cell's rhs and queues it if it is locally inconsistent."""
+        if index != self.goal:
+            self.rhs[index] = self.best_successor_cost(index)
+        if self.g.get(index, float('inf')) != self.rhs.get(index, float('inf')):
+            self.push(index, self.calculate_key(index, start))
+        else:
+            self.queued_keys.pop(index, None)
+
+    def update_predecessors(self, index, start):
+        """Updates every cell the agent could step from into the given cell."""
+        for offset in self.neighbor_offsets:
+            neighbor = index + offset
+            if self.passable[neighbor]:
+                self.update_vertex(neighbor, start)
+
+    def apply_changes(self):
+        """
+        Repairs the search after cells were blocked since the last call.
+
+        A blocked cell changes the cost of every edge into it, so each of its
+        neighbors gets its rhs recomputed.
+        """
+        changed_cells = self.environment.changed_cells
+        for index in changed_cells[self.changes_seen:]:
+            self.update_vertex(index, self.last_start)
+            self.update_predecessors(index, self.last_start)
+        self.changes_seen = len(changed_cells)
+
+    def compute_shortest_path(self, start):
+        """
+        Expands locally inconsistent cells until the start's cost is known.
+        """
+        infinity = float('inf')
+        g = self.g
+        rhs = self.rhs
+
+        while self.queue:
+            key, index = self.queue[0]
+            if self.queued_keys.get(index) != key:
+                heapq.heappop(self.queue) # Stale entry
+                continue
+
+            start_key = self.calculate_key(start, start)
+            if key >= start_key and rhs.get(start, infinity) == g.get(start, infinity):
+                break
+
+            heapq.heappop(self.queue)
+            self.nodes_expanded += 1
+
+            new_key = self.calculate_key(index, start)
+            if key < new_key:
+                self.push(index, new_key)
+            elif g.get(index, infinity) > rhs.get(index, infinity):
+                # Overconsistent: lower g and let predecessors route through this cell.
+                g[index] = rhs[index]
+                del self.queued_keys[index]
+                if not self.traversable(index):
+                    continue
+                step_cost = self.costs[index] + g[index]
+                for offset in self.neighbor_offsets:
+                    neighbor = index + offset
+                    if (self.passable[neighbor] and neighbor != self.goal and
+                            step_cost < rhs.get(neighbor, infinity)):
+                        rhs[neighbor] = step_cost
+                        self.update_vertex_key(neighbor, start)
+            else:
+                # Underconsistent: raise g and re-derive every dependent rhs.
+                g[index] = infinity
+                self.update_vertex(index, start)
+                self.update_predecessors(index, start)
+
+    def update_vertex_key(self, index, start):
+        """Queues a cell whose rhs was just lowered, without recomputing rhs."""
+        if self.g.get(index, float('inf')) != self.rhs[index]:
+            self.push(index, self.calculate_key(index, start))
+        else:
+            self.queued_keys.pop(index, None)
+
+    def extract_path(self, start):
+        """
+        Follows the cheapest successors from the start to the goal.
+
+        Returns:
+            tuple: The path as a list of coordinates and its cost, or (None, 0)
+            if the goal is unreachable.
+        """
+        infinity = float('inf')
+        if self.g.get(start, infinity) == infinity and start != self.goal:
+            return None, 0
+
+        environment = self.environment
+        path = [environment.position_of(start)]
+        cost = 0
+        current = start
+        while current != self.goal:
+            best, best_cost = None, infinity
+            for offset in self.neighbor_offsets:
+                neighbor = current + offset
+                if self.traversable(neighbor):
+                    candidate = self.costs[neighbor] + self.g.get(neighbor, infinity)
+                    if candidate < best_cost:
+                        best, best_cost = neighbor, candidate
+            if best is None or len(path) > environment.num_cells:
+                return None, 0
+            cost += self.costs[best]
+            path.append(environment.position_of(best))
+            current = best
+
+        return path, cost
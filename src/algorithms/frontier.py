@@ -0,0 +1,70 @@
+import heapq
+
+class BucketQueue:
+    """
+    Dial's bucket queue for small non-negative integer priorities.
+
+    Entries live in one list per priority value, so pushing is O(1) and popping
+    scans forward from the last minimum. That cursor only ever moves back when an
+    entry with a lower priority is pushed, which never happens with Dijkstra or
+    with A* under a consistent heuristic.
+    """
+    def __init__(self):
+        self.buckets = []
+        self.current = 0
+        self.size = 0
+
+    def push(self, priority, item):
+        """Adds an item. The priority must be a non-negative whole number."""
+        priority = int(priority)
+        buckets = self.buckets
+        while len(buckets) <= priority:
+            buckets.append([])
+        buckets[priority].append(item)
+        if priority < self.current:
+            self.current = priority
+        self.size += 1
+
+    def pop(self):
+        """Removes and returns a (priority, item) pair with the lowest priority."""
+        buckets = self.buckets
+        current = self.current
+        while not buckets[current]:
+            current += 1
+        self.current = current
+        self.size -= 1
+        return current, buckets[current].pop()
+
+    def __len__(self):
+        return self.size
+
+class HeapQueue:
+    """
+    Binary-heap priority queue with the same interface as BucketQueue, for
+    priorities that are not whole numbers.
+    """
+    def __init__(self):
+        self.heap = []
+
+    def push(self, priority, item):
+        """Adds an item with the given priority."""
+        heapq.heappush(self.heap, (priority, item))
+
+    def pop(self):
+        """Removes and returns a (priority, item) pair with the lowest priority."""
+        return heapq.heappop(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+def make_frontier(environment):
+    """
+    Picks the priority queue for a search on the given environment.
+
+    Terrain costs are usually small integers, so path costs (and the integer-valued
+    heuristics in algorithms.heuristics) are whole numbers and a bucket queue can
+    be used. Otherwise this falls back to a binary heap.
+    """
+    if environment.integer_costs:
+        return BucketQueue()
+    return HeapQueue()
@@ -0,0 +1,129 @@
+import heapq
+
+import numpy as np
+
+# Number of goal distance fields kept per environment; each one costs 4 bytes per cell.
+DISTANCE_FIELD_CACHE_SIZE = 32
+
+def chebyshev_heuristic(environment, goal_pos):
+    """
+    Builds the Chebyshev distance heuristic toward a goal.
+    This is admissible for an 8-connected grid where every move costs at least 1.
+
+    Args:
+        environment (Environment): The environment to search in.
+        goal_pos (tuple): The goal position (y, x).
+
+    Returns:
+        callable: A function mapping a flat cell index to its estimated cost to the goal.
+    """
+    stride = environment.stride
+    goal_y, goal_x = divmod(environment.index_of(goal_pos), stride)
+
+    def heuristic(index):
+        y, x = divmod(index, stride)
+        return max(abs(y - goal_y), abs(x - goal_x))
+
+    return heuristic
+
+def dijkstra_field(environment, sources, reverse=False, targets=None):
+    """
+    Runs Dijkstra's algorithm over the static cost grid, ignoring dynamic obstacles.
+
+    Moving into a cell costs that cell's terrain cost, so distances are not
+    symmetric: a forward field holds the cost of travelling from the sources to
+    each cell, a reverse field the cost of travelling from each cell to the sources.
+
+    Args:
+        environment (Environment): The environment to search in.
+        sources (list): Flat cell indices the search starts from, at distance 0.
+        reverse (bool): Whether to compute distances toward the sources instead of from them.
+        targets (list, optional): Flat cell indices of interest. The search stops as
+            soon as all of them are settled, so other distances may be left too high.
+
+    Returns:
+        numpy.ndarray: A float32 array of distances indexed by flat cell index,
+        with inf for unreachable cells.
+    """
+    passable = environment.passable_cells
+    costs = environment.cost_cells
+    neighbor_offsets = environment.neighbor_offsets
+
+    distances = [float('inf')] * environment.num_cells
+    frontier = []
+    for source in sources:
+        distances[source] = 0
+        frontier.append((0, source))
+    heapq.heapify(frontier)
+    remaining_targets = set(targets) if targets is not None else None
+
+    while frontier:
+        distance, current = heapq.heappop(frontier)
+        if distance > distances[current]:
+            continue # Stale entry
+        if remaining_targets is not None:
+            remaining_targets.discard(current)
+            if not remaining_targets:
+                break
+
+        # Backward edges cost what it takes to enter the current cell.
+        reverse_cost = distance + costs[current]
+        for offset in neighbor_offsets:
+            neighbor = current + offset
+            if passable[neighbor]:
+                new_distance = reverse_cost if reverse else distance + costs[neighbor]
+                if new_distance < distances[neighbor]:
+                    distances[neighbor] = new_distance
+                    heapq.heappush(frontier, (new_distance, neighbor))
+
+    return np.array(distances, dtype=np.float32)
+
+def distance_field(environment, goal_pos):
+    """
+    Gets the exact static cost-to-goal of every cell, computing it at most once.
+
+    Fields are computed with one backward Dijkstra from the goal and cached per
+    goal on the environment (see Environment.derived_cache), so repeated queries
+    toward the same goal reuse the same field until the map changes.
+
+    Args:
+        environment (Environment): The environment to search in.
+        goal_pos (tuple): The goal position (y, x).
+
+    Returns:
+        numpy.ndarray: A float32 array of costs to the goal indexed by flat cell index.
+    """
+    cache = environment.derived_cache('distance_fields')
+    goal = environment.index_of(goal_pos)
+    field = cache.get(goal)
+    if field is not None:
+        cache.move_to_end(goal)
+        return field
+
+    field = dijkstra_field(environment, [goal], reverse=True)
+    cache[goal] = field
+    if len(cache) > DISTANCE_FIELD_CACHE_SIZE:
+        cache.popitem(last=False)
+    return field
+
+def distance_field_heuristic(environment, goal_pos):
+    """
+    Builds an exact static-distance heuristic toward a goal from a cached distance field.
+
+    Dynamic obstacles can only make paths longer, so the static distance is
+    admissible (and consistent) for the time-expanded search. Cells that cannot
+    reach the goal at all get an infinite estimate.
+
+    Args:
+        environment (Environment): The environment to search in.
+        goal_pos (tuple): The goal position (y, x).
+
+    Returns:
+        callable: A function mapping a flat cell index to its cost to the goal.
+    """
+    return memoryview(distance_field(environment, goal_pos)).__getitem__
+
+HEURISTICS = {
+    'chebyshev': chebyshev_heuristic,
+    'distance_field': distance_field_heuristic,
+}
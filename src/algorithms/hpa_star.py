@@ -0,0 +1,413 @@
+import heapq
+from collections import defaultdict
+
+DEFAULT_CLUSTER_SIZE = 16
+
+# Entrances at least this wide get a transition at each end instead of one in the middle.
+ENTRANCE_SPLIT_LENGTH = 6
+
+class HierarchicalPlanner:
+    """
+    Hierarchical path-finding A* (HPA*) for very large grids.
+
+    The grid is partitioned into square clusters. Entrances are the open stretches
+    along the border between two adjacent clusters, and each contributes one or two
+    transitions: pairs of cells facing each other across the border, which become
+    nodes of an abstract graph. Inside a cluster, abstract nodes are linked by their
+    exact intra-cluster distances, computed the first time the cluster is needed
+    and then cached.
+
+    A query connects the start and goal to the nodes of their clusters, runs A*
+    over the abstract graph and refines each abstract edge into cells with a small
+    search confined to one cluster. Paths are near-optimal rather than optimal.
+
+    When cells are blocked through Environment.add_obstacle, only the borders of
+    the clusters containing them are recomputed, and only those clusters (and
+    neighbors whose transitions changed) have their intra-cluster distances dropped.
+
+    Like D* Lite, the abstraction is static, so cells swept by dynamic obstacles
+    are treated as blocked.
+    """
+    def __init__(self, cluster_size=DEFAULT_CLUSTER_SIZE):
+        """
+        Initializes an empty planner. The abstraction is built on the first call.
+
+        Args:
+            cluster_size (int): The side length of a cluster, in cells.
+        """
+        self.cluster_size = cluster_size
+        self.environment = None
+        self.fingerprint = None
+        self.changes_seen = 0
+        self.transitions = {}
+        self.inter = defaultdict(dict)
+        self.intra = {}
+        self.refined = {}
+        self.nodes_expanded = 0
+
+    def __call__(self, environment, start_pos, goal_pos, current_time_step=0):
+        """
+        Finds a near-optimal path from start to goal through the cluster abstraction.
+
+        Args:
+            environment (Environment): The environment to search in.
+            start_pos (tuple): The starting position (y, x).
+            goal_pos (tuple): The goal position (y, x).
+            current_time_step (int): The current time step of the agent. Unused,
+                since dynamic obstacles are avoided independently of time.
+
+        Returns:
+            tuple: A tuple containing:
+                - list: The path from start to goal as a list of coordinates.
+                - int: The number of nodes expanded, abstract and local.
+                - float: The cost of the path.
+        """
+        if environment is not self.environment or environment.fingerprint != self.fingerprint:
+            self.build(environment)
+        else:
+            self.apply_changes()
+
+        self.nodes_expanded = 0
+        start = environment.index_of(start_pos)
+        goal = environment.index_of(goal_pos)
+        if not self.traversable(goal) or not environment.connected(start_pos, goal_pos):
+            return None, 0, 0
+        if start == goal:
+            return [environment.position_of(start)], 0, 0
+
+        abstract_path, cost = self.abstract_search(start, goal)
+        if abstract_path is None:
+            return None, self.nodes_expanded, 0
+
+        path = [start]
+        for u, v in zip(abstract_path, abstract_path[1:]):
+            path.extend(self.refine(u, v, cacheable=(u != start and v != goal))[1:])
+
+        return [environment.position_of(index) for index in path], self.nodes_expanded, cost
+
+    def build(self, environment):
+        """
+        Builds the cluster abstraction from scratch.
+        """
+        self.environment = environment
+        self.fingerprint = environment.fingerprint
+        self.changes_seen = len(environment.changed_cells)
+        self.passable = environment.passable_cells
+        self.swept = environment.swept_cells
+        self.costs = environment.cost_cells
+        self.neighbor_offsets = environment.neighbor_offsets
+        self.stride = environment.stride
+        self.cluster_rows = -(-environment.height // self.cluster_size)
+        self.cluster_columns = -(-environment.width // self.cluster_size)
+
+        self.transitions = {}
+        self.inter = defaultdict(dict)
+        self.intra = {}
+        self.refined = {}
+        for cy in range(self.cluster_rows):
+            for cx in range(self.cluster_columns):
+                for kind in ['h', 'v', 'd', 'a']:
+                    self.update_border(((cy, cx), kind))
+
+    def precompute(self, environment):
+        """
+        Builds the abstraction and computes every cluster's intra-cluster distances up front,
+        so that no query pays for them.
+        """
+        self.build(environment)
+        for cy in range(self.cluster_rows):
+            for cx in range(self.cluster_columns):
+                self.intra_edges((cy, cx))
+
+    def apply_changes(self):
+        """
+        Rebuilds the parts of the abstraction affected by cells blocked since the last call.
+        """
+        changed_cells = self.environment.changed_cells
+        changed_clusters = {self.cluster_of(index) for index in changed_cells[self.changes_seen:]}
+        self.changes_seen = len(changed_cells)
+        if not changed_clusters:
+            return
+
+        stale = set(changed_clusters)
+        for cluster in changed_clusters:
+            for border in self.borders_of(cluster):
+                old = self.transitions.get(border, [])
+                if self.update_border(border) != old:
+                    stale.update(self.border_clusters(border))
+
+        for cluster in stale:
+            self.intra.pop(cluster, None)
+        self.refined = {pair: segment for pair, segment in self.refined.items()
+                        if self.cluster_of(pair[0]) not in stale}
+
+    def traversable(self, index):
+        """Checks whether the agent may enter a cell."""
+        return self.passable[index] and not self.swept[index]
+
+    def cluster_of(self, index):
+        """Gets the (row, column) of the cluster containing a flat cell index."""
+        y, x = divmod(index, self.stride)
+        return ((y - 1) // self.cluster_size, (x - 1) // self.cluster_size)
+
+    def cluster_bounds(self, cluster):
+        """Gets the half-open (y0, y1, x0, x1) cell range of a cluster."""
+        y0 = cluster[0] * self.cluster_size
+        x0 = cluster[1] * self.cluster_size
+        return (y0, min(y0 + self.cluster_size, self.environment.height),
+                x0, min(x0 + self.cluster_size, self.environment.width))
+
+    def border_clusters(self, border):
+        """Gets the two clusters a border separates."""
+        (cy, cx), kind = border
+        other = {'h': (cy, cx + 1), 'v': (cy + 1, cx), 'd': (cy + 1, cx + 1), 'a': (cy + 1, cx - 1)}[kind]
+        return (cy, cx), other
+
+    def borders_of(self, cluster):
+        """Gets the keys of all borders a cluster shares with its eight neighbors."""
+        cy, cx = cluster
+        return [(cluster, 'h'), (cluster, 'v'), (cluster, 'd'), (cluster, 'a'),
+                ((cy, cx - 1), 'h'), ((cy - 1, cx), 'v'), ((cy - 1, cx - 1), 'd'), ((cy - 1, cx + 1), 'a')]
+
+    def update_border(self, border):
+        """
+        Recomputes the transitions across one border and their inter-cluster edges.
+
+        Borders are keyed on (cluster, kind): 'h' is the border with the cluster to
+        the right, 'v' the one below, and 'd'/'a' the corners shared with the
+        clusters below-right and below-left.
+
+        Returns:
+            list: The new transitions, as (cell in first cluster, cell in second cluster) pairs.
+        """
+        (cy, cx), kind = border
+        cluster, other = self.border_clusters(border)
+        index_of = self.environment.index_of
+        side_a, side_b = [], []
+        if (0 <= cy < self.cluster_rows and 0 <= cx < self.cluster_columns and
+                0 <= other[0] < self.cluster_rows and 0 <= other[1] < self.cluster_columns):
+            y0, y1, x0, x1 = self.cluster_bounds(cluster)
+            if kind == 'h':
+                side_a = [index_of((y, x1 - 1)) for y in range(y0, y1)]
+                side_b = [index_of((y, x1)) for y in range(y0, y1)]
+            elif kind == 'v':
+                side_a = [index_of((y1 - 1, x)) for x in range(x0, x1)]
+                side_b = [index_of((y1, x)) for x in range(x0, x1)]
+            elif kind == 'd':
+                side_a, side_b = [index_of((y1 - 1, x1 - 1))], [index_of((y1, x1))]
+            else:
+                side_a, side_b = [index_of((y1 - 1, x0))], [index_of((y1, x0 - 1))]
+
+        for a, b in self.transitions.pop(border, []):
+            self.inter[a].pop(b, None)
+            self.inter[b].pop(a, None)
+
+        transitions = self.border_transitions(side_a, side_b)
+        if transitions:
+            self.transitions[border] = transitions
+        for a, b in transitions:
+            self.inter[a][b] = self.costs[b]
+            self.inter[b][a] = self.costs[a]
+        return transitions
+
+    def border_transitions(self, side_a, side_b):
+        """
+        Picks transitions along a border given the facing cells on each side.
+
+        Straight entrances are maximal runs where both facing cells are open; each
+        gets a transition in its middle, or one at each end if it is wide. Every
+        diagonal crossing that does not stay within a single entrance also becomes
+        a transition, so no connection between the clusters is lost.
+        """
+        open_a = [self.traversable(index) for index in side_a]
+        open_b = [self.traversable(index) for index in side_b]
+        length = len(side_a)
+
+        transitions = []
+        entrance_of = [-1] * length
+        entrances = 0
+        i = 0
+        while i < length:
+            if not (open_a[i] and open_b[i]):
+                i += 1
+                continue
+            first = i
+            while i < length and open_a[i] and open_b[i]:
+                entrance_of[i] = entrances
+                i += 1
+            last = i - 1
+            entrances += 1
+            if last - first + 1 < ENTRANCE_SPLIT_LENGTH:
+                middle = (first + last) // 2
+                transitions.append((side_a[middle], side_b[middle]))
+            else:
+                transitions.append((side_a[first], side_b[first]))
+                transitions.append((side_a[last], side_b[last]))
+
+        for i in range(length):
+            if not open_a[i]:
+                continue
+            for j in (i - 1, i + 1):
+                if 0 <= j < length and open_b[j] and (entrance_of[i] < 0 or entrance_of[i] != entrance_of[j]):
+                    transitions.append((side_a[i], side_b[j]))
+
+        return transitions
+
+    def cluster_nodes(self, cluster):
+        """Gets the abstract nodes lying inside a cluster."""
+        nodes = set()
+        for border in self.borders_of(cluster):
+            for a, b in self.transitions.get(border, []):
+                nodes.add(a if border[0] == cluster else b)
+        return nodes
+
+    def intra_edges(self, cluster):
+        """
+        Gets the exact distances between the abstract nodes of a cluster, computing them once.
+
+        Returns:
+            dict: Maps each node to a dict of {other node: cost} within the cluster.
+        """
+        edges = self.intra.get(cluster)
+        if edges is None:
+            nodes = self.cluster_nodes(cluster)
+            edges = {}
+            for node in nodes:
+                distances, _ = self.cluster_search(node, cluster)
+                edges[node] = {other: distances[other] for other in nodes
+                               if other != node and other in distances}
+            self.intra[cluster] = edges
+        return edges
+
+    def cluster_search(self, source, cluster, reverse=False, target=None):
+        """
+        Runs Dijkstra's algorithm confined to one cluster.
+
+        Args:
+            source (int): The flat cell index to start from.
+            cluster (tuple): The cluster to stay inside.
+            reverse (bool): Whether to compute costs toward the source instead of from it.
+            target (int, optional): Stop as soon as this cell is settled.
+
+        Returns:
+            tuple: Dicts of settled distances and of parents, keyed by flat cell index.
+        """
+        y0, y1, x0, x1 = self.cluster_bounds(cluster)
+        stride = self.stride
+        costs = self.costs
+        distances = {}
+        parent = {source: None}
+        best = {source: 0}
+        frontier = [(0, source)]
+
+        while frontier:
+            distance, current = heapq.heappop(frontier)
+            if current in distances:
+                continue
+            distances[current] = distance
+            self.nodes_expanded += 1
+            if current == target:
+                break
+
+            for offset in self.neighbor_offsets:
+                neighbor = current + offset
+                y, x = divmod(neighbor, stride)
+                if not (y0 < y <= y1 and x0 < x <= x1) or not self.traversable(neighbor):
+                    continue # Outside the cluster (padded coordinates) or blocked
+                new_distance = distance + (costs[current] if reverse else costs[neighbor])
+                if new_distance < best.get(neighbor, float('inf')):
+                    best[neighbor] = new_distance
+                    parent[neighbor] = current
+                    heapq.heappush(frontier, (new_distance, neighbor))
+
+        return distances, parent
+
+    def abstract_search(self, start, goal):
+        """
+        Runs A* over the abstract graph with the start and goal temporarily inserted.
+
+        Returns:
+            tuple: The abstract path as a list of flat cell indices and its cost,
+            or (None, 0) if the goal is unreachable.
+        """
+        start_cluster = self.cluster_of(start)
+        goal_cluster = self.cluster_of(goal)
+        start_nodes = self.cluster_nodes(start_cluster)
+        goal_nodes = self.cluster_nodes(goal_cluster)
+
+        start_distances, _ = self.cluster_search(start, start_cluster)
+        start_edges = {node: start_distances[node] for node in start_nodes if node in start_distances}
+        if start_cluster == goal_cluster and goal in start_distances:
+            start_edges[goal] = start_distances[goal]
+
+        goal_distances, _ = self.cluster_search(goal, goal_cluster, reverse=True)
+        goal_edges = {node: goal_distances[node] for node in goal_nodes if node in goal_distances}
+
+        goal_y, goal_x = divmod(goal, self.stride)
+        infinity = float('inf')
+        g_cost = {start: 0}
+        parent = {start: None}
+        frontier = [(0, start)]
+        closed = set()
+
+        while frontier:
+            _, current = heapq.heappop(frontier)
+            if current in closed:
+                continue
+            closed.add(current)
+            self.nodes_expanded += 1
+
+            if current == goal:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = parent[current]
+                path.reverse()
+                return path, g_cost[goal]
+
+            edges = []
+            if current == start:
+                edges.append(start_edges)
+            else:
+                edges.append(self.intra_edges(self.cluster_of(current)).get(current, {}))
+            edges.append(self.inter.get(current, {}))
+            if current in goal_edges:
+                edges.append({goal: goal_edges[current]})
+
+            for neighbors in edges:
+                for neighbor, edge_cost in neighbors.items():
+                    new_g_cost = g_cost[current] + edge_cost
+                    if new_g_cost < g_cost.get(neighbor, infinity):
+                        g_cost[neighbor] = new_g_cost
+                        parent[neighbor] = current
+                        y, x = divmod(neighbor, self.stride)
+                        f_cost = new_g_cost + max(abs(y - goal_y), abs(x - goal_x))
+                        heapq.heappush(frontier, (f_cost, neighbor))
+
+        return None, 0
+
+    def refine(self, u, v, cacheable=True):
+        """
+        Expands an abstract edge into the cells it stands for.
+
+        Edges across a border are a single step; edges inside a cluster are
+        refined with a search confined to that cluster and cached.
+
+        Returns:
+            list: Flat cell indices from u to v, inclusive.
+        """
+        if self.cluster_of(u) != self.cluster_of(v):
+            return [u, v]
+
+        segment = self.refined.get((u, v))
+        if segment is None:
+            _, parent = self.cluster_search(u, self.cluster_of(u), target=v)
+            segment = []
+            current = v
+            while current is not None:
+                segment.append(current)
+                current = parent[current]
+            segment.reverse()
+            if cacheable:
+                self.refined[(u, v)] = segment
+        return segment
@@ -0,0 +1,202 @@
+import numpy as np
+
+from algorithms.frontier import make_frontier
+from algorithms.heuristics import chebyshev_heuristic
+from algorithms.search_tables import UNVISITED, state_tables
+
+def interior_cells(environment):
+    """
+    Marks the cells where jump point search may prune and jump.
+
+    A cell is interior if it and its 8 neighbors are each either a static wall or
+    a plain cell: cost 1 and never visited by a dynamic obstacle. Within such
+    regions every move costs 1 and nothing depends on time, so all the usual
+    grid symmetries hold. Results are cached on the environment (see
+    Environment.derived_cache) until its grids change.
+
+    Args:
+        environment (Environment): The environment to analyze.
+
+    Returns:
+        memoryview: A byte per flat cell index, 1 for interior cells.
+    """
+    cache = environment.derived_cache('jps')
+    interior = cache.get('interior')
+    if interior is not None:
+        return interior
+
+    passable = environment.passable_grid.astype(bool)
+    plain = passable & (environment.cost_grid == 1) & ~environment.swept_grid
+    special = passable & ~plain
+    # Dilate the special cells by one in every direction; the wall border keeps
+    # the padded edges out of it.
+    near_special = special.copy()
+    near_special[1:, :] |= special[:-1, :]
+    near_special[:-1, :] |= special[1:, :]
+    dilated = near_special.copy()
+    dilated[:, 1:] |= near_special[:, :-1]
+    dilated[:, :-1] |= near_special[:, 1:]
+    interior = memoryview((plain & ~dilated).astype(np.uint8).ravel())
+
+    cache['interior'] = interior
+    return interior
+
+def jump_point_search(environment, start_pos, goal_pos, current_time_step=0, heuristic=chebyshev_heuristic):
+    """
+    Performs A* with jump point search (JPS) to find the cheapest path.
+
+    In interior regions (see interior_cells) a state only generates the
+    neighbors that no symmetric path of the same cost reaches more directly,
+    and each of those is reached by jumping in a straight or diagonal line
+    until something interesting happens: the goal, a neighbor forced by a wall,
+    or the edge of the region. Only those jump points enter the frontier. Cells
+    on or next to other terrain costs or dynamic obstacles are expanded like
+    a_star does, with all 8 neighbors, so costs and collisions are exact there.
+    The path cost is the same as a_star's.
+
+    Args:
+        environment (Environment): The environment to search in.
+        start_pos (tuple): The starting position (y, x).
+        goal_pos (tuple): The goal position (y, x).
+        current_time_step (int): The current time step of the agent.
+        heuristic (callable): Builds the heuristic for a goal, as for a_star.
+
+    Returns:
+        tuple: A tuple containing:
+            - list: The path from start to goal as a list of coordinates.
+            - int: The number of nodes (jump points) expanded.
+            - float: The cost of the path.
+    """
+    if not environment.connected(start_pos, goal_pos):
+        return None, 0, 0 # Walls separate start and goal; no need to search
+    passable = environment.passable_cells
+    occupied = environment.occupied_cells
+    costs = environment.cost_cells
+    interior = interior_cells(environment)
+    stride = environment.stride
+    num_cells = environment.num_cells
+    period = environment.period
+    goal = environment.index_of(goal_pos)
+    estimate = heuristic(environment, goal_pos)
+    infinity = float('inf')
+    num_states = period * num_cells
+    all_directions = [(dy, dx) for dy in [-1, 0, 1] for dx in [-1, 0, 1] if dy or dx]
+
+    def jump(cell, dy, dx):
+        """Steps from cell in a direction until a jump point; returns it and the steps taken."""
+        offset = dy * stride + dx
+        steps = 0
+        while True:
+            cell += offset
+            steps += 1
+            if not passable[cell]:
+                return None, steps
+            if cell == goal or not interior[cell]:
+                return cell, steps
+            if dy and dx:
+                # Forced neighbors: a wall behind the move along one axis opens a
+                # diagonal that no other equally short path reaches.
+                if (not passable[cell - dx] and passable[cell - dx + dy * stride]) or \
+                        (not passable[cell - dy * stride] and passable[cell + dx - dy * stride]):
+                    return cell, steps
+                # A diagonal jump stops where a straight jump would find something.
+                if jump(cell, 0, dx)[0] is not None or jump(cell, dy, 0)[0] is not None:
+                    return cell, steps
+            elif dx:
+                if (not passable[cell + stride] and passable[cell + stride + dx]) or \
+                        (not passable[cell - stride] and passable[cell - stride + dx]):
+                    return cell, steps
+            else:
+                if (not passable[cell + 1] and passable[cell + 1 + dy * stride]) or \
+                        (not passable[cell - 1] and passable[cell - 1 + dy * stride]):
+                    return cell, steps
+
+    def directions(cell, parent_cell):
+        """Lists the directions to jump in from cell, pruning symmetric ones in interior regions."""
+        if parent_cell == cell or not interior[cell]:
+            return all_directions
+        cell_y, cell_x = divmod(cell, stride)
+        parent_y, parent_x = divmod(parent_cell, stride)
+        dy = (cell_y > parent_y) - (cell_y < parent_y)
+        dx = (cell_x > parent_x) - (cell_x < parent_x)
+        if dy and dx:
+            result = [(dy, 0), (0, dx), (dy, dx)]
+            if not passable[cell - dx]:
+                result.append((dy, -dx))
+            if not passable[cell - dy * stride]:
+                result.append((-dy, dx))
+        elif dx:
+            result = [(0, dx)]
+            if not passable[cell + stride]:
+                result.append((1, dx))
+            if not passable[cell - stride]:
+                result.append((-1, dx))
+        else:
+            result = [(dy, 0)]
+            if not passable[cell + 1]:
+                result.append((dy, 1))
+            if not passable[cell - 1]:
+                result.append((dy, -1))
+        return result
+
+    initial_state = (current_time_step % period) * num_cells + environment.index_of(start_pos)
+    frontier = make_frontier(environment)
+    frontier.push(0, initial_state)
+    parent, g_cost, closed = state_tables(environment, num_states, (UNVISITED, 'i'), (infinity, 'd'), (0, 'b'))
+    parent[initial_state] = initial_state
+    g_cost[initial_state] = 0
+
+    nodes_expanded = 0
+
+    while frontier:
+        _, current_state = frontier.pop()
+        if closed[current_state]:
+            continue # Stale entry
+        closed[current_state] = 1
+        phase_at_current, current = divmod(current_state, num_cells)
+        nodes_expanded += 1
+
+        if current == goal:
+            return _expand_path(environment, parent, current_state), nodes_expanded, g_cost[current_state]
+
+        parent_cell = parent[current_state] % num_cells
+        for dy, dx in directions(current, parent_cell):
+            neighbor, steps = jump(current, dy, dx)
+            if neighbor is None:
+                continue
+            neighbor_state = ((phase_at_current + steps) % period) * num_cells + neighbor
+            if occupied[neighbor_state]:
+                continue # Only single steps reach cells a dynamic obstacle visits
+            # Every cell jumped over is plain, costing 1.
+            new_g_cost = g_cost[current_state] + steps - 1 + costs[neighbor]
+
+            if new_g_cost < g_cost[neighbor_state]:
+                h_cost = estimate(neighbor)
+                if h_cost == infinity:
+                    continue
+                g_cost[neighbor_state] = new_g_cost
+                frontier.push(new_g_cost + h_cost, neighbor_state)
+                parent[neighbor_state] = current_state
+
+    return None, nodes_expanded, 0
+
+def _expand_path(environment, parent, state):
+    """Rebuilds the cell-by-cell path from the chain of jump points ending at state."""
+    num_cells = environment.num_cells
+    stride = environment.stride
+    jump_points = [state % num_cells]
+    while parent[state] != state:
+        state = parent[state]
+        jump_points.append(state % num_cells)
+    jump_points.reverse()
+
+    cells = [jump_points[0]]
+    for target in jump_points[1:]:
+        cell = cells[-1]
+        cell_y, cell_x = divmod(cell, stride)
+        target_y, target_x = divmod(target, stride)
+        offset = ((target_y > cell_y) - (target_y < cell_y)) * stride + (target_x > cell_x) - (target_x < cell_x)
+        while cell != target:
+            cell += offset
+            cells.append(cell)
+    return [environment.position_of(cell) for cell in cells]
@@ -0,0 +1,162 @@
+import os
+
+import numpy as np
+
+from algorithms.heuristics import dijkstra_field
+
+DEFAULT_NUM_LANDMARKS = 8
+
+def landmarks_path(map_path):
+    """Gets the path of the landmark file stored next to a map file."""
+    return os.path.splitext(map_path)[0] + '.landmarks.npz'
+
+class Landmarks:
+    """
+    Precomputed landmark distances for ALT (A*, landmarks, triangle inequality) heuristics.
+
+    For each landmark L the forward static distance d(L, n) to every cell n is
+    stored as one float32 row, so memory is a fixed k x cells. Because moving into
+    a cell costs that cell's terrain cost, d(n, L) = d(L, n) + cost(L) - cost(n),
+    and both triangle-inequality bounds on d(n, goal) can be derived from the
+    forward row alone:
+
+        d(n, goal) >= d(L, goal) - d(L, n)
+        d(n, goal) >= d(n, L) - d(goal, L)
+
+    The resulting heuristic works for any start/goal pair.
+    """
+    def __init__(self, indices, distances, fingerprint):
+        """
+        Initializes the landmark set.
+
+        Args:
+            indices (numpy.ndarray): Flat cell indices of the landmarks.
+            distances (numpy.ndarray): A (k, num_cells) float32 array of forward distances.
+            fingerprint (str): The fingerprint of the map the distances were computed on.
+        """
+        self.indices = indices
+        self.distances = distances
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, environment, num_landmarks=DEFAULT_NUM_LANDMARKS):
+        """
+        Selects landmarks by farthest-point selection and computes their distances.
+
+        The first landmark is the cell farthest from the start position; each
+        following one is the cell farthest from all landmarks chosen so far.
+
+        Args:
+            environment (Environment): The environment to preprocess.
+            num_landmarks (int): The number of landmarks to select.
+
+        Returns:
+            Landmarks: The landmark set.
+        """
+        if environment.start_pos is not None:
+            seed = environment.index_of(environment.start_pos)
+        else:
+            seed = int(np.flatnonzero(environment.passable_grid)[0])
+
+        nearest = dijkstra_field(environment, [seed])
+        indices = []
+        rows = []
+        for _ in range(num_landmarks):
+            reachable = np.where(np.isfinite(nearest), nearest, -1)
+            landmark = int(np.argmax(reachable))
+            if reachable[landmark] <= 0:
+                break # Every reachable cell is already a landmark
+            row = dijkstra_field(environment, [landmark])
+            indices.append(landmark)
+            rows.append(row)
+            nearest = row if len(rows) == 1 else np.minimum(nearest, row)
+
+        distances = np.array(rows, dtype=np.float32).reshape(len(rows), environment.num_cells)
+        return cls(np.array(indices, dtype=np.int64), distances, environment.fingerprint)
+
+    def save(self, path):
+        """Saves the landmark set to a .npz file."""
+        np.savez(path, indices=self.indices, distances=self.distances,
+                 fingerprint=np.array(self.fingerprint))
+
+    @classmethod
+    def load(cls, path, environment):
+        """
+        Loads a landmark set saved with save().
+
+        Args:
+            path (str): The path to the .npz file.
+            environment (Environment): The environment the landmarks will be used with.
+
+        Raises:
+            ValueError: If the file was built for a different map.
+        """
+        with np.load(path) as data:
+            landmarks = cls(data['indices'], data['distances'], str(data['fingerprint']))
+        if landmarks.fingerprint != environment.fingerprint:
+            raise ValueError(f"Landmark file {path} was built for a different map")
+        return landmarks
+
+    @classmethod
+    def load_or_build(cls, environment, map_path, num_landmarks=DEFAULT_NUM_LANDMARKS, rebuild=False):
+        """
+        Loads the landmark file next to a map, building and saving it if missing or stale.
+
+        Args:
+            environment (Environment): The environment loaded from map_path.
+            map_path (str): The path to the map file.
+            num_landmarks (int): The number of landmarks to select when building.
+            rebuild (bool): Whether to rebuild the file even if a valid one exists.
+
+        Returns:
+            Landmarks: The landmark set.
+        """
+        path = landmarks_path(map_path)
+        if not rebuild and os.path.exists(path):
+            try:
+                return cls.load(path, environment)
+            except ValueError:
+                pass # Stale file from an edited map; rebuild it below
+
+        landmarks = cls.build(environment, num_landmarks)
+        landmarks.save(path)
+        return landmarks
+
+    def heuristic(self, environment, goal_pos):
+        """
+        Builds the ALT heuristic toward a goal.
+
+        Landmark distances only grow when obstacles are added, so the bound stays
+        admissible after add_obstacle. Cells in a different static component than
+        the goal get an infinite estimate.
+
+        Args:
+            environment (Environment): The environment to search in.
+            goal_pos (tuple): The goal position (y, x).
+
+        Returns:
+            callable: A function mapping a flat cell index to a lower bound on its cost to the goal.
+        """
+        infinity = float('inf')
+        costs = environment.cost_cells
+        goal = environment.index_of(goal_pos)
+        goal_cost = costs[goal]
+        rows = [(memoryview(row), float(row[goal])) for row in self.distances]
+
+        def heuristic(index):
+            best = 0
+            for row, goal_distance in rows:
+                distance = row[index]
+                if distance == infinity or goal_distance == infinity:
+                    if distance != goal_distance:
+                        return infinity # Exactly one of them is connected to the landmark
+                    continue
+                to_goal = goal_distance - distance
+                from_goal = distance - costs[index] - goal_distance + goal_cost
+                if to_goal > best:
+                    best = to_goal
+                if from_goal > best:
+                    best = from_goal
+            return best
+
+        return heuristic
@@ -1,76 +1,230 @@
 import random
-from algorithms.a_star import a_star, heuristic
+from concurrent.futures import ProcessPoolExecutor
+
+from algorithms.a_star import a_star
+from algorithms.search_stats import SearchStats
 
 def get_path_cost(environment, path):
     """Calculates the cost of a given path."""
     cost = 0
     if not path:
         return cost
-    for i in range(len(path) - 1):
-        cost += environment.get_cost(path[i+1])
+    costs = environment.cost_cells
+    for position in path[1:]:
+        cost += costs[environment.index_of(position)]
     return cost
 
-def generate_random_path(environment, start_pos, goal_pos):
+class SubpathCache:
+    """
+    Memoizes A* results between pairs of cells.
+
+    Entries are keyed on (from, to, time_step % period): obstacle motion repeats
+    every period steps, so a search started a whole period later finds the same
+    path. Cache hits report no expanded nodes. Searches report to stats, if given.
     """
-    Generates a semi-random valid path from start to goal.
-    This uses a greedy approach, always trying to move closer to the goal.
+    def __init__(self, environment, stats=None):
+        self.environment = environment
+        self.stats = stats
+        self.paths = {}
+
+    def search(self, from_pos, to_pos, time_step):
+        """
+        Finds the cheapest path between two cells, starting at the given time step.
+
+        Returns:
+            tuple: The path (or None) and the number of nodes expanded to find it.
+        """
+        key = (tuple(map(int, from_pos)), tuple(map(int, to_pos)), time_step % self.environment.period)
+        if key in self.paths:
+            return self.paths[key], 0
+
+        path, nodes_expanded, _ = a_star(self.environment, from_pos, to_pos, time_step, stats=self.stats)
+        self.paths[key] = path
+        return path, nodes_expanded
+
+def generate_random_path(environment, start_pos, goal_pos, current_time_step=0, rng=random, cache=None):
+    """
+    Generates a randomized valid path from start to goal.
+
+    The path is routed through a random waypoint near the start and goal, so every
+    restart begins from a different path. Falls back to the direct path if the
+    waypoint cannot be connected.
     """
-    # Use A* to get an initial path and its expanded nodes
-    path, nodes_expanded_a_star, _ = a_star(environment, start_pos, goal_pos)
-    return path, nodes_expanded_a_star
+    cache = cache or SubpathCache(environment)
 
-def get_neighbor(environment, path, original_start, original_goal):
+    # Sample waypoints from the bounding box of start and goal, widened a little
+    margin = 2
+    low_y, high_y = sorted((int(start_pos[0]), int(goal_pos[0])))
+    low_x, high_x = sorted((int(start_pos[1]), int(goal_pos[1])))
+    for _ in range(10):
+        waypoint = (rng.randint(max(low_y - margin, 0), min(high_y + margin, environment.height - 1)),
+                    rng.randint(max(low_x - margin, 0), min(high_x + margin, environment.width - 1)))
+        if environment.passable_cells[environment.index_of(waypoint)]:
+            break
+    else:
+        return cache.search(start_pos, goal_pos, current_time_step)
+
+    first_leg, nodes_expanded_first = cache.search(start_pos, waypoint, current_time_step)
+    if first_leg:
+        second_leg, nodes_expanded_second = cache.search(waypoint, goal_pos,
+                                                         current_time_step + len(first_leg) - 1)
+        if second_leg:
+            return first_leg + second_leg[1:], nodes_expanded_first + nodes_expanded_second
+        nodes_expanded_first += nodes_expanded_second
+
+    path, nodes_expanded_direct = cache.search(start_pos, goal_pos, current_time_step)
+    return path, nodes_expanded_first + nodes_expanded_direct
+
+def get_neighbor(environment, path, current_time_step=0, rng=random, cache=None):
     """
-    Gets a neighboring path by modifying a sub-path.
-    original_start and original_goal are needed for the a_star call.
+    Gets a neighboring path by replacing a random sub-path with the cheapest one.
+
+    The replacement is planned for the time step at which the agent reaches the
+    sub-path. If it changes the path's length, the rest of the path is shifted in
+    time and is re-checked against the dynamic obstacles; a colliding neighbor is
+    rejected.
     """
     if len(path) < 4:
-        return path
+        return path, 0
+    cache = cache or SubpathCache(environment)
 
-    p1_index = random.randint(1, len(path) - 3)
-    p2_index = random.randint(p1_index + 1, len(path) - 2)
+    p1_index = rng.randint(1, len(path) - 3)
+    p2_index = rng.randint(p1_index + 1, len(path) - 2)
 
-    sub_path, nodes_expanded_a_star, _ = a_star(environment, path[p1_index - 1], path[p2_index + 1])
+    sub_path, nodes_expanded_a_star = cache.search(path[p1_index - 1], path[p2_index + 1],
+                                                   current_time_step + p1_index - 1)
 
     if sub_path:
-        return path[:p1_index] + sub_path[1:-1] + path[p2_index:], nodes_expanded_a_star
+        neighbor_path = path[:p1_index] + sub_path[1:-1] + path[p2_index + 1:]
+        if (len(neighbor_path) == len(path) or
+                environment.first_conflict(neighbor_path, current_time_step) is None):
+            return neighbor_path, nodes_expanded_a_star
+    return path, nodes_expanded_a_star # Return original path and its expanded nodes if no sub-path is found
+
+def climb(environment, start_pos, goal_pos, current_time_step, max_iterations, rng, cache, direct):
+    """
+    Runs one hill-climbing restart.
+
+    Args:
+        direct (bool): Whether to start from the direct A* path instead of a random one.
+
+    Returns:
+        tuple: The best path found (or None), the nodes expanded and its cost.
+    """
+    if direct:
+        current_path, total_nodes_expanded = cache.search(start_pos, goal_pos, current_time_step)
     else:
-        return path, nodes_expanded_a_star # Return original path and its expanded nodes if no sub-path is found
+        current_path, total_nodes_expanded = generate_random_path(environment, start_pos, goal_pos,
+                                                                  current_time_step, rng, cache)
+    if not current_path:
+        return None, total_nodes_expanded, float('inf')
+
+    current_cost = get_path_cost(environment, current_path)
+    for _ in range(max_iterations):
+        neighbor_path, nodes_expanded_neighbor = get_neighbor(environment, current_path,
+                                                              current_time_step, rng, cache)
+        total_nodes_expanded += nodes_expanded_neighbor
+
+        neighbor_cost = get_path_cost(environment, neighbor_path)
+
+        if neighbor_cost < current_cost:
+            current_path = neighbor_path
+            current_cost = neighbor_cost
+        else:
+            break
+
+    return current_path, total_nodes_expanded, current_cost
+
+_worker_environment = None
+
+def _init_worker(environment):
+    """Stores the environment once per worker process."""
+    global _worker_environment
+    _worker_environment = environment
+
+def _climb_in_worker(start_pos, goal_pos, current_time_step, max_iterations, seeds, stats=None):
+    """
+    Runs a batch of restarts in a worker process, sharing one subpath cache.
 
-def hill_climbing_replan(environment, start_pos, goal_pos, current_time_step=0):
+    Returns:
+        tuple: The restart results and the stats collected by the worker, if any.
+    """
+    cache = SubpathCache(_worker_environment, stats)
+    results = [climb(_worker_environment, start_pos, goal_pos, current_time_step, max_iterations,
+                     random.Random(seed), cache, direct=(seed is None))
+               for seed in seeds]
+    return results, stats
+
+def hill_climbing_replan(environment, start_pos, goal_pos, current_time_step=0,
+                         num_restarts=20, max_iterations=50, workers=None, seed=None, stats=None):
     """
     Replanning using hill-climbing with random restarts.
+
+    The first restart starts from the direct A* path and the others from randomized
+    paths through random waypoints. All restarts share a subpath cache, so repeated
+    sub-searches cost nothing after the first time.
+
+    Args:
+        environment (Environment): The environment to search in.
+        start_pos (tuple): The starting position (y, x).
+        goal_pos (tuple): The goal position (y, x).
+        current_time_step (int): The current time step of the agent.
+        num_restarts (int): The number of hill-climbing restarts.
+        max_iterations (int): The maximum number of improvement steps per restart.
+        workers (int, optional): Run the restarts in a pool of this many processes.
+            Each worker gets the environment once and keeps its own subpath cache.
+        seed (int, optional): Seed for the random restarts.
+        stats (SearchStats, optional): Collects counters and phase timings,
+            including those of the internal A* calls and of worker processes.
+            See algorithms.search_stats.
+
+    Returns:
+        tuple: A tuple containing:
+            - list: The best path found as a list of coordinates.
+            - int: The number of nodes expanded by the internal A* calls.
+            - float: The cost of the path.
     """
-    num_restarts = 20
-    max_iterations = 50 # To prevent getting stuck
+    if not environment.connected(start_pos, goal_pos):
+        return None, 0, 0 # Walls separate start and goal; no need to search
+    if stats is not None:
+        stats.begin('hill_climbing_replan', 'climb')
+    rng = random.Random(seed)
+    seeds = [None] + [rng.getrandbits(32) for _ in range(num_restarts - 1)]
+
+    if workers and workers > 1:
+        batches = [seeds[i::workers] for i in range(workers) if seeds[i::workers]]
+        with ProcessPoolExecutor(max_workers=len(batches), initializer=_init_worker,
+                                 initargs=(environment,)) as executor:
+            # Workers collect into their own stats, which are merged here.
+            worker_stats = None if stats is None else SearchStats(stats.trace_memory)
+            futures = [executor.submit(_climb_in_worker, start_pos, goal_pos, current_time_step,
+                                       max_iterations, batch, worker_stats)
+                       for batch in batches]
+            results = []
+            for future in futures:
+                batch_results, batch_stats = future.result()
+                results.extend(batch_results)
+                if batch_stats is not None:
+                    stats.merge(batch_stats)
+    else:
+        cache = SubpathCache(environment, stats)
+        results = [climb(environment, start_pos, goal_pos, current_time_step, max_iterations,
+                         random.Random(restart_seed), cache, direct=(restart_seed is None))
+                   for restart_seed in seeds]
+
+    if stats is not None:
+        stats.phase('select')
     best_path = None
     best_cost = float('inf')
     total_nodes_expanded = 0
+    for path, nodes_expanded, cost in results:
+        total_nodes_expanded += nodes_expanded
+        if path and cost < best_cost:
+            best_path = path
+            best_cost = cost
+    if stats is not None:
+        stats.end()
 
-    for _ in range(num_restarts):
-        # Generate a random initial path
-        current_path, nodes_expanded_initial = generate_random_path(environment, start_pos, goal_pos)
-        total_nodes_expanded += nodes_expanded_initial
-
-        if not current_path:
-            continue
-            
-        current_cost = get_path_cost(environment, current_path)
-
-        for _ in range(max_iterations):
-            neighbor_path, nodes_expanded_neighbor = get_neighbor(environment, current_path, start_pos, goal_pos)
-            total_nodes_expanded += nodes_expanded_neighbor
-
-            neighbor_cost = get_path_cost(environment, neighbor_path)
-
-            if neighbor_cost < current_cost:
-                current_path = neighbor_path
-                current_cost = neighbor_cost
-            else:
-                break
-        
-        if current_cost < best_cost:
-            best_path = current_path
-            best_cost = current_cost
-            
-    return best_path, total_nodes_expanded, best_cost
\ No newline at end of file
+    if best_path is None:
+        return None, total_nodes_expanded, 0
+    return best_path, total_nodes_expanded, best_cost
@@ -0,0 +1,182 @@
+import time
+import tracemalloc
+
+class SearchStats:
+    """
+    Collects counters and per-phase timings from searches.
+
+    Pass an instance as stats= to bfs, ucs, a_star or hill_climbing_replan
+    (which hands it to its internal A* calls). The planners then wrap their
+    frontier and passability lookups in the counting proxies below before the
+    main loop; without stats they run their loops unchanged, so disabled
+    instrumentation costs a few `is None` checks per call and nothing per node.
+    Counters accumulate over every search the instance is passed to.
+
+    Attributes:
+        calls (dict): Searches run, by planner name.
+        nodes_expanded (int): Nodes expanded, counted by the innermost searches.
+        pushes (int): Frontier pushes.
+        pops (int): Frontier pops.
+        obstacle_checks (int): Passability lookups of neighboring cells.
+        peak_frontier (int): The largest frontier size seen.
+        peak_memory (int): The largest tracemalloc peak of an outermost search,
+            in bytes above what was allocated when it started.
+        phase_seconds (dict): Wall time by planner name and phase. Phases of an
+            outer search include the time of the searches it runs.
+    """
+    def __init__(self, trace_memory=True):
+        """
+        Args:
+            trace_memory (bool): Measure peak memory with tracemalloc, which slows
+                allocation-heavy code down noticeably while it runs.
+        """
+        self.trace_memory = trace_memory
+        self.calls = {}
+        self.nodes_expanded = 0
+        self.pushes = 0
+        self.pops = 0
+        self.obstacle_checks = 0
+        self.peak_frontier = 0
+        self.peak_memory = 0
+        self.phase_seconds = {}
+        # One [planner, phase, phase start] entry per search in progress.
+        self.running = []
+        self.memory_baseline = 0
+        self.started_tracing = False
+
+    @property
+    def stale_pops(self):
+        """Pops that expanded nothing, e.g. entries superseded by a cheaper push."""
+        return self.pops - self.nodes_expanded
+
+    def begin(self, planner, phase='setup'):
+        """Starts timing a search; searches may nest."""
+        self.calls[planner] = self.calls.get(planner, 0) + 1
+        if not self.running and self.trace_memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                self.started_tracing = True
+            self.memory_baseline = tracemalloc.get_traced_memory()[0]
+        self.running.append([planner, phase, time.perf_counter()])
+
+    def phase(self, phase):
+        """Ends the current phase of the innermost search and starts the next."""
+        now = time.perf_counter()
+        self._record(now)
+        self.running[-1][1:] = [phase, now]
+
+    def end(self, nodes_expanded=0):
+        """
+        Finishes the innermost search.
+
+        Args:
+            nodes_expanded (int): The nodes the search expanded itself, not
+                counting searches it ran.
+        """
+        self._record(time.perf_counter())
+        self.running.pop()
+        self.nodes_expanded += nodes_expanded
+        if not self.running and self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] - self.memory_baseline
+            self.peak_memory = max(self.peak_memory, peak)
+            if self.started_tracing:
+                tracemalloc.stop()
+                self.started_tracing = False
+
+    def _record(self, now):
+        planner, phase, started = self.running[-1]
+        phases = self.phase_seconds.setdefault(planner, {})
+        phases[phase] = phases.get(phase, 0.0) + now - started
+
+    def count_frontier(self, frontier):
+        """Wraps a BucketQueue or HeapQueue so its pushes and pops are counted."""
+        return CountingFrontier(frontier, self)
+
+    def count_queue(self, queue):
+        """Wraps a FIFO deque so its appends and pops are counted."""
+        return CountingQueue(queue, self)
+
+    def count_checks(self, cells):
+        """Wraps a passability view so its lookups are counted as obstacle checks."""
+        return CountingCells(cells, self)
+
+    def merge(self, other):
+        """Adds the counters of stats collected elsewhere, e.g. in a worker process."""
+        for planner, calls in other.calls.items():
+            self.calls[planner] = self.calls.get(planner, 0) + calls
+        self.nodes_expanded += other.nodes_expanded
+        self.pushes += other.pushes
+        self.pops += other.pops
+        self.obstacle_checks += other.obstacle_checks
+        self.peak_frontier = max(self.peak_frontier, other.peak_frontier)
+        self.peak_memory = max(self.peak_memory, other.peak_memory)
+        for planner, phases in other.phase_seconds.items():
+            own = self.phase_seconds.setdefault(planner, {})
+            for phase, seconds in phases.items():
+                own[phase] = own.get(phase, 0.0) + seconds
+
+    def to_dict(self):
+        """Returns the collected stats as a JSON-serializable dict."""
+        return {
+            'calls': dict(self.calls),
+            'nodes_expanded': self.nodes_expanded,
+            'pushes': self.pushes,
+            'pops': self.pops,
+            'stale_pops': self.stale_pops,
+            'obstacle_checks': self.obstacle_checks,
+            'peak_frontier': self.peak_frontier,
+            'peak_memory_bytes': self.peak_memory if self.trace_memory else None,
+            'phase_seconds': {planner: dict(phases) for planner, phases in self.phase_seconds.items()},
+        }
+
+class CountingFrontier:
+    """A priority queue proxy that counts pushes and pops and tracks the peak size."""
+    def __init__(self, frontier, stats):
+        self.frontier = frontier
+        self.stats = stats
+
+    def push(self, priority, item):
+        self.frontier.push(priority, item)
+        stats = self.stats
+        stats.pushes += 1
+        if len(self.frontier) > stats.peak_frontier:
+            stats.peak_frontier = len(self.frontier)
+
+    def pop(self):
+        self.stats.pops += 1
+        return self.frontier.pop()
+
+    def __len__(self):
+        return len(self.frontier)
+
+class CountingQueue:
+    """A FIFO queue proxy for breadth-first search, counting like CountingFrontier."""
+    def __init__(self, queue, stats):
+        self.queue = queue
+        self.stats = stats
+
+    def append(self, item):
+        self.queue.append(item)
+        stats = self.stats
+        stats.pushes += 1
+        if len(self.queue) > stats.peak_frontier:
+            stats.peak_frontier = len(self.queue)
+
+    def popleft(self):
+        self.stats.pops += 1
+        return self.queue.popleft()
+
+    def __len__(self):
+        return len(self.queue)
+
+class CountingCells:
+    """A per-cell lookup proxy that counts reads as obstacle checks."""
+    def __init__(self, cells, stats):
+        self.cells = cells
+        self.stats = stats
+
+    def __getitem__(self, index):
+        self.stats.obstacle_checks += 1
+        return self.cells[index]
@@ -0,0 +1,88 @@
+import weakref
+
+import numpy as np
+
+# State spaces up to this size get flat buffers, kept per environment and reused
+# by later searches; larger ones fall back to dicts, so a search that only
+# touches a small corner of a huge map stays cheap.
+DENSE_STATE_LIMIT = 1 << 22
+
+# Dtypes of the dense tables, by array typecode.
+TABLE_DTYPES = {'b': np.int8, 'i': np.int32, 'q': np.int64, 'd': np.float64}
+
+# Parent entry of a state that has not been reached yet.
+UNVISITED = -1
+
+class SparseTable(dict):
+    """
+    A dict standing in for a preallocated buffer: missing keys read as a default
+    value without being inserted.
+    """
+    def __init__(self, default):
+        super().__init__()
+        self.default = default
+
+    def __missing__(self, key):
+        return self.default
+
+def state_tables(environment, num_states, *specs):
+    """
+    Gets per-state bookkeeping for one search, indexed by integer state id.
+
+    Dense tables come from a pool kept on the environment (see
+    Environment.derived_cache) instead of being allocated and filled for every
+    search. A set of buffers is lent as memoryviews and is free again once the
+    search has dropped them; before reuse, only the entries the previous search
+    wrote are reset. Those are found through the first table, which must be
+    written (with a value other than its default) for every state any of the
+    tables is written for, as parent links are.
+
+    Args:
+        environment (Environment): The environment searched.
+        num_states (int): The number of possible states.
+        *specs: (default, typecode) pairs, one per table: the value every state
+            starts with and the array typecode, e.g. 'd', 'i' or 'b'.
+
+    Returns:
+        list: One table per spec, each a memoryview or SparseTable supporting
+        table[state] reads and writes.
+    """
+    if num_states > DENSE_STATE_LIMIT:
+        return [SparseTable(default) for default, _ in specs]
+
+    pool = environment.derived_cache('state_tables').setdefault((num_states,) + specs, [])
+    for entry in pool:
+        arrays, lent = entry
+        if all(reference() is None for reference in lent):
+            touched = np.flatnonzero(arrays[0] != specs[0][0])
+            for table, (default, _) in zip(arrays, specs):
+                if touched.size > num_states // 8:
+                    table.fill(default)
+                else:
+                    table[touched] = default
+            break
+    else:
+        arrays = [np.full(num_states, default, dtype=TABLE_DTYPES[typecode]) for default, typecode in specs]
+        entry = [arrays, []]
+        pool.append(entry)
+    views = [memoryview(table) for table in arrays]
+    entry[1] = [weakref.ref(view) for view in views]
+    return views
+
+def reconstruct_path(environment, parent, state):
+    """
+    Follows parent links back from a state to the start of the search.
+
+    States are encoded as (time_step % period) * num_cells + cell index, and the
+    start state is its own parent.
+
+    Returns:
+        list: The path from start to the given state as a list of coordinates.
+    """
+    num_cells = environment.num_cells
+    path = [environment.position_of(state % num_cells)]
+    while parent[state] != state:
+        state = parent[state]
+        path.append(environment.position_of(state % num_cells))
+    path.reverse()
+    return path
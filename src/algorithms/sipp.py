@@ -0,0 +1,177 @@
+import heapq
+
+import numpy as np
+
+def safe_intervals(environment):
+    """
+    Precomputes the safe intervals of every cell a dynamic obstacle passes through.
+
+    The obstacle schedule repeats every environment.period steps, so intervals are
+    described on that circular timeline. For each swept cell the result holds two
+    lists indexed by time_step % period:
+
+        - the id of the safe interval containing that phase, or -1 if occupied
+        - how many consecutive safe steps remain from that phase, including it
+
+    Cells missing from the result are never occupied and form a single interval
+    with id 0. Results are cached on the environment (see
+    Environment.derived_cache) until its grids change.
+
+    Args:
+        environment (Environment): The environment to analyze.
+
+    Returns:
+        dict: Maps flat cell indices to (interval_ids, remaining_steps) lists.
+    """
+    cache = environment.derived_cache('safe_intervals')
+    intervals = cache.get('intervals')
+    if intervals is not None:
+        return intervals
+
+    period = environment.period
+    occupancy = environment.occupancy.reshape(period, -1)
+    intervals = {}
+    for index in np.flatnonzero(environment.swept_grid):
+        occupied = occupancy[:, index].tolist()
+        interval_ids = [-1] * period
+        remaining_steps = [0] * period
+        if not all(occupied):
+            # Walk the circle backward from an occupied phase so runs wrapping
+            # around the end of the period are counted as one interval.
+            first_occupied = occupied.index(True)
+            run = 0
+            interval_id = -1
+            for step in range(period, 0, -1):
+                phase = (first_occupied + step) % period
+                if occupied[phase]:
+                    run = 0
+                    continue
+                if run == 0:
+                    interval_id += 1
+                run += 1
+                interval_ids[phase] = interval_id
+                remaining_steps[phase] = run
+        intervals[int(index)] = (interval_ids, remaining_steps)
+
+    cache['intervals'] = intervals
+    return intervals
+
+def sipp(environment, start_pos, goal_pos, current_time_step=0):
+    """
+    Performs Safe Interval Path Planning to find the earliest-arriving path.
+
+    Instead of one state per (cell, time step), SIPP searches over (cell, safe
+    interval) states: a maximal stretch of time during which no dynamic obstacle
+    occupies the cell. Cells that no obstacle ever reaches have a single interval,
+    so the number of states stays close to the static grid size. Unlike the other
+    planners, the agent may wait in a cell to let an obstacle pass.
+
+    The search minimizes arrival time, not terrain cost, so on maps with ':' or
+    '*' cells the path can cost more than the other planners' paths.
+
+    Args:
+        environment (Environment): The environment to search in.
+        start_pos (tuple): The starting position (y, x).
+        goal_pos (tuple): The goal position (y, x).
+        current_time_step (int): The current time step of the agent.
+
+    Returns:
+        tuple: A tuple containing:
+            - list: The path from start to goal as a list of coordinates, one per
+              time step, so waiting shows up as a repeated position.
+            - int: The number of nodes expanded.
+            - float: The cost of the path. Waiting is free.
+    """
+    if not environment.connected(start_pos, goal_pos):
+        return None, 0, 0 # Walls separate start and goal; no need to search
+    passable = environment.passable_cells
+    costs = environment.cost_cells
+    neighbor_offsets = environment.neighbor_offsets
+    period = environment.period
+    stride = environment.stride
+    intervals = safe_intervals(environment)
+    infinity = float('inf')
+
+    start = environment.index_of(start_pos)
+    goal = environment.index_of(goal_pos)
+    goal_y, goal_x = divmod(goal, stride)
+
+    def heuristic(index):
+        y, x = divmod(index, stride)
+        return max(abs(y - goal_y), abs(x - goal_x))
+
+    # States are keyed on cell * period + interval id. The schedule is periodic, so
+    # reaching the same interval a whole period later can never be better: the
+    # earliest arrival in each interval dominates every later one.
+    start_interval = intervals[start][0][current_time_step % period] if start in intervals else 0
+    initial_state = start * period + max(start_interval, 0)
+    frontier = [(heuristic(start), current_time_step, start, initial_state)]  # (f, arrival time, cell, state)
+    arrival = {initial_state: current_time_step}
+    parent = {initial_state: None}
+
+    nodes_expanded = 0
+
+    while frontier:
+        _, time_at_current, current, current_state = heapq.heappop(frontier)
+        if time_at_current > arrival[current_state]:
+            continue # Stale entry
+        nodes_expanded += 1
+
+        if current == goal:
+            # Reconstruct path, repeating positions while the agent waits
+            path = []
+            cost = 0
+            state = current_state
+            time_at_state = time_at_current
+            while parent[state] is not None:
+                previous_state = parent[state]
+                time_at_previous = arrival[previous_state]
+                cell = state // period
+                path.append(environment.position_of(cell))
+                path.extend([environment.position_of(previous_state // period)] *
+                            (time_at_state - 1 - time_at_previous))
+                cost += costs[cell]
+                state = previous_state
+                time_at_state = time_at_previous
+            path.append(environment.position_of(start))
+            path.reverse()
+
+            return path, nodes_expanded, cost
+
+        # Last time step the agent can still stand in the current cell
+        if current in intervals:
+            remaining = intervals[current][1][time_at_current % period]
+            leave_by = time_at_current + max(remaining - 1, 0)
+        else:
+            leave_by = infinity
+
+        # 8-connected movement; the wall border makes bounds checks unnecessary
+        for offset in neighbor_offsets:
+            neighbor = current + offset
+            if not passable[neighbor]:
+                continue
+
+            if neighbor not in intervals:
+                candidates = [(time_at_current + 1, 0)]
+            else:
+                # Arrive at the start of every safe interval of the neighbor that opens
+                # before the agent has to leave; one period covers all of them.
+                interval_ids = intervals[neighbor][0]
+                candidates = []
+                last_arrival = min(leave_by + 1, time_at_current + period)
+                for time_at_neighbor in range(time_at_current + 1, last_arrival + 1):
+                    interval_id = interval_ids[time_at_neighbor % period]
+                    if interval_id >= 0 and (time_at_neighbor == time_at_current + 1 or
+                                             interval_ids[(time_at_neighbor - 1) % period] < 0):
+                        candidates.append((time_at_neighbor, interval_id))
+
+            for time_at_neighbor, interval_id in candidates:
+                neighbor_state = neighbor * period + interval_id
+                if time_at_neighbor < arrival.get(neighbor_state, infinity):
+                    arrival[neighbor_state] = time_at_neighbor
+                    parent[neighbor_state] = current_state
+                    f_cost = time_at_neighbor + heuristic(neighbor)
+                    heapq.heappush(frontier, (f_cost, time_at_neighbor, neighbor, neighbor_state))
+
+    # Goal not found
+    return None, nodes_expanded, 0
@@ -0,0 +1,263 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from algorithms.a_star import a_star
+from algorithms.heuristics import dijkstra_field
+from shared_environment import SharedEnvironment, attach_environment
+
+# Longest run of consecutive stops Or-opt tries to move elsewhere in the tour.
+OR_OPT_SEGMENT_LENGTH = 3
+
+def load_stops(stops_path):
+    """
+    Reads delivery points from a text file.
+
+    Each non-empty line holds one position as "y x" or "y,x"; text after a '#'
+    is ignored.
+
+    Args:
+        stops_path (str): The path to the stops file.
+
+    Returns:
+        list: The delivery positions as (y, x) tuples, in file order.
+    """
+    stops = []
+    with open(stops_path, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].replace(',', ' ').strip()
+            if not line:
+                continue
+            fields = line.split()
+            if len(fields) != 2:
+                raise ValueError(f"{stops_path}:{line_number}: expected 'y x', got {line!r}")
+            stops.append((int(fields[0]), int(fields[1])))
+    return stops
+
+def _cost_row(environment, source, targets):
+    """Computes the static travel costs from one point to all the others."""
+    field = dijkstra_field(environment, [source], targets=targets)
+    return [float(field[target]) for target in targets]
+
+_matrix_environment = None
+_matrix_blocks = None
+
+def _init_matrix_worker(descriptor):
+    """Attaches the shared environment once per worker process."""
+    global _matrix_environment, _matrix_blocks
+    _matrix_environment, _matrix_blocks = attach_environment(descriptor)
+
+def _cost_row_in_worker(source, targets):
+    return _cost_row(_matrix_environment, source, targets)
+
+def cost_matrix(environment, points, workers=None):
+    """
+    Computes the pairwise static travel costs between points.
+
+    Each row comes from one forward Dijkstra search from its point that stops as
+    soon as every other point is settled, instead of one search per pair.
+    Moving into a cell costs that cell's terrain cost, so the matrix is not
+    symmetric. Dynamic obstacles are ignored; they only delay the agent.
+
+    Args:
+        environment (Environment): The environment to search in.
+        points (list): The positions (y, x) to connect.
+        workers (int, optional): Compute the rows in a pool of this many processes,
+            which map the environment's grids from shared memory.
+
+    Returns:
+        list: matrix[i][j] is the cost of travelling from points[i] to points[j],
+        inf if unreachable.
+    """
+    indices = [environment.index_of(point) for point in points]
+    if workers and workers > 1 and len(points) > 2:
+        with SharedEnvironment(environment) as shared:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_matrix_worker,
+                                     initargs=(shared.descriptor,)) as executor:
+                rows = list(executor.map(_cost_row_in_worker, indices, [indices] * len(indices)))
+    else:
+        rows = [_cost_row(environment, source, indices) for source in indices]
+    for i, row in enumerate(rows):
+        row[i] = 0.0
+    return rows
+
+def tour_cost(order, matrix):
+    """Calculates the cost of visiting points in the given order."""
+    return sum(matrix[a][b] for a, b in zip(order, order[1:]))
+
+def nearest_neighbor_tour(matrix):
+    """
+    Builds a tour that starts at point 0 and always moves to the cheapest unvisited point.
+
+    Returns:
+        list: The visiting order as point indices.
+    """
+    order = [0]
+    unvisited = set(range(1, len(matrix)))
+    while unvisited:
+        row = matrix[order[-1]]
+        nearest = min(unvisited, key=lambda point: (row[point], point))
+        order.append(nearest)
+        unvisited.remove(nearest)
+    return order
+
+# Smallest cost reduction that counts as an improvement, so rounding errors in
+# the accumulated deltas cannot make the local searches cycle.
+IMPROVEMENT_TOLERANCE = 1e-9
+
+def _edge_prefix_sums(order, matrix):
+    """
+    Accumulates the tour's edge costs in both directions.
+
+    Returns:
+        tuple: (forward, backward, backward_infinite) lists of length len(order):
+        forward[k] is the cost of the first k edges, backward[k] the cost of
+        traversing them in reverse, skipping infinite ones, which
+        backward_infinite[k] counts instead.
+    """
+    forward = [0.0]
+    backward = [0.0]
+    backward_infinite = [0]
+    infinity = float('inf')
+    for a, b in zip(order, order[1:]):
+        forward.append(forward[-1] + matrix[a][b])
+        reverse_cost = matrix[b][a]
+        if reverse_cost == infinity:
+            backward.append(backward[-1])
+            backward_infinite.append(backward_infinite[-1] + 1)
+        else:
+            backward.append(backward[-1] + reverse_cost)
+            backward_infinite.append(backward_infinite[-1])
+    return forward, backward, backward_infinite
+
+def two_opt(order, matrix):
+    """
+    Improves a tour by reversing segments until no reversal makes it cheaper.
+
+    The first point stays in place. Costs are asymmetric, so reversing a
+    segment also changes the cost of its inner edges; each move is priced
+    from the two edges it replaces plus the segment's cost in both directions,
+    read from prefix sums that are rebuilt only after a move is made.
+
+    Returns:
+        list: The improved visiting order.
+    """
+    order = list(order)
+    n = len(order)
+    infinity = float('inf')
+    improved = True
+    while improved:
+        improved = False
+        forward, backward, backward_infinite = _edge_prefix_sums(order, matrix)
+        for i in range(1, n - 1):
+            before = matrix[order[i - 1]]
+            for j in range(i + 1, n):
+                if backward_infinite[j] != backward_infinite[i]:
+                    continue # The reversed segment has an impassable edge
+                # Edges order[i-1] -> order[i] and order[j] -> order[j+1] become
+                # order[i-1] -> order[j] and order[i] -> order[j+1].
+                delta = (before[order[j]] - before[order[i]] +
+                         (backward[j] - backward[i]) - (forward[j] - forward[i]))
+                if j + 1 < n:
+                    following = order[j + 1]
+                    delta += matrix[order[i]][following] - matrix[order[j]][following]
+                if delta < -IMPROVEMENT_TOLERANCE:
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    forward, backward, backward_infinite = _edge_prefix_sums(order, matrix)
+                    before = matrix[order[i - 1]]
+                    improved = True
+    return order
+
+def or_opt(order, matrix, max_segment_length=OR_OPT_SEGMENT_LENGTH):
+    """
+    Improves a tour by moving short runs of consecutive points to other positions.
+
+    The first point stays in place and moved runs keep their direction, so a
+    move only changes the three edges around the run's old and new places and
+    is priced from those. After a move the scan carries on from the next run.
+
+    Returns:
+        list: The improved visiting order.
+    """
+    order = list(order)
+    n = len(order)
+    improved = True
+    while improved:
+        improved = False
+        for length in range(1, max_segment_length + 1):
+            i = 1
+            while i + length <= n:
+                first, last = order[i], order[i + length - 1]
+                previous = order[i - 1]
+                following = order[i + length] if i + length < n else None
+                # Taking the run out joins previous to following.
+                if following is None:
+                    removal = -matrix[previous][first]
+                else:
+                    removal = (matrix[previous][following] - matrix[previous][first] -
+                               matrix[last][following])
+                best_delta = -IMPROVEMENT_TOLERANCE
+                best_position = None
+                # Insert between order[k] and order[k + 1], outside the run and its old place.
+                for k in list(range(i - 1)) + list(range(i + length, n)):
+                    p = order[k]
+                    if k + 1 < n:
+                        q = order[k + 1]
+                        delta = removal + matrix[p][first] + matrix[last][q] - matrix[p][q]
+                    else:
+                        delta = removal + matrix[p][first]
+                    if delta < best_delta:
+                        best_delta, best_position = delta, k
+                if best_position is not None:
+                    segment = order[i:i + length]
+                    if best_position < i:
+                        order[best_position + 1:i + length] = segment + order[best_position + 1:i]
+                    else:
+                        order[i:best_position + 1] = order[i + length:best_position + 1] + segment
+                    improved = True
+                i += 1
+    return order
+
+def plan_tour(environment, start_pos, stops, planner=a_star, current_time_step=0, matrix_workers=None,
+              **options):
+    """
+    Plans a route from the start through every delivery point.
+
+    The visiting order is chosen on the static cost matrix (nearest neighbor, then
+    2-opt and Or-opt until neither improves it), and the legs between consecutive
+    stops are then planned with the given planner, each starting at the time step
+    the agent arrives, so dynamic obstacles are respected along the whole route.
+
+    Args:
+        environment (Environment): The environment to search in.
+        start_pos (tuple): The starting position (y, x).
+        stops (list): The delivery positions (y, x), in any order.
+        planner (callable): A planner with the a_star call signature, used for each leg.
+        current_time_step (int): The time step the agent leaves the start.
+        matrix_workers (int, optional): Compute the cost matrix in a pool of this many processes.
+        **options: Extra keyword arguments passed to the planner for every leg.
+
+    Returns:
+        tuple: A tuple containing:
+            - list: The full route as a list of coordinates, or None if a stop is unreachable.
+            - int: The number of nodes expanded by the leg searches.
+            - float: The cost of the route.
+            - list: The stops in visiting order.
+    """
+    points = [start_pos] + list(stops)
+    matrix = cost_matrix(environment, points, matrix_workers)
+    order = nearest_neighbor_tour(matrix)
+    if tour_cost(order, matrix) == float('inf'):
+        return None, 0, 0, []
+    order = or_opt(two_opt(order, matrix), matrix)
+
+    path = [points[0]]
+    total_nodes_expanded = 0
+    total_cost = 0
+    for a, b in zip(order, order[1:]):
+        leg, nodes_expanded, cost = planner(environment, points[a], points[b],
+                                            current_time_step + len(path) - 1, **options)
+        total_nodes_expanded += nodes_expanded
+        if not leg:
+            return None, total_nodes_expanded, 0, [points[i] for i in order[1:]]
+        path.extend(leg[1:])
+        total_cost += cost
+    return path, total_nodes_expanded, total_cost, [points[i] for i in order[1:]]
@@ -1,6 +1,8 @@
-import heapq
+from algorithms.bidirectional import bidirectional_search, supports_bidirectional
+from algorithms.frontier import make_frontier
+from algorithms.search_tables import UNVISITED, reconstruct_path, state_tables
 
-def ucs(environment, start_pos, goal_pos, current_time_step=0):
+def ucs(environment, start_pos, goal_pos, current_time_step=0, bidirectional=True, stats=None):
     """
     Performs Uniform-Cost Search to find the cheapest path.
 
@@ -9,6 +11,10 @@ def ucs(environment, start_pos, goal_pos, current_time_step=0):
         start_pos (tuple): The starting position (y, x).
         goal_pos (tuple): The goal position (y, x).
         current_time_step (int): The current time step of the agent.
+        bidirectional (bool): Search from both ends at once when the map has no
+            dynamic obstacles. See algorithms.bidirectional.
+        stats (SearchStats, optional): Collects counters and phase timings.
+            See algorithms.search_stats.
 
     Returns:
         tuple: A tuple containing:
@@ -17,54 +23,73 @@ def ucs(environment, start_pos, goal_pos, current_time_step=0):
             - float: The cost of the path.
     """
 
-    # State in frontier, parent, cost_so_far will be (position, time_step)
-    initial_state = (start_pos, current_time_step)
-    frontier = [(0, initial_state)]  # (cost, (position, time_step))
-    parent = {initial_state: None}
-    cost_so_far = {initial_state: 0}
+    if not environment.connected(start_pos, goal_pos):
+        return None, 0, 0 # Walls separate start and goal; no need to search
+
+    if bidirectional and supports_bidirectional(environment, start_pos, goal_pos):
+        # Without dynamic obstacles time does not matter and both ends can be searched.
+        return bidirectional_search(environment, start_pos, goal_pos, stats=stats)
+    if stats is not None:
+        stats.begin('ucs')
+
+    passable = environment.passable_cells
+    occupied = environment.occupied_cells
+    costs = environment.cost_cells
+    neighbor_offsets = environment.neighbor_offsets
+    num_cells = environment.num_cells
+    period = environment.period
+    goal = environment.index_of(goal_pos)
+    num_states = period * num_cells
+
+    # States are integers: (time_step % period) * num_cells + cell index; obstacle
+    # motion is periodic, so folding time loses nothing and bounds the search.
+    initial_state = (current_time_step % period) * num_cells + environment.index_of(start_pos)
+    frontier = make_frontier(environment)  # Bucket queue on integer-cost maps, else a heap
+    if stats is not None:
+        frontier = stats.count_frontier(frontier)
+        passable = stats.count_checks(passable)
+    frontier.push(0, initial_state)
+    parent, cost_so_far = state_tables(environment, num_states, (UNVISITED, 'i'), (float('inf'), 'd'))
+    parent[initial_state] = initial_state
+    cost_so_far[initial_state] = 0
     
     nodes_expanded = 0
+    if stats is not None:
+        stats.phase('search')
 
     while frontier:
-        cost, current_state = heapq.heappop(frontier)
-        current_pos, time_at_current_pos = current_state
+        cost, current_state = frontier.pop()
+        if cost > cost_so_far[current_state]:
+            continue # Stale entry; the state was already reached more cheaply
+        phase_at_current, current = divmod(current_state, num_cells)
 
-        if current_pos == goal_pos:
-            # Reconstruct path
-            path = []
-            curr = current_state
-            while curr is not None:
-                path.append(curr[0]) # Append only position
-                curr = parent.get(curr)
-            path.reverse()
-            
+        if current == goal:
+            if stats is not None:
+                stats.phase('path')
+            path = reconstruct_path(environment, parent, current_state)
+            if stats is not None:
+                stats.end(nodes_expanded + 1)
             return path, nodes_expanded + 1, cost_so_far[current_state]
 
         nodes_expanded += 1
 
-        # 8-connected movement
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                if dy == 0 and dx == 0:
-                    continue
-
-                neighbor_pos = (current_pos[0] + dy, current_pos[1] + dx)
-                time_at_neighbor_pos = time_at_current_pos + 1
-                neighbor_state = (neighbor_pos, time_at_neighbor_pos)
+        # 8-connected movement; the wall border makes bounds checks unnecessary
+        neighbor_base = ((phase_at_current + 1) % period) * num_cells
+        for offset in neighbor_offsets:
+            neighbor = current + offset
+            neighbor_state = neighbor_base + neighbor
 
-                if (environment.is_valid_position(neighbor_pos) and
-                        not environment.is_obstacle(neighbor_pos, time_at_neighbor_pos)):
-                    
-                    # The cost of moving to a neighbor is the terrain cost of that neighbor's cell.
-                    # This assumes that diagonal and cardinal moves have the same cost, which is a simplification.
-                    move_cost = environment.get_cost(neighbor_pos)
-                    new_cost = cost_so_far[current_state] + move_cost
+            if passable[neighbor] and not occupied[neighbor_state]:
+                # The cost of moving to a neighbor is the terrain cost of that neighbor's cell.
+                # This assumes that diagonal and cardinal moves have the same cost, which is a simplification.
+                new_cost = cost_so_far[current_state] + costs[neighbor]
 
-                    if neighbor_state not in cost_so_far or new_cost < cost_so_far[neighbor_state]:
-                        cost_so_far[neighbor_state] = new_cost
-                        priority = new_cost
-                        heapq.heappush(frontier, (priority, neighbor_state))
-                        parent[neighbor_state] = current_state
+                if new_cost < cost_so_far[neighbor_state]:
+                    cost_so_far[neighbor_state] = new_cost
+                    frontier.push(new_cost, neighbor_state)
+                    parent[neighbor_state] = current_state
     
     # Goal not found
+    if stats is not None:
+        stats.end(nodes_expanded)
     return None, nodes_expanded, 0
@@ -1,23 +1,78 @@
 import argparse
+import json
+import sys
 from environment import Environment
-from agent import Agent
+from agent import ALGORITHM_NAMES, Agent
+from algorithms.heuristics import HEURISTICS
+from algorithms.landmarks import DEFAULT_NUM_LANDMARKS, Landmarks
+from algorithms.search_stats import SearchStats
+from algorithms.tour import load_stops
+from comparison import compare_algorithms, write_results
+from simulation import DiffRenderer, Simulation, load_events
 
 import time
 
+# Algorithms that accept a SearchStats, i.e. support --profile.
+PROFILED_ALGORITHMS = ['bfs', 'ucs', 'a_star', 'local_search']
+
 def main():
     """
     Main function to run the autonomous delivery agent simulation.
     """
     parser = argparse.ArgumentParser(description="Autonomous Delivery Agent")
     parser.add_argument("map_file", help="Path to the map file.")
-    parser.add_argument("--algorithm", choices=['bfs', 'ucs', 'a_star', 'local_search'], 
+    parser.add_argument("--algorithm", choices=ALGORITHM_NAMES,
                         default='a_star', help="Search algorithm to use.")
-    parser.add_argument("--dynamic", action='store_true', help="Demonstrate dynamic replanning.")
-    parser.add_argument("--compare", action='store_true', help="Compare all algorithms on a map.")
+    parser.add_argument("--heuristic", choices=list(HEURISTICS) + ['landmarks'], default='chebyshev',
+                        help="Heuristic used by A*, ARA* and JPS search. 'landmarks' loads the landmark file "
+                             "next to the map, building it first if needed.")
+    parser.add_argument("--build-landmarks", action='store_true',
+                        help="Rebuild the landmark file next to the map even if one exists.")
+    parser.add_argument("--num-landmarks", type=int, default=DEFAULT_NUM_LANDMARKS,
+                        help="Number of landmarks to select when building the landmark file.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Run local search restarts (or the tour cost matrix, or --compare trials) in a pool "
+                             "of this many processes.")
+    parser.add_argument("--dynamic", action='store_true',
+                        help="Simulate the agent following its path tick by tick, replanning when "
+                             "obstacle events block it.")
+    parser.add_argument("--events", default=None, metavar="EVENTS_FILE",
+                        help="Obstacle events for --dynamic, one 'tick y x' per line. By default the "
+                             "cell the agent is about to enter halfway along its path becomes a wall.")
+    parser.add_argument("--lookahead", type=int, default=None,
+                        help="With --dynamic, replan only once the agent is this many moves from stepping "
+                             "into a predicted conflict (0: just before it).")
+    parser.add_argument("--max-ticks", type=int, default=10000,
+                        help="With --dynamic, stop the simulation after this many ticks.")
+    parser.add_argument("--render", action='store_true',
+                        help="With --dynamic, draw every tick in the terminal, redrawing only changed cells.")
+    parser.add_argument("--deadline-ms", type=float, default=None,
+                        help="Time budget for each search in milliseconds (ara_star only), including "
+                             "--dynamic replans; the best path found in time is used.")
+    parser.add_argument("--compare", action='store_true',
+                        help="Compare all algorithms on a map, running repeated trials in a pool of "
+                             "--workers processes.")
+    parser.add_argument("--trials", type=int, default=5,
+                        help="With --compare, timed searches per algorithm; the median and 95th "
+                             "percentile are reported.")
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="With --compare, untimed searches each worker runs before its first trial "
+                             "of an algorithm.")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="With --compare, seconds a single search may take before it is stopped.")
+    parser.add_argument("--compare-output", default=None, metavar="FILE",
+                        help="With --compare, also write the results to FILE (.csv or .json).")
+    parser.add_argument("--tour", nargs='?', const='', default=None, metavar="STOPS_FILE",
+                        help="Plan a route through several delivery points: every 'G' on the map, "
+                             "or the 'y x' positions listed in STOPS_FILE.")
+    parser.add_argument("--profile", nargs='?', const='-', default=None, metavar="JSON_FILE",
+                        help="Collect search counters, phase timings and peak memory for the initial "
+                             "search (bfs, ucs, a_star and local_search) and write them as JSON to "
+                             "JSON_FILE, or to standard error.")
     
 import argparse
 from environment import Environment
-from agent import Agent
+from agent import ALGORITHM_NAMES, Agent
 
 import time
 
@@ -27,73 +82,120 @@ def main():
     """
     parser = argparse.ArgumentParser(description="Autonomous Delivery Agent")
     parser.add_argument("map_file", help="Path to the map file.")
-    parser.add_argument("--algorithm", choices=['bfs', 'ucs', 'a_star', 'local_search'], 
+    parser.add_argument("--algorithm", choices=ALGORITHM_NAMES,
                         default='a_star', help="Search algorithm to use.")
-    parser.add_argument("--dynamic", action='store_true', help="Demonstrate dynamic replanning.")
-    parser.add_argument("--compare", action='store_true', help="Compare all algorithms on a map.")
+    parser.add_argument("--heuristic", choices=list(HEURISTICS) + ['landmarks'], default='chebyshev',
+                        help="Heuristic used by A*, ARA* and JPS search. 'landmarks' loads the landmark file "
+                             "next to the map, building it first if needed.")
+    parser.add_argument("--build-landmarks", action='store_true',
+                        help="Rebuild the landmark file next to the map even if one exists.")
+    parser.add_argument("--num-landmarks", type=int, default=DEFAULT_NUM_LANDMARKS,
+                        help="Number of landmarks to select when building the landmark file.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Run local search restarts (or the tour cost matrix, or --compare trials) in a pool "
+                             "of this many processes.")
+    parser.add_argument("--dynamic", action='store_true',
+                        help="Simulate the agent following its path tick by tick, replanning when "
+                             "obstacle events block it.")
+    parser.add_argument("--events", default=None, metavar="EVENTS_FILE",
+                        help="Obstacle events for --dynamic, one 'tick y x' per line. By default the "
+                             "cell the agent is about to enter halfway along its path becomes a wall.")
+    parser.add_argument("--lookahead", type=int, default=None,
+                        help="With --dynamic, replan only once the agent is this many moves from stepping "
+                             "into a predicted conflict (0: just before it).")
+    parser.add_argument("--max-ticks", type=int, default=10000,
+                        help="With --dynamic, stop the simulation after this many ticks.")
+    parser.add_argument("--render", action='store_true',
+                        help="With --dynamic, draw every tick in the terminal, redrawing only changed cells.")
+    parser.add_argument("--deadline-ms", type=float, default=None,
+                        help="Time budget for each search in milliseconds (ara_star only), including "
+                             "--dynamic replans; the best path found in time is used.")
+    parser.add_argument("--compare", action='store_true',
+                        help="Compare all algorithms on a map, running repeated trials in a pool of "
+                             "--workers processes.")
+    parser.add_argument("--trials", type=int, default=5,
+                        help="With --compare, timed searches per algorithm; the median and 95th "
+                             "percentile are reported.")
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="With --compare, untimed searches each worker runs before its first trial "
+                             "of an algorithm.")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="With --compare, seconds a single search may take before it is stopped.")
+    parser.add_argument("--compare-output", default=None, metavar="FILE",
+                        help="With --compare, also write the results to FILE (.csv or .json).")
+    parser.add_argument("--tour", nargs='?', const='', default=None, metavar="STOPS_FILE",
+                        help="Plan a route through several delivery points: every 'G' on the map, "
+                             "or the 'y x' positions listed in STOPS_FILE.")
+    parser.add_argument("--profile", nargs='?', const='-', default=None, metavar="JSON_FILE",
+                        help="Collect search counters, phase timings and peak memory for the initial "
+                             "search (bfs, ucs, a_star and local_search) and write them as JSON to "
+                             "JSON_FILE, or to standard error.")
     
     args = parser.parse_args()
 
     args = parser.parse_args()
+    if args.deadline_ms is not None and args.algorithm != 'ara_star':
+        parser.error("--deadline-ms requires --algorithm ara_star")
+    if args.lookahead is not None and args.lookahead < 0:
+        parser.error("--lookahead must be at least 0")
+    if args.profile is not None:
+        if args.algorithm not in PROFILED_ALGORITHMS:
+            parser.error(f"--profile requires --algorithm {', '.join(PROFILED_ALGORITHMS)}")
+        if args.compare or args.tour is not None:
+            parser.error("--profile cannot be combined with --compare or --tour")
+    if args.compare:
+        if args.trials < 1 or args.warmup < 0 or args.timeout <= 0:
+            parser.error("--compare needs --trials >= 1, --warmup >= 0 and --timeout > 0")
+        if args.compare_output and not args.compare_output.lower().endswith(('.csv', '.json')):
+            parser.error("--compare-output must name a .csv or .json file")
 
     if args.compare:
         print(f"Comparing algorithms on map: {args.map_file}")
-        algorithms_to_compare = ['bfs', 'a_star', 'local_search']
-        results = []
-
-        for algo_name in algorithms_to_compare:
-            print(f"\n--- Running {algo_name.upper()} ---")
-            try:
-                env = Environment(args.map_file)
-                agent = Agent(env)
-                agent.set_algorithm(algo_name)
-                
-                print(f"Start position: {env.start_pos}")
-                print(f"Goal position: {env.goal_pos}")
-                
-                start_time = time.perf_counter()
-                path, nodes_expanded, cost = agent.find_path()
-                end_time = time.perf_counter()
-                
-                time_taken = (end_time - start_time) * 1000 # in ms
-
-                if path:
-                    results.append({
-                        "Algorithm": algo_name.upper(),
-                        "Path Found": "Yes",
-                        "Cost": f"{cost:.2f}",
-                        "Nodes Expanded": nodes_expanded,
-                        "Time (ms)": f"{time_taken:.4f}"
-                    })
-                else:
-                    results.append({
-                        "Algorithm": algo_name.upper(),
-                        "Path Found": "No",
-                        "Cost": "-",
-                        "Nodes Expanded": nodes_expanded,
-                        "Time (ms)": f"{time_taken:.4f}"
-                    })
-
-            except Exception as e:
-                print(f"An error occurred while running {algo_name.upper()}: {e}")
+        env = Environment(args.map_file)
+        print(f"Start position: {env.start_pos}")
+        print(f"Goal position: {env.goal_pos}")
+        print(f"Running {args.trials} trials per algorithm ({args.warmup} warmup) "
+              f"with a {args.timeout:g}s timeout...")
+
+        def report_progress(label, traced, result):
+            if result['status'] not in ('ok', 'skipped'):
+                run = "memory run" if traced else "trial"
+                print(f"  {label} {run}: {result['status']}" + (f" ({result['error']})" if 'error' in result else ''))
+
+        rows = compare_algorithms(env, trials=args.trials, warmup=args.warmup, workers=args.workers,
+                                  timeout=args.timeout, progress=report_progress)
 
         # Print summary table
         print("\n--- Comparison Results ---")
-        if results:
-            headers = results[0].keys()
-            # Determine column widths
-            widths = {h: max(len(str(h)), max(len(str(r[h])) for r in results)) for h in headers}
-            # Print header
-            header_line = " | ".join(h.ljust(widths[h]) for h in headers)
-            print(header_line)
-            print("-" * len(header_line))
-            # Print rows
-            for r in results:
-                row_line = " | ".join(str(r[h]).ljust(widths[h]) for h in headers)
-                print(row_line)
+        results = [{
+            "Algorithm": row['algorithm'].upper(),
+            "Status": row['status'] if row['status'] != 'ok' else "OK",
+            "Path Found": "-" if row['path_found'] is None else ("Yes" if row['path_found'] else "No"),
+            "Cost": "-" if row['cost'] is None else f"{row['cost']:.2f}",
+            "Nodes Expanded": "-" if row['nodes_expanded'] is None else f"{row['nodes_expanded']:g}",
+            "Median (ms)": "-" if row['median_ms'] is None else f"{row['median_ms']:.3f}",
+            "P95 (ms)": "-" if row['p95_ms'] is None else f"{row['p95_ms']:.3f}",
+            "Peak Memory (KiB)": "-" if row['peak_memory_kib'] is None else f"{row['peak_memory_kib']:.0f}",
+            "Runs": f"{row['completed']}/{row['trials']}",
+        } for row in rows]
+        headers = results[0].keys()
+        # Determine column widths
+        widths = {h: max(len(str(h)), max(len(str(r[h])) for r in results)) for h in headers}
+        # Print header
+        header_line = " | ".join(h.ljust(widths[h]) for h in headers)
+        print(header_line)
+        print("-" * len(header_line))
+        # Print rows
+        for r in results:
+            row_line = " | ".join(str(r[h]).ljust(widths[h]) for h in headers)
+            print(row_line)
+
+        if args.compare_output:
+            write_results(rows, args.compare_output)
+            print(f"\nResults written to {args.compare_output}")
 
     else:
-        # The existing logic for running a single algorithm or dynamic demo
+        # Run a single algorithm, optionally followed by a simulation
         print(f"Loading map from: {args.map_file}")
         try:
             env = Environment(args.map_file)
@@ -105,16 +207,58 @@ def main():
         print(f"Goal position: {env.goal_pos}")
 
         agent = Agent(env)
+        landmarks = None
+        if args.heuristic == 'landmarks' or args.build_landmarks:
+            landmarks = Landmarks.load_or_build(env, args.map_file, args.num_landmarks,
+                                                rebuild=args.build_landmarks)
+            print(f"Using {len(landmarks.indices)} landmarks")
+
+        options = {}
+        if args.algorithm in ('a_star', 'ara_star', 'jps'):
+            if args.heuristic == 'landmarks':
+                options['heuristic'] = landmarks.heuristic
+            else:
+                options['heuristic'] = HEURISTICS[args.heuristic]
+        elif args.algorithm == 'local_search':
+            options['workers'] = args.workers
         try:
-            agent.set_algorithm(args.algorithm)
+            agent.set_algorithm(args.algorithm, **options)
         except ValueError as e:
             print(e)
             return
 
+        if args.tour is not None:
+            stops = load_stops(args.tour) if args.tour else env.goal_positions
+            print(f"Planning a tour through {len(stops)} delivery points with {args.algorithm.upper()}...")
+            path, nodes_expanded, cost, order = agent.find_tour(stops, workers=args.workers)
+            if not path:
+                print("\nSome delivery point cannot be reached.")
+                env.render()
+                return
+            print("\nTour found!")
+            print(f"  - Visiting Order: {order}")
+            print(f"  - Nodes Expanded: {nodes_expanded}")
+            print(f"  - Tour Cost ({args.algorithm.upper()}): {cost}")
+            env.render(path=path)
+            return
+
         print(f"Running with {args.algorithm.upper()} algorithm...")
         
         current_time_step = 0
-        path, nodes_expanded, cost = agent.find_path(current_time_step=current_time_step)
+        stats = SearchStats() if args.profile is not None else None
+        start_time = time.perf_counter()
+        path, nodes_expanded, cost = agent.find_path(current_time_step=current_time_step,
+                                                     deadline_ms=args.deadline_ms, stats=stats)
+        if stats is not None:
+            write_profile(args.profile, {
+                'map': args.map_file,
+                'algorithm': args.algorithm,
+                'path_found': bool(path),
+                'cost': float(cost) if path else None,
+                'nodes_expanded': nodes_expanded,
+                'wall_seconds': time.perf_counter() - start_time,
+                'stats': stats.to_dict(),
+            })
 
         if not path:
             print("\nNo initial path found.")
@@ -129,47 +273,53 @@ def main():
 
         if args.dynamic:
             print("\n--- Dynamic Obstacle Simulation ---")
-            
-            # Simulate agent moving along the path
-            simulated_path = []
-            for i, pos in enumerate(path):
-                simulated_path.append(pos)
-                current_time_step += 1
-                
-                # Introduce dynamic obstacle at a specific point on the path
-                if i == len(path) // 2:
-                    obstacle_pos = path[i+1] # Obstacle appears one step ahead
-                    obstacle_pos = (int(obstacle_pos[0]), int(obstacle_pos[1]))
-                    print(f"\nA dynamic obstacle appears at {obstacle_pos} at time step {current_time_step}!")
-                    # env.add_obstacle(obstacle_pos) # No longer needed as is_obstacle handles dynamic
-                    
-                    print("\nGrid with new obstacle:")
-                    env.render(path=simulated_path, time_step=current_time_step) # Show current progress and new obstacle
-
-                    print(f"\nAgent is at {pos}, replanning from time step {current_time_step}...")
-                    
-                    # Replan from the current position and time step
-                    env.start_pos = pos # Agent's current position
-                    new_path, new_nodes_expanded, new_cost = agent.find_path(current_time_step=current_time_step)
-
-                    if not new_path:
-                        print("\nCould not find a new path.")
-                        env.render(time_step=current_time_step)
-                        return
-
-                    print("\nNew path found!")
-                    print(f"  - Nodes Expanded: {new_nodes_expanded}")
-                    print(f"  - Path Cost ({args.algorithm.upper()}): {new_cost}")
-                    
-                    # Combine the paths for rendering
-                    final_path = simulated_path + new_path[1:] # Exclude current pos from new_path
-
-                    print("\nFinal Grid with New Path:")
-                    env.render(path=final_path, time_step=current_time_step)
-                    return # End simulation after replanning demo
-
-            print("\nAgent reached goal without dynamic obstacles.")
-            env.render(path=path, time_step=current_time_step)
+            if args.events:
+                events = load_events(args.events)
+            else:
+                # Block the cell the agent is about to enter halfway along its path (unless it is the goal).
+                midpoint = len(path) // 2
+                events = [(midpoint, tuple(map(int, path[midpoint + 1])))] if midpoint + 2 < len(path) else []
+            for tick, position in events:
+                print(f"Obstacle event: {tuple(position)} becomes a wall at tick {tick}")
+
+            renderer = DiffRenderer(env) if args.render else None
+            simulation = Simulation(env, agent, events, lookahead=args.lookahead, renderer=renderer,
+                                    deadline_ms=args.deadline_ms)
+            simulated = simulation.add_agent(env.start_pos, env.goal_pos, path)
+            summary = simulation.run(args.max_ticks)
+
+            if simulated.arrived:
+                print(f"\nAgent reached the goal at tick {summary['ticks']}.")
+            else:
+                print(f"\nAgent did not reach the goal within {summary['ticks']} ticks.")
+            print(f"  - Searches: {summary['plans'] + summary['failed_plans']} "
+                  f"({summary['failed_plans']} found no path)")
+            print(f"  - Conflict Checks: {summary['conflict_checks']}")
+            print(f"  - Nodes Expanded: {summary['nodes_expanded']}")
+            print(f"  - Travelled Cost: {summary['cost']}")
+            print(f"  - Collisions: {summary['collisions']}")
+            print(f"  - Ticks per Second: {summary['ticks_per_second']:.0f}")
+            if renderer is None:
+                print("\nFinal Grid with Travelled Path:")
+                env.render(path=simulated.trail, time_step=simulation.tick)
+
+
+def write_profile(destination, profile):
+    """
+    Writes a --profile report as JSON.
+
+    Args:
+        destination (str): The file to write, or '-' for standard error, which
+            keeps the JSON apart from the human-readable output on standard output.
+        profile (dict): The report.
+    """
+    if destination == '-':
+        json.dump(profile, sys.stderr, indent=2)
+        print(file=sys.stderr)
+        return
+    with open(destination, 'w') as f:
+        json.dump(profile, f, indent=2)
+    print(f"Profile written to {destination}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,274 @@
+"""
+Repeated, timed comparison of the planning algorithms on one map.
+
+The map is loaded once and published in shared memory; a pool of worker
+processes attaches to it and runs the trials. Each trial plans from the map's
+start to its goal with a freshly configured planner, so incremental and
+hierarchical planners pay for building their state, as on a first find_path
+call. A worker runs untimed warmup searches the first time it sees a planner,
+and every trial has a timeout: a worker that runs out of time is killed and
+replaced, and the planner's remaining trials are skipped. Peak memory comes
+from one extra run traced with tracemalloc, which is not timed.
+"""
+import csv
+import json
+import math
+import multiprocessing
+import os
+import statistics
+import time
+import tracemalloc
+from collections import deque
+from multiprocessing.connection import wait
+
+from agent import ALGORITHM_NAMES, Agent
+from shared_environment import SharedEnvironment, attach_environment
+
+# (label, algorithm, options): every registered algorithm, plus UCS and A*
+# forward-only, since on maps without dynamic obstacles they search
+# bidirectionally by default.
+COMPARED_ALGORITHMS = []
+for name in ALGORITHM_NAMES:
+    COMPARED_ALGORITHMS.append((name, name, {}))
+    if name in ('ucs', 'a_star'):
+        COMPARED_ALGORITHMS.append((f"{name}_forward", name, {'bidirectional': False}))
+
+# Columns of the comparison table and of CSV output.
+RESULT_FIELDS = ['algorithm', 'status', 'path_found', 'cost', 'nodes_expanded', 'median_ms', 'p95_ms',
+                 'min_ms', 'peak_memory_kib', 'trials', 'completed']
+
+def _trial_worker(connection, descriptor):
+    """Runs trials sent over the pipe until it receives None."""
+    environment, blocks = attach_environment(descriptor) # blocks keeps the shared grids mapped
+    agent = Agent(environment, cache_size=0)
+    while True:
+        job = connection.recv()
+        if job is None:
+            break
+        try:
+            result = _run_trial(agent, *job)
+        except Exception as e:
+            result = {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+        connection.send(result)
+
+def _run_trial(agent, algorithm_name, options, warmup, trace_memory):
+    """
+    Runs warmup searches and then one measured search.
+
+    Returns:
+        dict: The measured search's time, nodes expanded, cost and whether it
+        found a path, plus its peak memory if trace_memory is set.
+    """
+    environment = agent.environment
+    for run in range(warmup + 1):
+        agent.set_algorithm(algorithm_name, **options) # Plan from scratch every time
+        measured = run == warmup
+        if measured and trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        path, nodes_expanded, cost = agent.algorithm(environment, environment.start_pos, environment.goal_pos,
+                                                     0, **agent.options)[:3]
+        seconds = time.perf_counter() - started
+    result = {'status': 'ok', 'seconds': seconds, 'path_found': bool(path), 'nodes_expanded': nodes_expanded,
+              'cost': float(cost) if path else None}
+    if trace_memory:
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+class TrialPool:
+    """
+    Worker processes attached to a shared environment, each running one trial at a time.
+
+    Like service.WorkerPool, a trial that is already running can be stopped:
+    its worker is killed and a fresh one takes its place.
+    """
+    def __init__(self, descriptor, size):
+        """
+        Args:
+            descriptor (dict): SharedEnvironment.descriptor of the map.
+            size (int): The number of worker processes.
+        """
+        self.descriptor = descriptor
+        self.idle = [self.spawn() for _ in range(size)]
+        self.running = {} # connection -> (worker, job, deadline)
+        self.restarts = 0
+
+    def spawn(self):
+        """Starts a worker. Returns (process, connection, labels it has warmed up)."""
+        connection, worker_connection = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_trial_worker, args=(worker_connection, self.descriptor),
+                                          daemon=True)
+        process.start()
+        worker_connection.close()
+        return process, connection, set()
+
+    def replace(self, worker):
+        """Kills a worker and returns a fresh one."""
+        process, connection, _ = worker
+        process.kill()
+        process.join()
+        connection.close()
+        self.restarts += 1
+        return self.spawn()
+
+    def close(self):
+        """Stops the workers, killing any that are still running a trial."""
+        for process, connection, _ in self.idle:
+            connection.send(None)
+            process.join()
+            connection.close()
+        for process, connection, _ in (worker for worker, _, _ in self.running.values()):
+            process.kill()
+            process.join()
+            connection.close()
+        self.idle = []
+        self.running = {}
+
+    def run(self, jobs, warmup, timeout):
+        """
+        Runs (label, algorithm, options, trace_memory) jobs, yielding results as they complete.
+
+        A worker runs warmup untimed searches before its first job for a label;
+        the job may take timeout seconds per search. Once a label times out,
+        its jobs that have not started yet are skipped.
+
+        Yields:
+            tuple: (label, trace_memory, result), where result has a 'status' of
+            'ok', 'error', 'timeout' or 'skipped'.
+        """
+        pending = deque(jobs)
+        timed_out = set()
+        running = self.running
+        while pending or running:
+            while pending and self.idle:
+                label, algorithm_name, options, trace_memory = job = pending.popleft()
+                if label in timed_out:
+                    yield label, trace_memory, {'status': 'skipped'}
+                    continue
+                worker = self.idle.pop()
+                warmup_runs = 0 if label in worker[2] else warmup
+                worker[2].add(label)
+                worker[1].send((algorithm_name, options, warmup_runs, trace_memory))
+                running[worker[1]] = (worker, job, time.monotonic() + timeout * (warmup_runs + 1))
+            if not running:
+                continue
+
+            remaining = min(deadline for _, _, deadline in running.values()) - time.monotonic()
+            for connection in wait(list(running), timeout=max(remaining, 0)):
+                worker, job, _ = running.pop(connection)
+                try:
+                    result = connection.recv()
+                except EOFError:
+                    result = {'status': 'error', 'error': f"worker exited with code {worker[0].exitcode}"}
+                    worker = self.replace(worker)
+                self.idle.append(worker)
+                yield job[0], job[3], result
+
+            now = time.monotonic()
+            for connection, (worker, job, deadline) in list(running.items()):
+                if deadline <= now:
+                    del running[connection]
+                    self.idle.append(self.replace(worker))
+                    timed_out.add(job[0])
+                    yield job[0], job[3], {'status': 'timeout'}
+
+def percentile(values, fraction):
+    """The nearest-rank percentile of a non-empty list of values."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+def summarize(label, trials, memory_result, trial_count):
+    """
+    Reduces one algorithm's trials to a row of RESULT_FIELDS.
+
+    Args:
+        label (str): The algorithm's label.
+        trials (list): The results of its timed trials.
+        memory_result (dict): The result of its traced run, or None.
+        trial_count (int): The number of trials requested.
+
+    Returns:
+        dict: The summary row. Time, nodes and cost are medians over the
+        completed trials; status is 'ok' only if every trial completed.
+    """
+    completed = [trial for trial in trials if trial['status'] == 'ok']
+    failures = [trial for trial in trials if trial['status'] != 'ok']
+    row = dict.fromkeys(RESULT_FIELDS)
+    row.update(algorithm=label, trials=trial_count, completed=len(completed),
+               status=failures[0]['status'] if failures else 'ok')
+    if failures and failures[0]['status'] == 'error':
+        row['error'] = failures[0]['error']
+    if completed:
+        times = [1000 * trial['seconds'] for trial in completed]
+        row.update(median_ms=statistics.median(times), p95_ms=percentile(times, 0.95), min_ms=min(times),
+                   path_found=all(trial['path_found'] for trial in completed),
+                   nodes_expanded=statistics.median(trial['nodes_expanded'] for trial in completed))
+        costs = [trial['cost'] for trial in completed if trial['cost'] is not None]
+        if costs:
+            row['cost'] = statistics.median(costs)
+    if memory_result is not None and memory_result['status'] == 'ok':
+        row['peak_memory_kib'] = memory_result['peak_memory'] / 1024
+    return row
+
+def compare_algorithms(environment, algorithms=None, trials=5, warmup=1, workers=None, timeout=60.0,
+                       trace_memory=True, progress=None):
+    """
+    Runs every algorithm trials times on the environment's start and goal.
+
+    Args:
+        environment (Environment): The map, loaded once and shared with the workers.
+        algorithms (list, optional): (label, algorithm, options) tuples; all of
+            COMPARED_ALGORITHMS by default.
+        trials (int): Timed searches per algorithm.
+        warmup (int): Untimed searches a worker runs before its first trial of an algorithm.
+        workers (int, optional): The number of worker processes; one per CPU by default.
+        timeout (float): Seconds a single search may take.
+        trace_memory (bool): Measure peak memory with an extra, untimed run.
+        progress (callable, optional): Called with (label, trace_memory, result)
+            as each run completes.
+
+    Returns:
+        list: One summary row per algorithm (see summarize), in the order given.
+    """
+    algorithms = COMPARED_ALGORITHMS if algorithms is None else algorithms
+    workers = workers or os.cpu_count() or 1
+    # Trials are interleaved across algorithms so that slow ones do not hold up the pool at the end.
+    jobs = [(label, name, options, False) for _ in range(trials) for label, name, options in algorithms]
+    if trace_memory:
+        jobs += [(label, name, options, True) for label, name, options in algorithms]
+
+    results = {label: [] for label, _, _ in algorithms}
+    memory_results = {}
+    with SharedEnvironment(environment) as shared:
+        pool = TrialPool(shared.descriptor, min(workers, len(jobs)))
+        try:
+            for label, traced, result in pool.run(jobs, warmup, timeout):
+                if progress is not None:
+                    progress(label, traced, result)
+                if traced:
+                    memory_results[label] = result
+                else:
+                    results[label].append(result)
+        finally:
+            pool.close()
+    return [summarize(label, results[label], memory_results.get(label), trials) for label, _, _ in algorithms]
+
+def write_results(rows, output_path):
+    """
+    Writes comparison rows to a .csv or .json file, chosen by the extension.
+
+    Raises:
+        ValueError: If the extension is neither.
+    """
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension == '.json':
+        with open(output_path, 'w') as f:
+            json.dump(rows, f, indent=2)
+    elif extension == '.csv':
+        with open(output_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        raise ValueError(f"Unsupported output format {extension!r}; use .csv or .json")
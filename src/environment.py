@@ -1,5 +1,73 @@
+import hashlib
+from collections import OrderedDict, deque
+
 import numpy as np
 
+from map_format import is_binary_map, read_binary_map
+
+# Dynamic obstacles oscillate right for half of this many steps, then back left.
+MOVE_CYCLE_LENGTH = 10
+
+def label_components(passable_grid):
+    """
+    Labels the 8-connected components of the passable cells of a padded grid.
+
+    Each row is first split into runs of passable cells, which are connected
+    without any search. The runs are then merged along vertical and diagonal
+    adjacencies by repeatedly hooking the larger of two different labels onto
+    the smaller one and compressing the label chains, until every adjacency
+    joins equal labels. All steps are whole-array operations.
+
+    Args:
+        passable_grid (numpy.ndarray): The padded passability grid.
+
+    Returns:
+        numpy.ndarray: An int32 array of the grid's shape holding a component
+        label for every passable cell and -1 for the others.
+    """
+    height, width = passable_grid.shape
+    passable = passable_grid.reshape(-1).astype(bool)
+    if not passable.any():
+        return np.full(passable_grid.shape, -1, np.int32)
+
+    # The wall border keeps runs from wrapping from one row to the next.
+    run_starts = passable.copy()
+    run_starts[1:] &= ~passable[:-1]
+    run_ids = np.cumsum(run_starts, dtype=np.int32) - 1
+
+    first_runs = []
+    second_runs = []
+    for offset in [width - 1, width, width + 1]:
+        cells = np.flatnonzero(passable[:-offset] & passable[offset:])
+        first = run_ids[cells]
+        second = run_ids[cells + offset]
+        # Neighboring cells along a pair of runs repeat the same adjacency.
+        distinct = np.ones(cells.size, dtype=bool)
+        distinct[1:] = (first[1:] != first[:-1]) | (second[1:] != second[:-1])
+        first_runs.append(first[distinct])
+        second_runs.append(second[distinct])
+    first = np.concatenate(first_runs)
+    second = np.concatenate(second_runs)
+
+    labels = np.arange(max(int(run_ids[-1]) + 1, 0), dtype=np.int32)
+    while True:
+        first_labels = labels[first]
+        second_labels = labels[second]
+        different = first_labels != second_labels
+        if not different.any():
+            break
+        first_labels = first_labels[different]
+        second_labels = second_labels[different]
+        labels[np.maximum(first_labels, second_labels)] = np.minimum(first_labels, second_labels)
+        while True:
+            compressed = labels[labels]
+            if np.array_equal(compressed, labels):
+                break
+            labels = compressed
+
+    components = np.where(passable, labels[run_ids], -1).astype(np.int32)
+    return components.reshape(height, width)
+
 class Environment:
     """
     Represents the 2D grid environment for the autonomous delivery agent.
@@ -12,20 +80,44 @@ class Environment:
             map_path (str): The path to the map file.
         """
         self.grid = None
+        self.cell_codes = None
+        self.cell_chars = None
         self.start_pos = None
         self.goal_pos = None
+        self.goal_positions = []
         self.terrain_costs = {'.': 1, ':': 2, '*': 3, 'S': 1, 'G': 1, '#': float('inf'), 'D': float('inf')}
         self.dynamic_obstacles_initial_positions = []
+        self.period = 1
+        self.occupancy = None
+        self.cost_grid = None
+        self.passable_grid = None
+        self.fingerprint = None
+        self.version = 0
+        self.changed_cells = []
+        self.derived = {}
         self.load_map(map_path)
 
     def load_map(self, map_path):
         """
-        Loads the map from a text file and initializes the environment.
+        Loads the map from a text or binary map file and initializes the environment.
+
+        Text maps are read as bytes and converted in one step; lines shorter than
+        the longest one are padded with walls.
         """
-        with open(map_path, 'r') as f:
-            lines = [line.strip() for line in f.readlines()]
+        if is_binary_map(map_path):
+            self.load_binary_map(map_path)
+            return
+
+        with open(map_path, 'rb') as f:
+            lines = [line.strip() for line in f.read().splitlines()]
+        while lines and not lines[-1]:
+            lines.pop()
 
-        self.grid = np.array([list(line) for line in lines])
+        width = max((len(line) for line in lines), default=0)
+        cells = b''.join(line.ljust(width, b'#') for line in lines)
+        # Widening the bytes to 4-byte code points lets them be viewed as one-character strings.
+        codes = np.frombuffer(cells, dtype=np.uint8).astype(np.uint32)
+        self.grid = codes.view('<U1').reshape(len(lines), width)
         
         # Find start and goal positions
         start_pos_arr = np.where(self.grid == 'S')
@@ -37,12 +129,232 @@ class Environment:
         if goal_pos_arr[0].size > 0:
             self.goal_pos = (goal_pos_arr[0][0], goal_pos_arr[1][0])
 
+        # Every 'G' is a delivery point; goal_pos is the first one
+        self.goal_positions = [(int(y), int(x)) for y, x in zip(*goal_pos_arr)]
+
         # Find dynamic obstacles
         dynamic_obstacle_arr = np.where(self.grid == 'D')
         for i in range(dynamic_obstacle_arr[0].size):
             pos = (dynamic_obstacle_arr[0][i], dynamic_obstacle_arr[1][i])
             self.dynamic_obstacles_initial_positions.append({'position': pos, 'direction': (0, 1)}) # Initial direction: right
 
+        self.compile_grids()
+        self.compile_occupancy()
+        self.compile_components()
+        self.create_views()
+
+    def load_binary_map(self, map_path):
+        """
+        Loads a binary map (see map_format) without parsing it.
+
+        The precomputed grids are memory-mapped copy-on-write, so only the pages
+        a search touches are read, processes loading the same file share them,
+        and add_obstacle never writes to the file. The character grid is decoded
+        from the cell codes only when it is first needed.
+        """
+        header, arrays = read_binary_map(map_path)
+
+        def position(pos):
+            return None if pos is None else tuple(pos)
+
+        self.start_pos = position(header['start_pos'])
+        self.goal_pos = position(header['goal_pos'])
+        self.goal_positions = [tuple(pos) for pos in header['goal_positions']]
+        self.dynamic_obstacles_initial_positions = [
+            {'position': tuple(obstacle['position']), 'direction': tuple(obstacle['direction'])}
+            for obstacle in header['dynamic_obstacles']]
+        self.cell_chars = header['cell_chars']
+        self.integer_costs = header['integer_costs']
+        self.fingerprint = header['fingerprint']
+        self.period = header['period']
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        if 'components' not in arrays:
+            self.compile_components() # Written before components were stored
+
+        self.set_dimensions(header['height'], header['width'])
+        self.create_views()
+
+    def char_grid(self):
+        """
+        Gets the map as an array of one-character strings.
+
+        Returns:
+            numpy.ndarray: The character grid, decoded from the cell codes on first
+            use for binary maps.
+        """
+        if self.grid is None and self.cell_codes is not None:
+            self.grid = np.array(list(self.cell_chars))[self.cell_codes]
+        return self.grid
+
+    def set_dimensions(self, height, width):
+        """Sets the grid size and the padded-grid addressing derived from it."""
+        self.height = height
+        self.width = width
+        self.stride = width + 2
+        self.num_cells = (height + 2) * self.stride
+
+        # Flat index offsets of the 8-connected neighbors, in (dy, dx) row-major order.
+        self.neighbor_offsets = [dy * self.stride + dx
+                                 for dy in [-1, 0, 1] for dx in [-1, 0, 1]
+                                 if not (dy == 0 and dx == 0)]
+
+    def compile_grids(self):
+        """
+        Builds the array-backed cost and passability grids used by the planners.
+
+        Both grids are padded with a one-cell wall border, so a neighbor of any
+        in-bounds cell is always a valid index and the search loops never need
+        bounds checks. Cells are addressed by flat indices into the padded grid
+        (see index_of and position_of).
+        """
+        height, width = self.grid.shape
+        self.set_dimensions(height, width)
+
+        self.cost_grid = np.full((height + 2, width + 2), np.inf, dtype=np.float32)
+        inner_costs = self.cost_grid[1:-1, 1:-1]
+        for char, cost in self.terrain_costs.items():
+            inner_costs[self.grid == char] = cost
+        self.passable_grid = np.isfinite(self.cost_grid).astype(np.uint8)
+        finite_costs = self.cost_grid[self.passable_grid.astype(bool)]
+        self.integer_costs = bool(np.all(finite_costs == np.round(finite_costs)))
+
+        # Identifies the loaded map; later changes bump self.version and are logged in self.changed_cells.
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(self.cost_grid.shape).encode())
+        digest.update(self.cost_grid.tobytes())
+        self.fingerprint = digest.hexdigest()
+
+    def compile_occupancy(self):
+        """
+        Precomputes where every dynamic obstacle is at each step of its motion cycle.
+
+        The result is a boolean array indexed by (time_step % period, y, x) over the
+        padded grid, so checking a cell against all dynamic obstacles is a single
+        lookup.
+        """
+        self.period = MOVE_CYCLE_LENGTH if self.dynamic_obstacles_initial_positions else 1
+        self.occupancy = np.zeros((self.period, self.height + 2, self.width + 2), dtype=bool)
+
+        for obs_data in self.dynamic_obstacles_initial_positions:
+            initial_pos = obs_data['position']
+            for time_step in range(self.period):
+                current_obs_pos = self.dynamic_obstacle_position(initial_pos, time_step)
+                if self.is_valid_position(current_obs_pos):
+                    self.occupancy[time_step][current_obs_pos[0] + 1, current_obs_pos[1] + 1] = True
+
+        # Cells a dynamic obstacle passes through at some point of its cycle.
+        self.swept_grid = self.occupancy.any(axis=0)
+
+    def compile_components(self):
+        """
+        Labels the connected components of the static passable cells.
+
+        Two cells with different labels can never reach each other, whatever the
+        dynamic obstacles do, so planners check connected() before searching.
+        add_obstacle keeps the labels up to date.
+        """
+        self.components = label_components(self.passable_grid)
+
+    def create_views(self):
+        """
+        Creates the flat views the planners read the grids through.
+
+        The views share memory with the grids, so changes to the grids show up in
+        them, and indexing them yields plain Python numbers. occupied_cells is
+        indexed by (time_step % period) * num_cells + cell index.
+        """
+        self.cost_cells = memoryview(self.cost_grid.reshape(-1))
+        self.passable_cells = memoryview(self.passable_grid.reshape(-1))
+        self.occupied_cells = memoryview(self.occupancy.reshape(-1))
+        self.swept_cells = memoryview(self.swept_grid.reshape(-1))
+        self.component_cells = memoryview(self.components.reshape(-1))
+
+    def __getstate__(self):
+        """
+        Supports pickling, e.g. to hand the environment to worker processes.
+        Memoryviews cannot be pickled, so they are recreated on unpickling.
+        """
+        state = self.__dict__.copy()
+        for name in ['cost_cells', 'passable_cells', 'occupied_cells', 'swept_cells', 'component_cells', 'derived']:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.derived = {}
+        self.create_views()
+
+    def derived_cache(self, name):
+        """
+        Gets a named cache for data the planners compute from this environment's
+        grids, or scratch buffers they reuse across searches on it.
+
+        The caches belong to this instance and are emptied by add_obstacle, so
+        nothing computed for one map state is ever used with another, even by
+        environments loaded from the same file. They are not pickled.
+
+        Args:
+            name (str): The cache's name, e.g. 'distance_fields'.
+
+        Returns:
+            OrderedDict: The cache; callers choose its keys and bound its size.
+        """
+        cache = self.derived.get(name)
+        if cache is None:
+            cache = self.derived[name] = OrderedDict()
+        return cache
+
+    def first_conflict(self, path, start_time=0):
+        """
+        Finds the first step of a path that runs into an obstacle.
+
+        The whole path is checked at once against the static grid and the dynamic
+        obstacle schedule, assuming path[i] is reached at start_time + i.
+
+        Args:
+            path (list): The path as a list of (y, x) coordinates.
+            start_time (int): The time step at which the agent is at path[0].
+
+        Returns:
+            int: The index into path of the first blocked step, or None if the path is clear.
+        """
+        if len(path) < 2:
+            return None
+        positions = np.asarray(path[1:], dtype=np.int64) + 1
+        indices = positions[:, 0] * self.stride + positions[:, 1]
+        times = np.arange(start_time + 1, start_time + len(path)) % self.period
+        blocked = (self.passable_grid.reshape(-1)[indices] == 0) | \
+            self.occupancy.reshape(-1)[times * self.num_cells + indices]
+        conflicts = np.flatnonzero(blocked)
+        return int(conflicts[0]) + 1 if conflicts.size else None
+
+    def index_of(self, position):
+        """
+        Converts a (y, x) position into a flat index into the padded grids.
+        """
+        return (int(position[0]) + 1) * self.stride + int(position[1]) + 1
+
+    def position_of(self, index):
+        """
+        Converts a flat index into the padded grids back into a (y, x) position.
+        """
+        y, x = divmod(index, self.stride)
+        return (y - 1, x - 1)
+
+    def dynamic_obstacle_position(self, initial_pos, time_step):
+        """
+        Gets the position of a dynamic obstacle at a given time step.
+
+        Obstacles follow a simple oscillating movement: right for half of the
+        cycle, then back left.
+        """
+        current_cycle_step = time_step % MOVE_CYCLE_LENGTH
+        if current_cycle_step < MOVE_CYCLE_LENGTH / 2: # Moving right
+            return (initial_pos[0], initial_pos[1] + current_cycle_step)
+        else: # Moving left
+            return (initial_pos[0], initial_pos[1] + (MOVE_CYCLE_LENGTH - current_cycle_step))
+
     def get_cost(self, position):
         """
         Gets the movement cost for a given cell.
@@ -50,50 +362,135 @@ class Environment:
         if not self.is_valid_position(position):
             return float('inf')
         
-        char = self.grid[position[0]][position[1]]
-        return self.terrain_costs.get(char, float('inf'))
+        return self.cost_cells[self.index_of(position)]
 
     def is_valid_position(self, position):
         """
         Checks if a position is within the grid boundaries.
         """
         y, x = position
-        return 0 <= y < self.grid.shape[0] and 0 <= x < self.grid.shape[1]
+        return 0 <= y < self.height and 0 <= x < self.width
 
     def is_obstacle(self, position, time_step=0):
         """
         Checks if a position is an obstacle at a given time step.
         """
-        y, x = position
-        if self.grid[y][x] == '#': # Static obstacle
+        index = self.index_of(position)
+        if not self.passable_cells[index]: # Static obstacle
             return True
         
         # Check for dynamic obstacles
-        for obs_data in self.dynamic_obstacles_initial_positions:
-            initial_pos = obs_data['position']
-            direction = obs_data['direction']
-            
-            # Simple oscillating movement (for now)
-            # Move right for 5 steps, then left for 5 steps, etc.
-            move_cycle_length = 10
-            current_cycle_step = time_step % move_cycle_length
-            
-            current_obs_pos = initial_pos
-            if current_cycle_step < move_cycle_length / 2: # Moving right
-                current_obs_pos = (initial_pos[0], initial_pos[1] + current_cycle_step)
-            else: # Moving left
-                current_obs_pos = (initial_pos[0], initial_pos[1] + (move_cycle_length - current_cycle_step))
-            
-            if position == current_obs_pos:
-                return True
-        
-        return False
+        return self.occupied_cells[(time_step % self.period) * self.num_cells + index]
+
+    def connected(self, start_pos, goal_pos):
+        """
+        Checks in constant time whether a path between two cells can exist.
+
+        A start cell that is itself blocked (e.g. the agent's cell just became a
+        wall) is connected to the components of its passable neighbors.
+
+        Returns:
+            bool: False if either cell is outside the grid, or if the goal is
+            blocked or in another static component.
+        """
+        if not (self.is_valid_position(start_pos) and self.is_valid_position(goal_pos)):
+            return False
+        components = self.component_cells
+        goal_component = components[self.index_of(goal_pos)]
+        if goal_component < 0:
+            return False
+        start = self.index_of(start_pos)
+        if components[start] >= 0:
+            return components[start] == goal_component
+        return any(components[start + offset] == goal_component for offset in self.neighbor_offsets)
 
     def add_obstacle(self, position):
         """
         Adds a dynamic obstacle to the grid.
         """
-        self.grid[position[0]][position[1]] = '#'
+        grid = self.char_grid()
+        if grid is not None:
+            grid[position[0]][position[1]] = '#'
+        self.cost_grid[position[0] + 1, position[1] + 1] = np.inf
+        self.passable_grid[position[0] + 1, position[1] + 1] = 0
+        self.changed_cells.append(self.index_of(position))
+        self.version += 1
+        self.derived.clear() # Computed from the old grids
+        self.split_component(self.index_of(position))
+
+    def split_component(self, index):
+        """
+        Updates the component labels after the cell at index became a wall.
+
+        The cell's passable neighbors are grouped by adjacency around it; if they
+        form one group the component cannot have split. Otherwise a breadth-first
+        search grows from every group in turn, one cell at a time: groups that
+        meet are merged, and a group that runs out of cells first is a separate
+        component and gets a new label. The work is bounded by the size of the
+        smaller parts, not of the whole component.
+        """
+        components = self.component_cells
+        passable = self.passable_cells
+        neighbor_offsets = self.neighbor_offsets
+        if components[index] < 0:
+            return
+        components[index] = -1
+
+        # Group the passable neighbors that touch each other around the cell.
+        neighbors = [index + offset for offset in neighbor_offsets if passable[index + offset]]
+        adjacent = set(neighbor_offsets)
+        groups = []
+        for cell in neighbors:
+            touching = [group for group in groups if any(cell - other in adjacent for other in group)]
+            groups = [group for group in groups if group not in touching] + [{cell}.union(*touching)]
+        if len(groups) <= 1:
+            return
+
+        # owner maps reached cells to the search that reached them; merged searches
+        # point at the search they were merged into.
+        owner = {}
+        merged_into = {}
+        frontiers = {}
+        reached = {}
+        for search, cells in enumerate(groups):
+            for cell in cells:
+                owner[cell] = search
+            frontiers[search] = deque(cells)
+            reached[search] = list(cells)
+
+        def find(search):
+            while search in merged_into:
+                search = merged_into[search]
+            return search
+
+        while len(frontiers) > 1:
+            for search in list(frontiers):
+                if search not in frontiers:
+                    continue # Merged earlier in this round
+                frontier = frontiers[search]
+                if not frontier:
+                    # Nothing left to explore: this part is cut off from the rest.
+                    label = int(self.components.max()) + 1
+                    for cell in reached.pop(search):
+                        components[cell] = label
+                    del frontiers[search]
+                    continue
+                cell = frontier.popleft()
+                for offset in neighbor_offsets:
+                    neighbor = cell + offset
+                    if not passable[neighbor]:
+                        continue
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = search
+                        frontier.append(neighbor)
+                        reached[search].append(neighbor)
+                        continue
+                    other = find(other)
+                    if other != search:
+                        merged_into[other] = search
+                        frontier.extend(frontiers.pop(other))
+                        reached[search].extend(reached.pop(other))
 
     def render(self, path=None, visited=None, time_step=0):
         """
@@ -104,29 +501,13 @@ class Environment:
             visited (set, optional): The visited nodes to draw. Defaults to None.
             time_step (int): The current time step for rendering dynamic obstacles.
         """
-        render_grid = np.copy(self.grid)
+        render_grid = np.copy(self.char_grid())
 
         # Replace characters for rendering
         render_grid[render_grid == '*'] = '.' # Treat difficult terrain as a pathway for rendering
 
         # Render dynamic obstacles at current time_step
-        for obs_data in self.dynamic_obstacles_initial_positions:
-            initial_pos = obs_data['position']
-            direction = obs_data['direction']
-            
-            # Simple oscillating movement (for now)
-            move_cycle_length = 10
-            current_cycle_step = time_step % move_cycle_length
-            
-            current_obs_pos = initial_pos
-            if current_cycle_step < move_cycle_length / 2: # Moving right
-                current_obs_pos = (initial_pos[0], initial_pos[1] + current_cycle_step)
-            else: # Moving left
-                current_obs_pos = (initial_pos[0], initial_pos[1] + (move_cycle_length - current_cycle_step))
-            
-            if self.is_valid_position(current_obs_pos):
-                render_grid[current_obs_pos] = 'D'
-
+        render_grid[self.occupancy[time_step % self.period, 1:-1, 1:-1]] = 'D'
 
         if visited:
             for pos in visited:
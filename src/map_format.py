@@ -0,0 +1,137 @@
+"""
+Binary map format.
+
+A binary map holds everything Environment needs ready to use, so loading it
+involves no parsing and no per-cell work:
+
+    - an 8-byte magic string and a 4-byte little-endian header length
+    - a JSON header with the map's size, start, goals, dynamic obstacles,
+      fingerprint and the location of each array
+    - page-aligned arrays: the uint8 cell codes (indexes into the header's
+      cell_chars), the padded cost, passability and dynamic obstacle grids
+      exactly as Environment.compile_grids and compile_occupancy build them,
+      and the connected component labels
+
+The arrays are opened with np.memmap, so pages are read on first use and
+processes loading the same file share them through the page cache.
+
+Convert a text map with:
+
+    python src/map_format.py maps/large.txt maps/large.map
+"""
+import argparse
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'ADAMAP01'
+
+# Arrays start on page boundaries so they can be mapped and shared page by page.
+ALIGNMENT = 4096
+
+# Environment attributes stored as arrays, in file order.
+MAP_ARRAYS = ['cell_codes', 'cost_grid', 'passable_grid', 'occupancy', 'swept_grid', 'components']
+
+def is_binary_map(map_path):
+    """Checks whether a file is a binary map by its magic string."""
+    with open(map_path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def save_binary_map(environment, map_path):
+    """
+    Writes an environment loaded from a text map as a binary map.
+
+    Args:
+        environment (Environment): The environment to save.
+        map_path (str): The path of the binary map to write.
+    """
+    cell_chars, codes = np.unique(environment.char_grid(), return_inverse=True)
+    if len(cell_chars) > 256:
+        raise ValueError("Binary maps support at most 256 distinct cell characters")
+    arrays = {
+        'cell_codes': codes.reshape(environment.grid.shape).astype(np.uint8),
+        'cost_grid': environment.cost_grid,
+        'passable_grid': environment.passable_grid,
+        'occupancy': environment.occupancy,
+        'swept_grid': environment.swept_grid,
+        'components': environment.components,
+    }
+
+    def position(pos):
+        return None if pos is None else [int(pos[0]), int(pos[1])]
+
+    header = {
+        'height': environment.height,
+        'width': environment.width,
+        'cell_chars': ''.join(cell_chars),
+        'start_pos': position(environment.start_pos),
+        'goal_pos': position(environment.goal_pos),
+        'goal_positions': [position(pos) for pos in environment.goal_positions],
+        'dynamic_obstacles': [{'position': position(obstacle['position']),
+                               'direction': list(obstacle['direction'])}
+                              for obstacle in environment.dynamic_obstacles_initial_positions],
+        'period': environment.period,
+        'integer_costs': environment.integer_costs,
+        'fingerprint': environment.fingerprint,
+        'arrays': {},
+    }
+
+    # Array offsets depend on the header's length, so measure the header with
+    # placeholder offsets at least as long as the real ones first.
+    def layout(first_offset):
+        offset = first_offset
+        for name in MAP_ARRAYS:
+            array = arrays[name]
+            header['arrays'][name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        return offset
+
+    layout(10 ** 15)
+    header_end = len(MAGIC) + 4 + len(json.dumps(header).encode())
+    end = layout(-(-header_end // ALIGNMENT) * ALIGNMENT)
+    header_bytes = json.dumps(header).encode()
+
+    with open(map_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for name in MAP_ARRAYS:
+            f.seek(header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(arrays[name]).tobytes())
+        f.truncate(end)
+
+def read_binary_map(map_path):
+    """
+    Opens a binary map.
+
+    Args:
+        map_path (str): The path of the binary map.
+
+    Returns:
+        tuple: The header dict and a dict of the arrays, memory-mapped copy-on-write
+        so the environment can change them without touching the file.
+    """
+    with open(map_path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{map_path} is not a binary map")
+        header_length, = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_length))
+
+    arrays = {}
+    for name, layout in header['arrays'].items():
+        arrays[name] = np.memmap(map_path, dtype=np.dtype(layout['dtype']), mode='c',
+                                 offset=layout['offset'], shape=tuple(layout['shape']))
+    return header, arrays
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a text map to the binary map format.")
+    parser.add_argument("text_map", help="Path to the text map.")
+    parser.add_argument("binary_map", help="Path of the binary map to write.")
+    args = parser.parse_args()
+
+    from environment import Environment
+    save_binary_map(Environment(args.text_map), args.binary_map)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+
+# Number of results Agent keeps by default.
+DEFAULT_CACHE_SIZE = 1024
+
+class PathCache:
+    """
+    LRU cache of planner results.
+
+    Entries are keyed on (start, goal, algorithm, time_step % period) and belong
+    to one state of one environment: its fingerprint and version. Every
+    mutation of the grid bumps the version, so the first lookup after a change
+    drops all entries at once instead of leaving them to age out. Hits report no
+    expanded nodes, like algorithms.local_search.SubpathCache.
+
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that found nothing.
+        evictions (int): Entries dropped to stay within max_size.
+        invalidations (int): Entries dropped because the map changed.
+    """
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            max_size (int): The number of results to keep; 0 disables the cache.
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.environment = None
+        self.map_state = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, environment, start_pos, goal_pos, algorithm_name, time_step):
+        """Builds the key of a query; obstacle motion repeats every period steps."""
+        return (int(start_pos[0]), int(start_pos[1]), int(goal_pos[0]), int(goal_pos[1]),
+                algorithm_name, time_step % environment.period)
+
+    def get(self, environment, key):
+        """
+        Looks up a result for the environment's current state.
+
+        Returns:
+            tuple: A copy of the cached (path, 0, cost), or None on a miss.
+        """
+        self.validate(environment)
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        path, cost = result
+        # Callers own the path they get back, so the cached one stays intact.
+        return (None if path is None else list(path)), 0, cost
+
+    def put(self, environment, key, path, cost):
+        """Stores a result, evicting the least recently used one if the cache is full."""
+        if self.max_size <= 0:
+            return
+        self.validate(environment)
+        self.entries[key] = (None if path is None else tuple(path), cost)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def validate(self, environment):
+        """Drops every entry if the environment is not the map state they were computed on."""
+        map_state = (environment.fingerprint, environment.version)
+        if environment is not self.environment or map_state != self.map_state:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.environment = environment
+            self.map_state = map_state
+
+    def clear(self):
+        """Drops every entry, e.g. when the planner configuration changes."""
+        self.entries.clear()
+
+    def counters(self):
+        """Returns the hit, miss, eviction and invalidation counts and the current size."""
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'invalidations': self.invalidations, 'size': len(self.entries)}
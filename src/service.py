@@ -0,0 +1,459 @@
+"""
+Long-running planning service.
+
+Speaks JSON lines on standard input/output, or on a Unix socket with
+--socket. Each request is one JSON object with an "op" and an optional "id",
+which is copied into the response:
+
+    {"id": 1, "op": "load", "map": "maps/large.txt"}
+    {"id": 2, "op": "plan", "map": "maps/large.txt", "algorithm": "a_star",
+     "start": [1, 1], "goal": [8, 27], "time_step": 0, "timeout_ms": 200,
+     "options": {"heuristic": "distance_field"}}
+    {"id": 3, "op": "cancel", "target": 2}
+    {"id": 4, "op": "status"}
+
+Responses are {"id": ..., "ok": true, ...} or {"id": ..., "ok": false,
+"error": ...}, written as soon as each request finishes, so they may arrive
+out of order. A plan request without start or goal uses the map's own.
+
+Maps stay loaded: the first request for a map loads it and publishes its grids
+in shared memory (see shared_environment), and worker processes attach to
+them once and keep an Agent per algorithm, so later requests start warm.
+Identical plan requests in flight at the same time share one search. A search
+whose every requester has timed out or been cancelled is stopped by killing
+its worker, which is replaced.
+
+Usage:
+    python src/service.py [--socket PATH] [--workers N] [--timeout-ms MS] [--preload MAP ...]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+from agent import Agent
+from algorithms.heuristics import HEURISTICS
+from environment import Environment
+from shared_environment import SharedEnvironment, attach_environment
+
+# Algorithms plan requests may name. Their "heuristic" option takes a name from
+# algorithms.heuristics.HEURISTICS; landmark files are not managed by the service.
+SERVICE_ALGORITHMS = ['bfs', 'ucs', 'a_star', 'ara_star', 'jps', 'local_search', 'd_star_lite', 'sipp', 'hpa_star']
+
+class PlanningError(Exception):
+    """A request that cannot be served; the message is sent back to the client."""
+
+class WorkerPool:
+    """
+    Worker processes that each run one search at a time.
+
+    Unlike a ProcessPoolExecutor, a search that is already running can be
+    cancelled: its worker is killed and a fresh one takes its place.
+    """
+    def __init__(self, size):
+        """
+        Args:
+            size (int): The number of worker processes.
+        """
+        # Workers are forked from a clean server process with the planners already
+        # imported, so replacing one is quick and never forks the event loop's threads.
+        self.context = multiprocessing.get_context('forkserver')
+        self.context.set_forkserver_preload(['agent'])
+        self.idle = asyncio.Queue()
+        self.workers = []
+        self.restarts = 0
+        for _ in range(size):
+            self.idle.put_nowait(self.spawn())
+
+    def spawn(self):
+        """Starts a worker process and returns it with its end of the pipe."""
+        connection, worker_connection = self.context.Pipe()
+        process = self.context.Process(target=_worker_main, args=(worker_connection,), daemon=True)
+        process.start()
+        worker_connection.close()
+        worker = (process, connection)
+        self.workers.append(worker)
+        return worker
+
+    def kill(self, worker):
+        """Stops a worker immediately."""
+        process, connection = worker
+        process.kill()
+        process.join()
+        connection.close()
+        self.workers.remove(worker)
+
+    async def run(self, job):
+        """
+        Runs a job in the next idle worker.
+
+        Returns:
+            The job's result.
+
+        Raises:
+            PlanningError: If the job failed in the worker.
+        """
+        worker = await self.idle.get()
+        try:
+            worker[1].send(job)
+            status, result = await self.receive(worker[1])
+        except BaseException:
+            # Cancelled mid-search (or the worker died): its state is unknown, so replace it.
+            self.kill(worker)
+            worker = self.spawn()
+            self.restarts += 1
+            raise
+        finally:
+            self.idle.put_nowait(worker)
+        if status == 'error':
+            raise PlanningError(result)
+        return result
+
+    async def receive(self, connection):
+        """Waits for a message on a worker's pipe without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+
+        def readable():
+            if not ready.done():
+                ready.set_result(None)
+
+        loop.add_reader(connection.fileno(), readable)
+        try:
+            await ready
+        finally:
+            loop.remove_reader(connection.fileno())
+        return connection.recv()
+
+    def close(self):
+        """Stops every worker."""
+        for process, connection in list(self.workers):
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+        for worker in list(self.workers):
+            worker[0].join(timeout=1)
+            if worker[0].is_alive():
+                self.kill(worker)
+            else:
+                worker[1].close()
+                self.workers.remove(worker)
+
+# Per worker process: attached environments by map key, and agents by configuration.
+_worker_environments = {}
+_worker_agents = {}
+
+def _worker_main(connection):
+    """Serves jobs from the parent until it sends None or goes away."""
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        try:
+            connection.send(('ok', _plan_in_worker(*job)))
+        except Exception as e:
+            connection.send(('error', f"{type(e).__name__}: {e}"))
+
+def _plan_in_worker(map_key, descriptor, algorithm_name, options, start_pos, goal_pos, time_step):
+    """Plans one query with a warm agent, attaching to the map's shared grids on first use."""
+    if map_key not in _worker_environments:
+        _worker_environments[map_key] = attach_environment(descriptor)
+    environment, _ = _worker_environments[map_key]
+
+    agent_key = (map_key, algorithm_name, json.dumps(options, sort_keys=True))
+    agent = _worker_agents.get(agent_key)
+    if agent is None:
+        options = dict(options)
+        if 'heuristic' in options:
+            options['heuristic'] = HEURISTICS[options['heuristic']]
+        agent = Agent(environment)
+        agent.set_algorithm(algorithm_name, **options)
+        _worker_agents[agent_key] = agent
+
+    # The attached environment is private to this worker, so the query can be set on it.
+    environment.start_pos = start_pos
+    environment.goal_pos = goal_pos
+    path, nodes_expanded, cost = agent.find_path(current_time_step=time_step)
+    return ([[int(y), int(x)] for y, x in path] if path else None), int(nodes_expanded), float(cost)
+
+class PlanningService:
+    """
+    Serves JSON-line requests against resident environments.
+
+    Attributes:
+        counters (dict): Requests served, plans coalesced into another's search,
+            timeouts and cancellations.
+    """
+    def __init__(self, workers=None, timeout_ms=None):
+        """
+        Args:
+            workers (int, optional): The number of worker processes; one per CPU by default.
+            timeout_ms (float, optional): The timeout of plan requests that set none.
+        """
+        self.pool = WorkerPool(workers or os.cpu_count() or 1)
+        self.timeout_ms = timeout_ms
+        self.environments = {}
+        self.loading = {}
+        self.in_flight = {}
+        self.counters = {'requests': 0, 'coalesced': 0, 'timeouts': 0, 'cancelled': 0}
+
+    async def load(self, map_path):
+        """
+        Loads a map once and publishes it for the workers.
+
+        Returns:
+            tuple: The map key, the environment and its SharedEnvironment.
+        """
+        map_key = os.path.realpath(map_path)
+        if map_key in self.environments:
+            return (map_key,) + self.environments[map_key]
+        loading = self.loading.get(map_key)
+        if loading is None:
+            # Maps load in a thread so other requests keep being served, and concurrent
+            # first requests for a map wait for the same load.
+            loading = self.loading[map_key] = asyncio.ensure_future(asyncio.to_thread(_load_map, map_key))
+            loading.add_done_callback(lambda _: self._loaded(map_key, loading))
+        environment, shared = await asyncio.shield(loading)
+        return map_key, environment, shared
+
+    def _loaded(self, map_key, loading):
+        """Keeps a loaded map resident, even if every request waiting for it is gone."""
+        del self.loading[map_key]
+        if not loading.cancelled() and loading.exception() is None:
+            self.environments[map_key] = loading.result()
+
+    async def plan(self, request):
+        """Plans one query, sharing the search with identical queries in flight."""
+        map_key, environment, shared = await self.load(_required(request, 'map'))
+        algorithm_name = request.get('algorithm', 'a_star')
+        if algorithm_name not in SERVICE_ALGORITHMS:
+            raise PlanningError(f"Unknown algorithm: {algorithm_name}")
+        options = request.get('options', {})
+        if not isinstance(options, dict):
+            raise PlanningError("options must be a JSON object")
+        if 'workers' in options:
+            # Searches already run in pool workers, which cannot start processes of their own.
+            raise PlanningError("The workers option is not supported; searches run in the service's pool")
+        if options.get('heuristic', 'chebyshev') not in HEURISTICS:
+            raise PlanningError(f"Unknown heuristic: {options['heuristic']}")
+        start_pos = _position(request.get('start'), environment.start_pos, environment)
+        goal_pos = _position(request.get('goal'), environment.goal_pos, environment)
+        time_step = int(request.get('time_step', 0))
+        timeout_ms = request.get('timeout_ms', self.timeout_ms)
+
+        key = (map_key, algorithm_name, json.dumps(options, sort_keys=True), start_pos, goal_pos,
+               time_step % environment.period)
+        flight = self.in_flight.get(key)
+        if flight is None:
+            job = (map_key, shared.descriptor, algorithm_name, options, start_pos, goal_pos, time_step)
+            flight = self.in_flight[key] = {'search': asyncio.ensure_future(self.pool.run(job)), 'waiters': 0}
+            flight['search'].add_done_callback(lambda _, flight=flight: self._forget(key, flight))
+        else:
+            self.counters['coalesced'] += 1
+        search = flight['search']
+
+        flight['waiters'] += 1
+        started = time.perf_counter()
+        try:
+            timeout = None if timeout_ms is None else timeout_ms / 1000
+            path, nodes_expanded, cost = await asyncio.wait_for(asyncio.shield(search), timeout)
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            raise PlanningError(f"Timed out after {timeout_ms} ms")
+        finally:
+            flight['waiters'] -= 1
+            if flight['waiters'] == 0 and not search.done():
+                # Nobody wants the result any more. A query arriving while the
+                # search winds down must start a new one, not share this one.
+                search.cancel()
+                self._forget(key, flight)
+        return {'path': path, 'nodes_expanded': nodes_expanded, 'cost': cost if path else None,
+                'elapsed_ms': (time.perf_counter() - started) * 1000}
+
+    def _forget(self, key, flight):
+        """Stops sharing a search with new queries, unless a newer one has taken its key."""
+        if self.in_flight.get(key) is flight:
+            del self.in_flight[key]
+
+    def status(self):
+        """Reports the loaded maps, the work in flight and the counters."""
+        return {'maps': sorted(self.environments), 'in_flight': len(self.in_flight),
+                'workers': len(self.pool.workers), 'worker_restarts': self.pool.restarts,
+                'counters': dict(self.counters)}
+
+    async def handle(self, request, requests):
+        """
+        Serves one request.
+
+        Args:
+            request (dict): The request.
+            requests (dict): The client's unfinished requests by id, for cancel.
+
+        Returns:
+            dict: The response, without the id.
+        """
+        op = request.get('op', 'plan')
+        if op == 'plan':
+            return await self.plan(request)
+        if op == 'load':
+            map_key, environment, _ = await self.load(_required(request, 'map'))
+            return {'map': map_key, 'height': environment.height, 'width': environment.width,
+                    'period': environment.period}
+        if op == 'cancel':
+            target = requests.get(request.get('target'))
+            if target is not None:
+                target.cancel()
+            return {'cancelled': target is not None}
+        if op == 'status':
+            return self.status()
+        raise PlanningError(f"Unknown op: {op}")
+
+    async def respond(self, request, send, requests):
+        """Serves a request and sends its response, whatever happens to it."""
+        request_id = request.get('id')
+        self.counters['requests'] += 1
+        try:
+            response = dict(await self.handle(request, requests), ok=True)
+        except asyncio.CancelledError:
+            self.counters['cancelled'] += 1
+            response = {'ok': False, 'error': 'cancelled'}
+        except PlanningError as e:
+            response = {'ok': False, 'error': str(e)}
+        except Exception as e:
+            response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        finally:
+            if request_id is not None and requests.get(request_id) is asyncio.current_task():
+                del requests[request_id]
+        await send(dict(response, id=request_id))
+
+    async def serve(self, reader, send):
+        """Serves the JSON lines of one client until it closes its side."""
+        tasks = set()
+        requests = {}
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("a request must be a JSON object")
+            except ValueError as e:
+                await send({'id': None, 'ok': False, 'error': f"Invalid request: {e}"})
+                continue
+            task = asyncio.ensure_future(self.respond(request, send, requests))
+            if request.get('id') is not None:
+                requests[request['id']] = task
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    def close(self):
+        """Stops the workers and releases the shared grids."""
+        self.pool.close()
+        for _, shared in self.environments.values():
+            shared.close()
+        self.environments = {}
+
+def _load_map(map_key):
+    if not os.path.exists(map_key):
+        raise PlanningError(f"Map file not found: {map_key}")
+    environment = Environment(map_key)
+    return environment, SharedEnvironment(environment)
+
+def _required(request, field):
+    if field not in request:
+        raise PlanningError(f"Missing field: {field}")
+    return request[field]
+
+def _position(value, default, environment):
+    """Validates a [y, x] request field, falling back to the map's own position.
+
+    Positions must be in bounds and not on a wall.
+    """
+    if value is None:
+        if default is None:
+            raise PlanningError("The map has no default position; give start and goal")
+        return int(default[0]), int(default[1])
+    position = (int(value[0]), int(value[1]))
+    if not environment.is_valid_position(position):
+        raise PlanningError(f"Position out of bounds: {list(position)}")
+    if not environment.passable_cells[environment.index_of(position)]:
+        raise PlanningError(f"Position is not passable: {list(position)}")
+    return position
+
+async def serve_stdio(service):
+    """Serves requests from standard input, writing responses to standard output."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    async def send(response):
+        sys.stdout.write(json.dumps(response) + '\n')
+        sys.stdout.flush()
+
+    await service.serve(reader, send)
+
+async def serve_socket(service, socket_path):
+    """Serves requests from every client connecting to a Unix socket, until interrupted."""
+    async def client(reader, writer):
+        async def send(response):
+            writer.write((json.dumps(response) + '\n').encode())
+            await writer.drain()
+
+        try:
+            await service.serve(reader, send)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_unix_server(client, path=socket_path)
+    async with server:
+        await server.serve_forever()
+
+async def run(args):
+    # Stop cleanly on SIGTERM as well, so the shared memory blocks are released.
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, asyncio.current_task().cancel)
+    service = PlanningService(args.workers, args.timeout_ms)
+    try:
+        for map_path in args.preload:
+            await service.load(map_path)
+        if args.socket:
+            await serve_socket(service, args.socket)
+        else:
+            await serve_stdio(service)
+    finally:
+        service.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Planning service speaking JSON lines.")
+    parser.add_argument("--socket", default=None,
+                        help="Listen on this Unix socket instead of standard input/output.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes (default: one per CPU).")
+    parser.add_argument("--timeout-ms", type=float, default=None,
+                        help="Timeout of plan requests that do not set timeout_ms.")
+    parser.add_argument("--preload", nargs='*', default=[], metavar="MAP",
+                        help="Maps to load before serving.")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    except asyncio.CancelledError:
+        pass
+
+if __name__ == "__main__":
+    main()
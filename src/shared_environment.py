@@ -0,0 +1,75 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from environment import Environment
+
+# Arrays the planners read, which are published in shared memory instead of being pickled.
+SHARED_ARRAYS = ['cost_grid', 'passable_grid', 'occupancy', 'swept_grid', 'components']
+
+class SharedEnvironment:
+    """
+    Publishes an environment's grids in shared memory for worker processes.
+
+    The grids are copied into shared memory once. Workers receive only a small
+    descriptor (block names, shapes, dtypes and the environment's scalar
+    attributes) and map the same pages with attach_environment, so no task ever
+    pickles the grids.
+
+    The character grid is not shared, so attached environments cannot render
+    or add obstacles.
+    """
+    def __init__(self, environment):
+        """
+        Copies the environment's grids into new shared memory blocks.
+
+        Args:
+            environment (Environment): The environment to publish.
+        """
+        self.blocks = []
+        arrays = {}
+        for name in SHARED_ARRAYS:
+            array = getattr(environment, name)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            arrays[name] = (block.name, array.shape, array.dtype.str)
+
+        state = environment.__getstate__()
+        for name in SHARED_ARRAYS + ['grid', 'cell_codes']:
+            state.pop(name, None)
+        self.descriptor = {'arrays': arrays, 'state': state}
+
+    def close(self):
+        """Releases the shared memory blocks. Attached workers must be done with them."""
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def attach_environment(descriptor):
+    """
+    Rebuilds an environment on top of grids published by SharedEnvironment.
+
+    Args:
+        descriptor (dict): SharedEnvironment.descriptor.
+
+    Returns:
+        tuple: The environment and the list of attached shared memory blocks,
+        which must stay referenced for as long as the environment is used.
+    """
+    environment = Environment.__new__(Environment)
+    state = dict(descriptor['state'], grid=None, cell_codes=None)
+    blocks = []
+    for name, (block_name, shape, dtype) in descriptor['arrays'].items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        state[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    environment.__setstate__(state)
+    return environment, blocks
@@ -0,0 +1,302 @@
+"""
+Headless tick-based simulation.
+
+Agents follow their planned paths one cell per tick while obstacle events
+(cells that become walls at given ticks) change the map. A path is checked
+against the static grid and the dynamic obstacle schedule with one vectorized
+Environment.first_conflict call whenever the map changes, and an agent replans
+only once a predicted conflict comes within its lookahead. Nothing is drawn
+unless a renderer is attached; DiffRenderer redraws only the cells that
+changed since the previous tick.
+"""
+import sys
+import time
+
+import numpy as np
+
+def load_events(events_path):
+    """
+    Reads obstacle events from a text file.
+
+    Each non-empty line holds "tick y x" or "tick,y,x": at that tick the cell
+    (y, x) becomes a wall. Text after a '#' is ignored.
+
+    Args:
+        events_path (str): The path to the events file.
+
+    Returns:
+        list: (tick, (y, x)) tuples, in file order.
+    """
+    events = []
+    with open(events_path, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].replace(',', ' ').strip()
+            if not line:
+                continue
+            fields = line.split()
+            if len(fields) != 3:
+                raise ValueError(f"{events_path}:{line_number}: expected 'tick y x', got {line!r}")
+            events.append((int(fields[0]), (int(fields[1]), int(fields[2]))))
+    return events
+
+class SimulatedAgent:
+    """
+    The state of one agent in a simulation.
+
+    Attributes:
+        position (tuple): The current position (y, x).
+        goal_pos (tuple): The goal position (y, x).
+        path (list): The path being followed, or None while no path is known.
+        plan_tick (int): The tick at which the agent was at path[0].
+        conflict_tick (int): The tick of the first predicted conflict on the path, or None.
+        checked_version (int): The environment version the path was last checked against.
+        trail (list): Every position occupied, one per tick.
+        plans (int): Searches that found a path, including the first one.
+        failed_plans (int): Searches that found none; the agent waited instead.
+        collisions (int): Ticks spent on a blocked cell.
+    """
+    def __init__(self, start_pos, goal_pos):
+        self.position = (int(start_pos[0]), int(start_pos[1]))
+        self.goal_pos = (int(goal_pos[0]), int(goal_pos[1]))
+        self.path = None
+        self.plan_tick = 0
+        self.conflict_tick = None
+        self.checked_version = None
+        self.trail = [self.position]
+        self.arrived = self.position == self.goal_pos
+        self.cost = 0
+        self.nodes_expanded = 0
+        self.plans = 0
+        self.failed_plans = 0
+        self.collisions = 0
+
+class Simulation:
+    """
+    Advances agents tick by tick, replanning only on predicted conflicts.
+
+    Agents do not see each other; for fleets that must avoid one another use
+    algorithms.cooperative.CooperativePlanner.
+    """
+    def __init__(self, environment, agent, events=(), lookahead=None, renderer=None, deadline_ms=None):
+        """
+        Args:
+            environment (Environment): The environment to simulate. Obstacle events
+                are applied to it with add_obstacle.
+            agent (Agent): Provides the configured planning algorithm.
+            events (list): (tick, (y, x)) obstacle events; see load_events.
+            lookahead (int, optional): Replan once the agent is this many moves or
+                fewer from stepping into a predicted conflict; 0 replans just before
+                the move that would collide. By default any predicted conflict
+                triggers a replan as soon as it is detected.
+            renderer (DiffRenderer, optional): Draws every tick.
+            deadline_ms (float, optional): A time budget for every replan, passed
+                to the algorithm as for Agent.find_path ('ara_star' only).
+        """
+        if lookahead is not None and lookahead < 0:
+            raise ValueError(f"lookahead must be at least 0, got {lookahead}")
+        self.environment = environment
+        self.agent = agent
+        self.lookahead = lookahead
+        self.renderer = renderer
+        self.options = dict(agent.options)
+        if deadline_ms is not None:
+            self.options['deadline_ms'] = deadline_ms
+        self.tick = 0
+        self.agents = []
+        self.events = {}
+        for tick, position in events:
+            self.events.setdefault(tick, []).append(position)
+        self.conflict_checks = 0
+
+    def add_agent(self, start_pos, goal_pos, path=None):
+        """
+        Adds an agent and plans its first path.
+
+        Args:
+            start_pos (tuple): The agent's position (y, x) at the current tick.
+            goal_pos (tuple): The goal position (y, x).
+            path (list, optional): A path already planned from start_pos at the
+                current tick, used instead of planning one. It counts as the
+                agent's first search in plans.
+
+        Returns:
+            SimulatedAgent: The new agent's state.
+        """
+        simulated = SimulatedAgent(start_pos, goal_pos)
+        self.agents.append(simulated)
+        if path:
+            simulated.path = path
+            simulated.plan_tick = self.tick
+            simulated.plans += 1
+        elif not simulated.arrived:
+            self.replan(simulated)
+        return simulated
+
+    def replan(self, simulated):
+        """Plans a new path from the agent's position at the current tick."""
+        environment = self.environment
+        path, nodes_expanded, _ = self.agent.algorithm(environment, simulated.position, simulated.goal_pos,
+                                                       self.tick, **self.options)
+        simulated.nodes_expanded += nodes_expanded
+        simulated.checked_version = environment.version
+        simulated.conflict_tick = None
+        if path:
+            simulated.path = path
+            simulated.plan_tick = self.tick
+            simulated.plans += 1
+        else:
+            simulated.path = None # Wait in place and try again next tick
+            simulated.failed_plans += 1
+
+    def check(self, simulated):
+        """Predicts the first conflict on the rest of the agent's path after a map change."""
+        remaining = simulated.path[self.tick - simulated.plan_tick:]
+        conflict = self.environment.first_conflict(remaining, self.tick)
+        simulated.conflict_tick = None if conflict is None else self.tick + conflict
+        simulated.checked_version = self.environment.version
+        self.conflict_checks += 1
+
+    def step(self):
+        """Applies this tick's events, replans where needed and moves every agent one step."""
+        environment = self.environment
+        for position in self.events.pop(self.tick, []):
+            if environment.passable_cells[environment.index_of(position)]:
+                environment.add_obstacle(position)
+
+        for simulated in self.agents:
+            if simulated.arrived:
+                continue
+            if simulated.path is None:
+                self.replan(simulated)
+            elif simulated.checked_version != environment.version:
+                self.check(simulated)
+            # The agent steps into the conflict on the move to conflict_tick.
+            if simulated.conflict_tick is not None and \
+                    (self.lookahead is None or simulated.conflict_tick - self.tick - 1 <= self.lookahead):
+                self.replan(simulated)
+
+        self.tick += 1
+        for simulated in self.agents:
+            if simulated.arrived:
+                continue
+            if simulated.path is not None:
+                simulated.position = tuple(map(int, simulated.path[self.tick - simulated.plan_tick]))
+                simulated.cost += environment.get_cost(simulated.position)
+            if environment.is_obstacle(simulated.position, self.tick):
+                simulated.collisions += 1
+            simulated.trail.append(simulated.position)
+            simulated.arrived = simulated.position == simulated.goal_pos
+
+        if self.renderer is not None:
+            self.renderer.draw(self)
+
+    def done(self):
+        """Checks whether every agent has arrived."""
+        return all(simulated.arrived for simulated in self.agents)
+
+    def run(self, max_ticks=10000):
+        """
+        Steps until every agent has arrived or max_ticks have passed.
+
+        Returns:
+            dict: Summary statistics of the run.
+        """
+        if self.renderer is not None:
+            self.renderer.draw(self)
+        started = time.perf_counter()
+        first_tick = self.tick
+        while not self.done() and self.tick - first_tick < max_ticks:
+            self.step()
+        elapsed = time.perf_counter() - started
+        ticks = self.tick - first_tick
+        return {
+            'ticks': ticks,
+            'arrived': sum(simulated.arrived for simulated in self.agents),
+            'agents': len(self.agents),
+            'cost': sum(simulated.cost for simulated in self.agents),
+            'nodes_expanded': sum(simulated.nodes_expanded for simulated in self.agents),
+            'plans': sum(simulated.plans for simulated in self.agents),
+            'failed_plans': sum(simulated.failed_plans for simulated in self.agents),
+            'collisions': sum(simulated.collisions for simulated in self.agents),
+            'conflict_checks': self.conflict_checks,
+            'seconds': elapsed,
+            'ticks_per_second': ticks / elapsed if elapsed > 0 else float('inf'),
+        }
+
+class DiffRenderer:
+    """
+    Draws a simulation in an ANSI terminal, rewriting only the cells that changed.
+
+    The first frame is drawn in full. After that only cells a dynamic obstacle
+    entered or left, cells that became walls, and cells agents left or entered
+    are compared with what is on screen, so a tick costs time proportional to
+    what moved rather than to the size of the map.
+    """
+    def __init__(self, environment, stream=None, delay=0.0):
+        """
+        Args:
+            environment (Environment): The simulated environment.
+            stream (file, optional): Where to write; standard output by default.
+            delay (float): Seconds to pause after each frame, to watch the run.
+        """
+        self.environment = environment
+        self.stream = stream or sys.stdout
+        self.delay = delay
+        # Terrain without the dynamic obstacles' starting cells, which move.
+        self.base = np.array(environment.char_grid(), copy=True)
+        self.base[(self.base == 'D') | (self.base == '*')] = '.'
+        self.trail = np.zeros(self.base.shape, dtype=bool)
+        self.screen = None
+        self.last_tick = None
+        self.changes_seen = 0
+        self.agent_cells = set()
+
+    def cell_char(self, position, agent_cells, occupancy):
+        """The character a cell should show this tick."""
+        if position in agent_cells:
+            return 'A'
+        if occupancy[position]:
+            return 'D'
+        if self.trail[position] and self.base[position] == '.':
+            return '*'
+        return self.base[position]
+
+    def draw(self, simulation):
+        """Draws the simulation's current tick."""
+        environment = self.environment
+        occupancy = environment.occupancy[simulation.tick % environment.period, 1:-1, 1:-1]
+        agent_cells = {simulated.position for simulated in simulation.agents}
+        for position in agent_cells:
+            self.trail[position] = True
+        new_walls = [environment.position_of(index) for index in environment.changed_cells[self.changes_seen:]]
+        self.changes_seen = len(environment.changed_cells)
+        for position in new_walls:
+            self.base[position] = '#'
+
+        if self.screen is None:
+            self.screen = self.base.copy()
+            self.screen[occupancy] = 'D'
+            for position in agent_cells:
+                self.screen[position] = 'A'
+            output = ['\x1b[2J\x1b[H'] + [''.join(row) + '\n' for row in self.screen]
+        else:
+            previous = environment.occupancy[self.last_tick % environment.period, 1:-1, 1:-1]
+            candidates = set(zip(*np.nonzero(occupancy != previous)))
+            candidates.update(new_walls)
+            candidates.update(self.agent_cells)
+            candidates.update(agent_cells)
+            output = []
+            for position in candidates:
+                position = (int(position[0]), int(position[1]))
+                char = self.cell_char(position, agent_cells, occupancy)
+                if self.screen[position] != char:
+                    self.screen[position] = char
+                    output.append(f'\x1b[{position[0] + 1};{position[1] + 1}H{char}')
+        # Park the cursor below the map with a status line.
+        output.append(f'\x1b[{self.base.shape[0] + 1};1Htick {simulation.tick}\x1b[K\n')
+        self.stream.write(''.join(output))
+        self.stream.flush()
+        self.last_tick = simulation.tick
+        self.agent_cells = agent_cells
+        if self.delay:
+            time.sleep(self.delay)
@@ -0,0 +1,26 @@
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from agent import Agent
+from environment import Environment
+
+LARGE_MAP = os.path.join(ROOT, 'maps', 'large.txt')
+
+def test_find_path_replans_after_the_map_changes():
+    environment = Environment(LARGE_MAP)
+    agent = Agent(environment)
+    agent.set_algorithm('a_star')
+    path, _, _ = agent.find_path()
+    assert agent.find_path()[0] == path
+    assert agent.path_cache.hits == 1
+
+    blocked = tuple(int(value) for value in path[len(path) // 2])
+    environment.add_obstacle(blocked)
+    new_path, nodes_expanded, _ = agent.find_path()
+    assert agent.path_cache.hits == 1
+    assert agent.path_cache.invalidations == 1
+    assert nodes_expanded > 0
+    assert new_path and blocked not in [tuple(int(value) for value in position) for position in new_path]
@@ -0,0 +1,87 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from environment import Environment
+from algorithms.a_star import a_star
+from algorithms.d_star_lite import DStarLite
+from algorithms.heuristics import distance_field_heuristic
+from algorithms.jps import jump_point_search
+from algorithms.sipp import sipp
+from algorithms.ucs import ucs
+
+LARGE_MAP = os.path.join(ROOT, 'maps', 'large.txt')
+DYNAMIC_MAP = os.path.join(ROOT, 'maps', 'dynamic.txt')
+
+def test_distance_field_is_not_shared_between_environments():
+    # Both environments start from the same file and have one change each, so
+    # they agree on fingerprint and version but not on their grids.
+    for blocked in [(2, 3), (6, 16)]:
+        other = Environment(LARGE_MAP)
+        other.add_obstacle(blocked)
+        a_star(other, other.start_pos, other.goal_pos, heuristic=distance_field_heuristic)
+
+        environment = Environment(LARGE_MAP)
+        environment.add_obstacle((1, 3))
+        path, _, cost = a_star(environment, environment.start_pos, environment.goal_pos,
+                               heuristic=distance_field_heuristic)
+        assert path
+        assert cost == a_star(environment, environment.start_pos, environment.goal_pos, bidirectional=False)[2]
+        assert cost == 32
+
+def _without_moving_obstacles(tmp_path, map_path):
+    """Writes a copy of a map whose dynamic obstacles are walls instead."""
+    copy_path = tmp_path / 'walls.txt'
+    with open(map_path) as f:
+        copy_path.write_text(f.read().replace('D', '#'))
+    return str(copy_path)
+
+def _colliding_paths(planner, environment):
+    """Plans from the start to every open cell and counts paths that hit an obstacle."""
+    collisions = 0
+    for y, x in zip(*environment.passable_grid[1:-1, 1:-1].nonzero()):
+        path = planner(environment, environment.start_pos, (int(y), int(x)))[0]
+        if path and environment.first_conflict(path) is not None:
+            collisions += 1
+    return collisions
+
+def test_sipp_intervals_are_not_shared_with_a_map_of_walls(tmp_path):
+    walls = Environment(_without_moving_obstacles(tmp_path, DYNAMIC_MAP))
+    sipp(walls, walls.start_pos, walls.goal_pos)
+    assert _colliding_paths(sipp, Environment(DYNAMIC_MAP)) == 0
+
+def test_jps_interior_is_not_shared_with_a_map_of_walls(tmp_path):
+    walls = Environment(_without_moving_obstacles(tmp_path, DYNAMIC_MAP))
+    jump_point_search(walls, walls.start_pos, walls.goal_pos)
+    assert _colliding_paths(jump_point_search, Environment(DYNAMIC_MAP)) == 0
+
+def test_start_on_a_wall_falls_back_to_forward_search():
+    environment = Environment(LARGE_MAP)
+    for planner in [a_star, ucs]:
+        path, _, cost = planner(environment, (0, 0), environment.goal_pos)
+        assert path and cost == 33
+        assert planner(environment, environment.start_pos, (0, 0))[0] is None
+
+def test_d_star_lite_repair_matches_a_search_from_scratch():
+    environment = Environment(LARGE_MAP)
+    planner = DStarLite()
+    start = environment.start_pos
+    path = planner(environment, start, environment.goal_pos)[0]
+    # Wall off a cell a third of the way along the current path until none is left,
+    # moving the agent a few cells along it before the third change.
+    for change in range(10):
+        if change == 2:
+            start = tuple(int(value) for value in path[3])
+        environment.add_obstacle(tuple(int(value) for value in path[len(path) // 3]))
+        path, _, cost = planner(environment, start, environment.goal_pos)
+        expected_path, _, expected_cost = ucs(environment, start, environment.goal_pos, bidirectional=False)
+        assert (path is None) == (expected_path is None)
+        if path is None:
+            break
+        assert cost == pytest.approx(expected_cost)
+        assert environment.first_conflict(path) is None
+    assert path is None
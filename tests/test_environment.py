@@ -0,0 +1,103 @@
+import itertools
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from environment import Environment, label_components
+from map_format import MAP_ARRAYS, save_binary_map
+
+LARGE_MAP = os.path.join(ROOT, 'maps', 'large.txt')
+DYNAMIC_MAP = os.path.join(ROOT, 'maps', 'dynamic.txt')
+
+# A room each side of a middle room with a pillar, joined through single cells.
+CORRIDOR_MAP = """\
+###########
+#S.#...#..#
+#.#..#....#
+#..#...#.G#
+###########
+"""
+
+def _write_map(tmp_path, text, name='map.txt'):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+def _assert_components_match_grid(environment):
+    """Checks connected() against component labels computed from scratch on the current grid."""
+    fresh = label_components(environment.passable_grid)[1:-1, 1:-1]
+    representatives = {}
+    for cell in zip(*np.nonzero(fresh >= 0)):
+        representative = representatives.setdefault(fresh[cell], cell)
+        assert environment.connected(cell, representative), cell
+    for first, second in itertools.combinations(representatives.values(), 2):
+        assert not environment.connected(first, second), (first, second)
+
+def test_maps_without_passable_cells_load(tmp_path):
+    for text in ['#####\n#####\n', '']:
+        environment = Environment(_write_map(tmp_path, text))
+        assert (environment.components == -1).all()
+
+def test_connected_is_false_outside_the_grid():
+    environment = Environment(LARGE_MAP)
+    for outside in [(-1, 0), (0, -1), (environment.height, 0), (0, environment.width)]:
+        assert not environment.connected(environment.start_pos, outside)
+        assert not environment.connected(outside, environment.goal_pos)
+
+def test_add_obstacle_splits_components(tmp_path):
+    environment = Environment(_write_map(tmp_path, CORRIDOR_MAP))
+    start, goal = environment.start_pos, environment.goal_pos
+    assert environment.connected(start, goal)
+
+    # The two sides of the pillar meet again below it.
+    environment.add_obstacle((1, 5))
+    _assert_components_match_grid(environment)
+    assert environment.connected(start, goal)
+
+    # Cutting the corridor leaves the goal's room on its own.
+    environment.add_obstacle((2, 7))
+    _assert_components_match_grid(environment)
+    assert not environment.connected(start, goal)
+
+    # Three groups around the cell: two of them meet in the left room.
+    environment.add_obstacle((2, 3))
+    _assert_components_match_grid(environment)
+
+    environment.add_obstacle((2, 1))
+    _assert_components_match_grid(environment)
+    environment.add_obstacle((1, 1))
+    _assert_components_match_grid(environment)
+
+def test_add_obstacle_keeps_components_of_a_large_map():
+    environment = Environment(LARGE_MAP)
+    for x in range(2, 29, 3):
+        environment.add_obstacle((1, x))
+        _assert_components_match_grid(environment)
+
+def test_binary_map_loads_like_its_text_map(tmp_path):
+    text = Environment(DYNAMIC_MAP)
+    binary_path = str(tmp_path / 'dynamic.map')
+    save_binary_map(text, binary_path)
+    binary = Environment(binary_path)
+
+    for name in MAP_ARRAYS[1:]:
+        assert np.array_equal(getattr(binary, name), getattr(text, name)), name
+    assert np.array_equal(binary.char_grid(), text.char_grid())
+    assert (binary.start_pos, binary.goal_pos) == (text.start_pos, text.goal_pos)
+    assert binary.goal_positions == text.goal_positions
+    assert binary.dynamic_obstacles_initial_positions == text.dynamic_obstacles_initial_positions
+    assert (binary.fingerprint, binary.period) == (text.fingerprint, text.period)
+
+    # The grids are mapped copy-on-write: changing the map leaves the file as it was.
+    with open(binary_path, 'rb') as f:
+        saved = f.read()
+    binary.add_obstacle(binary.start_pos)
+    assert not binary.passable_grid[binary.start_pos[0] + 1, binary.start_pos[1] + 1]
+    with open(binary_path, 'rb') as f:
+        assert f.read() == saved
+    reloaded = Environment(binary_path)
+    assert np.array_equal(reloaded.passable_grid, text.passable_grid)